@@ -15,6 +15,9 @@ from .check_list_tasks_agent import CheckListTasksAgent
 from .test_agent import TesterAgent
 from .diagram_agent import DiagramAgent
 from .impl_tasks_agent import ImplTasksAgent
+from .idea_analyst import CombinedIdeaAnalystAgent
+from .combined_docs import CombinedDocsAgent
+from .scheduler import run_dag
 
 __all__ = [
     "BaseAgent",
@@ -31,5 +34,8 @@ __all__ = [
     "BusinessAgent",
     "ScoringAgent",
     "IdeaGenAgent",
-    "ImplTasksAgent"
+    "ImplTasksAgent",
+    "CombinedIdeaAnalystAgent",
+    "CombinedDocsAgent",
+    "run_dag"
 ]
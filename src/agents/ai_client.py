@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from utils import load_config
 
@@ -9,5 +10,29 @@ class AiClient(ABC):
         pass
 
     @abstractmethod
-    def generate_content(self, prompt: str) -> str:
-        pass
\ No newline at end of file
+    def generate_content(self, prompt: str, cache: bool = True, schema: dict | None = None, system: str | None = None) -> str:
+        """
+        Returns the model response for prompt.
+        cache=False asks a caching wrapper (CachedModel) for a fresh response; plain clients ignore it.
+        schema is a JSON schema the response must follow, for clients with a native JSON mode; the prompt
+        should still ask for JSON, since other clients ignore it.
+        system is a static instructions block sent ahead of prompt as the system message, so the provider
+        can cache it across calls.
+        """
+        pass
+
+    def effective_model_name(self) -> str | None:
+        """The model the next request would be sent to. Clients with a fallback model override this."""
+        return getattr(self, "model_name", None)
+
+    async def agenerate_content(self, prompt: str, cache: bool = True, schema: dict | None = None, system: str | None = None) -> str:
+        """Async variant of generate_content. Clients without a native async API run the sync call in a worker thread."""
+        return await asyncio.to_thread(self.generate_content, prompt, cache, schema, system)
+
+    async def stream_generate_content(self, prompt: str, cache: bool = True, system: str | None = None):
+        """Async iterator over response text chunks. Clients without streaming support yield the whole response once."""
+        yield await self.agenerate_content(prompt, cache, system=system)
+
+    async def agenerate_variants(self, prompt: str, n: int) -> list[str]:
+        """Returns n independently sampled responses for prompt. Clients without native support make n calls."""
+        return list(await asyncio.gather(*(self.agenerate_content(prompt, cache=False) for _ in range(n))))
@@ -4,6 +4,18 @@ import re # Added for parsing
 from .base_agent import BaseAgent
 from .coder import CoderAgent
 
+# Delimited sections of the AI output; each captures content until the next delimiter or end of string
+_KEY_FEATURE_RE = re.compile(r"<<<KEY_FEATURE:\s*(.*?)>>>\s*(.*?)(?=\s*<<<KEY_FEATURE|\Z)", re.DOTALL | re.IGNORECASE)
+_FEATURE_RE = re.compile(r"<<<FEATURE:\s*(.*?)>>>\s*(.*?)(?=\s*<<<FEATURE|\Z)", re.DOTALL | re.IGNORECASE)
+_COMPONENT_RE = re.compile(r"<<<COMPONENT:\s*(.*?)>>>\s*(.*?)(?=\s*<<<|\Z)", re.DOTALL | re.IGNORECASE)
+_INTEGRATION_RE = re.compile(r"<<<INTEGRATION>>>(.*)", re.DOTALL | re.IGNORECASE)
+_SAFE_NAME_RE = re.compile(r"[^0-9a-zA-Z]+") # Runs of characters not allowed in plan file names
+
+
+def _safe_name(name: str) -> str:
+    """Lowercase file name part for name: runs of other characters become '_', without a trailing '_'."""
+    return _SAFE_NAME_RE.sub('_', name.strip().lower()).removesuffix('_')
+
 
 class ArchitectAgent(BaseAgent):
     """
@@ -26,7 +38,7 @@ class ArchitectAgent(BaseAgent):
             IOError: If writing output files fails.
         """
         self.logger.info(f"Running Architect Agent for project: {self.project_name})")
-        idea_md_path = os.path.join(self.docs_path, "idea.md")
+        idea_md_path = self.idea_md_path
 
         self.logger.info(f"Reading concept from: {idea_md_path}")
         idea_content = self._read_file(idea_md_path)
@@ -76,11 +88,11 @@ class ArchitectAgent(BaseAgent):
         prompt = self._create_feature_impl_prompt(idea_content, feature_content)
         
         # Create mode 
-        self.logger.debug(f"Generated create prompt for LLM (Architect):\n{prompt[:500]}...")
+        self.logger.debug("Generated create prompt for LLM (Architect):\n%.500s...", prompt)
         try:
             self.logger.info("Sending request to LLM API for feature impl prompt...")
             feature_impl_prompt = self.model.generate_content(prompt)           
-            self.logger.debug(f"Generated feature impl prompt (first 500 chars):\n{feature_impl_prompt[:500]}...")
+            self.logger.debug("Generated feature impl prompt (first 500 chars):\n%.500s...", feature_impl_prompt)
         except Exception as e:
             self.logger.error(f"An unexpected error occurred during LLM API call (Architect): {e}", exc_info=True)
             raise RuntimeError(f"Failed to generate architecture plan using AI: {e}")
@@ -122,15 +134,15 @@ class ArchitectAgent(BaseAgent):
         
     
         # Create mode 
-        self.logger.debug(f"Generated create prompt for LLM (Architect):\n{prompt[:500]}...")
+        self.logger.debug("Generated create prompt for LLM (Architect):\n%.500s...", prompt)
         try:
             self.logger.info("Sending request to LLM API for enhanced prompt...")
             enhanced_prompt = self.model.generate_content(prompt)    
 
-            self.logger.debug(f"Generated enhanced prompt (first 500 chars):\n{enhanced_prompt[:500]}...")
+            self.logger.debug("Generated enhanced prompt (first 500 chars):\n%.500s...", enhanced_prompt)
             enhanced_content = self.model.generate_content(enhanced_prompt)
    
-            self.logger.debug(f"Generated enhanced content (first 500 chars):\n{enhanced_prompt[:500]}...")
+            self.logger.debug("Generated enhanced content (first 500 chars):\n%.500s...", enhanced_prompt)
         except Exception as e:
             self.logger.error(f"An unexpected error occurred during LLM API call (Architect): {e}", exc_info=True)
             raise RuntimeError(f"Failed to generate architecture plan using AI: {e}")
@@ -170,12 +182,12 @@ class ArchitectAgent(BaseAgent):
          
         # Create mode 
         prompt = self._create_prompt(idea_content)
-        self.logger.debug(f"Generated create prompt for LLM (Architect):\n{prompt[:500]}...")
+        self.logger.debug("Generated create prompt for LLM (Architect):\n%.500s...", prompt)
         try:
             self.logger.info("Sending request to LLM API for architecture plan...")
             generated_plan = self.model.generate_content(prompt)
             self.logger.info("Received architecture plan from LLM API.")
-            self.logger.debug(f"Generated Plan (first 200 chars):\n{generated_plan[:200]}...")
+            self.logger.debug("Generated Plan (first 200 chars):\n%.200s...", generated_plan)
             return generated_plan
         except Exception as e:
             self.logger.error(f"An unexpected error occurred during LLM API call (Architect): {e}", exc_info=True)
@@ -458,17 +470,10 @@ Analyze the following project concept (provided in Markdown) and generate a set
             ValueError: If parsing fails (e.g., delimiters not found).
             IOError: If writing files fails.
         """
-        # Updated regex to capture content until the next delimiter or end of string
-        feature_pattern = re.compile(r"<<<KEY_FEATURE:\s*(.*?)>>>\s*(.*?)(?=\s*<<<KEY_FEATURE|\Z)", re.DOTALL | re.IGNORECASE)
-    
-        features = feature_pattern.findall(combined_output)
+        features = _KEY_FEATURE_RE.findall(combined_output)
+        files_to_write = {} # Written together once all features are parsed
         for feature_name, feature in features:
-            feature_id = feature_name.strip().lower()
-            feature_id = re.sub('[^0-9a-zA-Z]+', '_', feature_id)
-            if feature_id[-1] == '_':
-                feature_id = feature_id[:-1]
-
-            written_files = []
+            feature_id = _safe_name(feature_name)
 
             # Write feature files
            
@@ -482,14 +487,14 @@ Analyze the following project concept (provided in Markdown) and generate a set
             # Add a header if the AI didn't include one (optional, but good practice)
             
             feature_content = f"<<<KEY_FEATURE: `{feature_name}` ID: id_{feature_id} \n\n{feature_content}\n\n>>>"
-            self._write_file(file_path, feature_content) # Raises IOError on failure
-            written_files.append(file_path)
+            files_to_write[file_path] = feature_content
 
     
-        if not written_files:
+        if not files_to_write:
              raise ValueError("Parsing completed, but no valid features were extracted to write.")
 
-        return written_files
+        self._write_files(files_to_write)
+        return list(files_to_write)
         
     def _parse_and_write_feature_plans(self, combined_output: str) -> list[str]:
         """
@@ -505,32 +510,20 @@ Analyze the following project concept (provided in Markdown) and generate a set
             ValueError: If parsing fails (e.g., delimiters not found).
             IOError: If writing files fails.
         """
-        # Updated regex to capture content until the next delimiter or end of string
-        feature_pattern = re.compile(r"<<<FEATURE:\s*(.*?)>>>\s*(.*?)(?=\s*<<<FEATURE|\Z)", re.DOTALL | re.IGNORECASE)
-        component_pattern = re.compile(r"<<<COMPONENT:\s*(.*?)>>>\s*(.*?)(?=\s*<<<|\Z)", re.DOTALL | re.IGNORECASE)
-        integration_pattern = re.compile(r"<<<INTEGRATION>>>(.*)", re.DOTALL | re.IGNORECASE)
-
-        features = feature_pattern.findall(combined_output)
+        features = _FEATURE_RE.findall(combined_output)
+        files_to_write = {} # Written together once all features are parsed
         for feature_name, feature in features:
-            feature_id = feature_name.lower()
-            feature_id = re.sub('[^0-9a-zA-Z]+', '_', feature_id)
-            if feature_id[-1] == '_':
-                feature_id = feature_id[:-1]
+            feature_id = _safe_name(feature_name)
 
-            components = component_pattern.findall(feature)
-            integration_match = integration_pattern.search(feature)
+            components = _COMPONENT_RE.findall(feature)
+            integration_match = _INTEGRATION_RE.search(feature)
 
             if not components and not integration_match:
                 raise ValueError("Could not find any <<<COMPONENT: ...>>> or <<<INTEGRATION>>> delimiters in the AI output.")
 
-            written_files = []
-
             # Write component files
             for name, content in components:
-                component_name = name.strip().lower()
-                component_name = re.sub('[^0-9a-zA-Z]+', '_', component_name)
-                if component_name[-1] == '_':
-                    component_name = component_name[:-1]
+                component_name = _safe_name(name)
             
                 if not component_name:
                     self.logger.warning("Found component block with empty name, skipping.")
@@ -541,8 +534,7 @@ Analyze the following project concept (provided in Markdown) and generate a set
                 plan_content = content.strip()
                 # Add a header if the AI didn't include one (optional, but good practice)
                 plan_content = f"<<<KEY_FEATURE: `{feature_name.replace('_',' ').strip()}` component `{component_name}` ID: id_{component_name}\n\n{plan_content}\n\n>>>"
-                self._write_file(file_path, plan_content) # Raises IOError on failure
-                written_files.append(file_path)
+                files_to_write[file_path] = plan_content
 
             # Write integration file
             if integration_match:
@@ -552,15 +544,15 @@ Analyze the following project concept (provided in Markdown) and generate a set
                 plan_content = integration_match.group(1).strip()
                 # Add a header if the AI didn't include one
                 plan_content = f"<<<KEY_FEATURE: `{feature_name.replace('_',' ').strip()}` ID: id_{feature_id} \n\n{plan_content}\n\n>>>"
-                self._write_file(file_path, plan_content) # Raises IOError on failure
-                written_files.append(file_path)
+                files_to_write[file_path] = plan_content
             else:
                 self.logger.warning("No <<<INTEGRATION>>> section found in the AI output.")
 
-        if not written_files:
+        if not files_to_write:
              raise ValueError("Parsing completed, but no valid component or integration plans were extracted to write.")
 
-        return written_files
+        self._write_files(files_to_write)
+        return list(files_to_write)
 
 
     def _parse_and_write_plans(self, combined_output: str) -> list[str]:
@@ -578,22 +570,18 @@ Analyze the following project concept (provided in Markdown) and generate a set
             ValueError: If parsing fails (e.g., delimiters not found).
             IOError: If writing files fails.
         """
-        # Updated regex to capture content until the next delimiter or end of string
-        component_pattern = re.compile(r"<<<COMPONENT:\s*(.*?)>>>\s*(.*?)(?=\s*<<<|\Z)", re.DOTALL | re.IGNORECASE)
-        integration_pattern = re.compile(r"<<<INTEGRATION>>>(.*)", re.DOTALL | re.IGNORECASE)
-
-        components = component_pattern.findall(combined_output)
-        integration_match = integration_pattern.search(combined_output)
+        components = _COMPONENT_RE.findall(combined_output)
+        integration_match = _INTEGRATION_RE.search(combined_output)
 
         if not components and not integration_match:
             raise ValueError("Could not find any <<<COMPONENT: ...>>> or <<<INTEGRATION>>> delimiters in the AI output.")
 
-        written_files = []
+        files_to_write = {} # Written together once all plans are parsed
 
         # Write component files
         for name, content in components:
             component_name = name.strip().lower()
-            component_name = re.sub('[^0-9a-zA-Z]+', '_', component_name)
+            component_name = _SAFE_NAME_RE.sub('_', component_name)
             if not component_name:
                 self.logger.warning("Found component block with empty name, skipping.")
                 continue
@@ -604,8 +592,7 @@ Analyze the following project concept (provided in Markdown) and generate a set
             # Add a header if the AI didn't include one (optional, but good practice)
             if not plan_content.startswith("#"):
                  plan_content = f"# Implementation Plan: {component_name.capitalize()}\n\n{plan_content}"
-            self._write_file(file_path, plan_content) # Raises IOError on failure
-            written_files.append(file_path)
+            files_to_write[file_path] = plan_content
 
         # Write integration file
         if integration_match:
@@ -616,14 +603,16 @@ Analyze the following project concept (provided in Markdown) and generate a set
              # Add a header if the AI didn't include one
             if not plan_content.startswith("#"):
                  plan_content = f"# Integration Plan\n\n{plan_content}"
-            self._write_file(file_path, plan_content) # Raises IOError on failure
-            written_files.append(file_path)
+            files_to_write[file_path] = plan_content
         else:
             self.logger.warning("No <<<INTEGRATION>>> section found in the AI output.")
 
-        if not written_files:
+        if not files_to_write:
              raise ValueError("Parsing completed, but no valid component or integration plans were extracted to write.")
 
+        self._write_files(files_to_write)
+        written_files = list(files_to_write)
+
         return written_files
 
     def _create_update_prompt(self, existing_impl_content: str | None, modification_text: str, idea_content: str) -> str:
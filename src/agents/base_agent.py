@@ -1,38 +1,87 @@
+import asyncio
+import hashlib
 import logging
 import os
+import tempfile
+import time
+import weakref
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from utils import load_config
-from agents.openai_client import OpenAIClient
+from agents.openai_client import get_client
+from agents.llm_cache import LLMCache, CachedModel, SemanticCache, SEMANTIC_THRESHOLD
+from agents.batch import get_batching_proxy
+
+STREAM_FLUSH_BYTES = 64 * 1024 # Flush streamed output once this much is buffered...
+STREAM_FLUSH_INTERVAL = 0.2 # ...or after this many seconds, whichever comes first
+SMALL_WRITE_BYTES = 1024 * 1024 # _write_file payloads below this go out in one os.write
+CHARS_PER_TOKEN = 4 # Rough chars-per-token estimate used to bound prompt inputs
+IMPL_CONTENT_MAX_CHARS = 200_000 # Combined impl_*.md content read for a prompt stops after this many chars
+IMPL_PLANS_CACHE_SIZE = 16 # Combined impl_*.md contents kept by _read_impl_plans (oldest evicted first)
+WRITE_WORKERS = 8 # Thread pool size for writing several generated files at once
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8 # In-flight LLM requests across agents when llm.max_concurrent_requests is unset
+
+_llm_semaphores = weakref.WeakKeyDictionary() # Event loop -> shared in-flight request limiter
+_docs_cache: dict[str, tuple[int, int, str]] = {} # Project document path -> (mtime_ns, size, content), see _read_file
+_impl_plans_cache: dict[tuple, str] = {} # ((path, mtime_ns, size), ...) of the impl_*.md plans -> combined content
+_pending_fsync: set[str] = set() # Files written by _write_file and not yet fsynced, see BaseAgent.finalize()
 
 class BaseAgent(ABC):
     """Abstract base class for all agents."""
 
-    def __init__(self, project_name: str, project_path: str):
+    MODEL_TIER = "strong" # Key into llm.tiers in config.yaml; agents doing cheap calls override this
+    MAX_IDEA_TOKENS = 6000 # idea.md content beyond this is truncated per section before prompting
+
+    def __init__(self, project_name: str, project_path: str, model_tier: str | None = None):
         """
         Initializes the agent with project context.
 
         Args:
             project_name: The name of the project.
             project_path: The absolute path to the project directory.
+            model_tier: Overrides the class MODEL_TIER ("cheap" or "strong").
         """
         self.project_name = project_name
         self.project_path = project_path
         self.docs_path = os.path.join(self.project_path, "docs")
+        self._docs = Path(self.docs_path)
+        self.idea_md_path = os.path.join(self.docs_path, "idea.md")
+        self.analysis_md_path = os.path.join(self.docs_path, "market_analysis.md")
         self.src_path = os.path.join(self.project_path, "src")
         self.tests_path = os.path.join(self.project_path, "tests")
         self.logger = logging.getLogger(self.__class__.__name__)
 
         # Load configuration
         config = load_config()
-        model_name = config.get('llm', {}).get('model')
+        self.config = config
+        self.model_tier = model_tier or self.MODEL_TIER
+        # Tiers without a configured model fall back to the default llm.model
+        model_name = (config.get('llm', {}).get('tiers') or {}).get(self.model_tier) or config.get('llm', {}).get('model')
         provider = config.get('llm', {}).get('provider')
 
-        self.logger.info(f"Using LLM model: {model_name} from provider: {provider}")
+        self.logger.info(f"Using LLM model: {model_name} ({self.model_tier} tier) from provider: {provider}")
         if provider  in ["grok", "groq", "openrouter"]:
-            self.model = OpenAIClient()
+            self.model = get_client(model_name)
         else:
             raise Exception(f"Unknown AI provider {provider} - Cant initialize client")
-        
+
+        # MAAI_LLM_CACHE=1 enables the response cache (e.g. for deterministic re-runs) and =off disables it,
+        # without editing config.yaml
+        cache_env = os.environ.get("MAAI_LLM_CACHE", "").lower()
+        cache_enabled = cache_env in ("on", "1", "true", "yes") or (
+            config.get('llm', {}).get('cache', False) and cache_env not in ("off", "0", "false", "no"))
+        if cache_enabled:
+            cache_dir = os.path.join(self.project_path, ".llm_cache")
+            cache_ttl = config.get('llm', {}).get('cache_ttl')
+            semantic = None
+            if config.get('llm', {}).get('semantic_cache', False):
+                threshold = config.get('llm', {}).get('semantic_cache_threshold') or SEMANTIC_THRESHOLD
+                semantic = SemanticCache(cache_dir, threshold=threshold, ttl=cache_ttl)
+            cache_max_entries = config.get('llm', {}).get('cache_max_entries')
+            self.model = CachedModel(self.model, LLMCache(cache_dir, ttl=cache_ttl, max_entries=cache_max_entries), semantic=semantic)
+            self.logger.info(f"LLM response cache enabled at: {cache_dir}" + (" (with semantic lookup)" if semantic else ""))
+
         self.logger.info(f"Initialized for project: {self.project_name}")
 
     def generate_content(self, prompt: str) -> str:
@@ -43,6 +92,62 @@ class BaseAgent(ABC):
 
         return self.model.method(prompt=prompt)
 
+    async def _generate(self, prompt: str, cache: bool = True, schema: dict | None = None) -> str:
+        """
+        Awaits the LLM response for prompt. Calls from all agents on the event loop share a limit of
+        llm.max_concurrent_requests in-flight requests; Batch API submissions are not limited.
+        cache=False bypasses the response cache lookup (llm.cache) for this call.
+        schema requests provider JSON schema mode. Batch API responses are stored in the response cache as well.
+        """
+        if self._use_batch_api():
+            proxy = get_batching_proxy(self.model)
+            generate = lambda: proxy.agenerate_content(prompt, schema=schema)
+            if isinstance(self.model, CachedModel):
+                return await self.model.agenerate_cached(prompt, generate, cache=cache, schema=schema)
+            return await generate()
+        async with self._llm_semaphore():
+            return await self.model.agenerate_content(prompt, cache=cache, schema=schema)
+
+    async def _generate_to_file(self, file_path: str, prompt: str, prefix: str = "", cache: bool = True) -> str:
+        """
+        Generates the response for prompt straight into file_path (after prefix) and returns the response text.
+        Streams under the shared in-flight limit, or writes the whole response at once when the Batch API is used.
+        """
+        if self._use_batch_api():
+            generated_output = await self._generate(prompt, cache=cache)
+            await self._awrite_file(file_path, [prefix, generated_output])
+            return generated_output
+        async with self._llm_semaphore():
+            return await self._astream_to_file(file_path, self.model.stream_generate_content(prompt, cache=cache), prefix=prefix)
+
+    async def _generate_variants_to_files(self, file_path: str, prompt: str, num_variants: int, prefix: str = "") -> list[str]:
+        """
+        Generates num_variants sampled responses for prompt in one request and writes them (after prefix)
+        to file_path with a .v1, .v2, ... suffix before the extension. Returns the written paths.
+        """
+        async with self._llm_semaphore():
+            variants = await self.model.agenerate_variants(prompt, num_variants)
+        root, ext = os.path.splitext(file_path)
+        variant_paths = [f"{root}.v{i}{ext}" for i in range(1, len(variants) + 1)]
+        await asyncio.gather(*(self._awrite_file(path, [prefix, variant]) for path, variant in zip(variant_paths, variants)))
+        return variant_paths
+
+    def _llm_semaphore(self) -> asyncio.Semaphore:
+        """The in-flight LLM request limiter shared by all agents on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop not in _llm_semaphores:
+            max_requests = self.config.get('llm', {}).get('max_concurrent_requests') or DEFAULT_MAX_CONCURRENT_REQUESTS
+            _llm_semaphores[loop] = asyncio.Semaphore(max_requests)
+        return _llm_semaphores[loop]
+
+    def _use_batch_api(self) -> bool:
+        """True if llm.use_batch_api is set: latency-tolerant calls go through the provider Batch API."""
+        return bool(self.config.get('llm', {}).get('use_batch_api', False))
+
+    def _use_structured_output(self) -> bool:
+        """True if llm.structured_output is set: agents that support it request JSON and render their Markdown locally."""
+        return bool(self.config.get('llm', {}).get('structured_output', False))
+
     @abstractmethod
     def run(self, *args, **kwargs) -> str:
         """
@@ -52,10 +157,22 @@ class BaseAgent(ABC):
         pass
 
     def _read_file(self, file_path: str) -> str | None:
-        """Helper method to read a file."""
+        """
+        Helper method to read a file. Project documents (under docs/) are served from a process-wide
+        copy while their mtime and size are unchanged, so agents sharing idea.md read it once.
+        """
         try:
+            if not file_path.startswith(self.docs_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+            st = os.stat(file_path)
+            cached = _docs_cache.get(file_path)
+            if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                return cached[2]
             with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+                content = f.read()
+            _docs_cache[file_path] = (st.st_mtime_ns, st.st_size, content)
+            return content
         except FileNotFoundError:
             self.logger.error(f"File not found: {file_path}")
             return None
@@ -63,16 +180,250 @@ class BaseAgent(ABC):
             self.logger.error(f"Error reading file {file_path}: {e}")
             return None
 
-    def _write_file(self, file_path: str, content: str):
-        """Helper method to write content to a file."""
+    def _read_impl_plans(self) -> str:
+        """
+        Returns the docs/impl_*.md plans in name order, each followed by a blank line, joined once.
+        Stops reading further plans once IMPL_CONTENT_MAX_CHARS is exceeded. The result is reused
+        while the plans' names, mtimes and sizes are unchanged.
+        """
+        paths = sorted(self._docs.glob("impl_*.md"))
+        try:
+            signature = tuple((str(path), st.st_mtime_ns, st.st_size) for path, st in zip(paths, map(os.stat, paths)))
+        except OSError:
+            signature = None # A plan vanished while listing; read what is left without caching
+        if signature in _impl_plans_cache:
+            return _impl_plans_cache[signature]
+
+        parts = []
+        total = 0
+        for path in paths:
+            content = self._read_file(str(path))
+            if content is None:
+                continue
+            parts.append(content)
+            parts.append("\n\n")
+            total += len(content)
+            if total > IMPL_CONTENT_MAX_CHARS:
+                self.logger.warning(f"Implementation plans exceed {IMPL_CONTENT_MAX_CHARS} chars - skipping the plans after {path.name}.")
+                break
+        impl_content = "".join(parts)
+        if signature is not None:
+            if len(_impl_plans_cache) >= IMPL_PLANS_CACHE_SIZE:
+                del _impl_plans_cache[next(iter(_impl_plans_cache))]
+            _impl_plans_cache[signature] = impl_content
+        return impl_content
+
+    def _read_source_file(self, file_path: str) -> str | None:
+        """
+        Reads a project source file for prompt context. Uncached and without _read_file's error logging;
+        undecodable bytes are replaced rather than dropping the file. Returns None if it cannot be read.
+        Read as bytes and decoded once, skipping the text layer's newline translation.
+        """
+        try:
+            return Path(file_path).read_bytes().decode('utf-8', errors='replace')
+        except OSError as e:
+            self.logger.debug("Skipping unreadable source file %s: %s", file_path, e)
+            return None
+
+    def _write_file(self, file_path: str, content: str | list[str]):
+        """
+        Helper method to write content to a file.
+        content may be a list of parts (e.g. header and body), which are written back to back without joining them first.
+        Small payloads are written with os.write to a temp file that is then renamed into place.
+        """
+        _docs_cache.pop(file_path, None)
         try:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            parts = [content] if isinstance(content, str) else content
+            data = [part.encode('utf-8') for part in parts]
+            if sum(map(len, data)) < SMALL_WRITE_BYTES:
+                fd, tmp_path = self._create_temp_file(file_path)
+                try:
+                    try:
+                        self._write_parts(fd, data)
+                    finally:
+                        os.close(fd)
+                    os.replace(tmp_path, file_path)
+                except BaseException:
+                    self._remove_temp_file(tmp_path)
+                    raise
+            else:
+                with open(file_path, 'wb') as f:
+                    f.writelines(data)
+            _pending_fsync.add(file_path)
             self.logger.info(f"Successfully wrote to {file_path}")
         except Exception as e:
             self.logger.error(f"Error writing file {file_path}: {e}")
 
+    def _write_files(self, files: dict[str, str | list[str]]):
+        """Writes several files (path -> content, as for _write_file) concurrently in a thread pool."""
+        if not files:
+            return
+        with ThreadPoolExecutor(max_workers=min(WRITE_WORKERS, len(files))) as executor:
+            list(executor.map(self._write_file, files.keys(), files.values()))
+
+    def _truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """
+        Bounds text to roughly max_tokens (estimated at CHARS_PER_TOKEN characters per token) so prompt size,
+        latency and cost can't grow with an ever-growing input document. Markdown "## " sections are kept:
+        the budget is shared between them and each keeps its header and beginning.
+        """
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+
+        sections = text.split("\n## ")
+        sections = [sections[0]] + ["## " + section for section in sections[1:]]
+        # Short sections are kept whole and leave their unused share to the longer ones
+        budgets = {}
+        remaining = max_chars
+        for i in sorted(range(len(sections)), key=lambda i: len(sections[i])):
+            budgets[i] = min(len(sections[i]), remaining // (len(sections) - len(budgets)))
+            remaining -= budgets[i]
+        truncated = "\n".join(sections[i][:budgets[i]] for i in range(len(sections)))
+
+        self.logger.warning(f"Truncated input from {len(text)} to {len(truncated)} chars (~{max_tokens} tokens).")
+        return truncated
+
+    @staticmethod
+    def _write_parts(fd: int, parts: list[bytes]):
+        """Writes all parts to fd, with a single writev syscall where available, handling short writes."""
+        views = [memoryview(part) for part in parts if part]
+        while views:
+            written = os.writev(fd, views) if hasattr(os, "writev") else os.write(fd, views[0])
+            while views and written >= len(views[0]):
+                written -= len(views[0])
+                views.pop(0)
+            if views and written:
+                views[0] = views[0][written:]
+
+    @staticmethod
+    def finalize():
+        """
+        Flushes every file written by agents since the last call to disk with one fsync each.
+        Called once at the end of a run instead of syncing on every write.
+        """
+        while _pending_fsync:
+            file_path = _pending_fsync.pop()
+            try:
+                fd = os.open(file_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logging.getLogger(BaseAgent.__name__).warning(f"Could not fsync {file_path}: {e}")
+
+    def _inputs_hash(self, *inputs: str) -> str:
+        """Hash of the model name and the given inputs (typically the prompts) that produce an output file."""
+        h = hashlib.sha256(str(getattr(self.model, "model_name", None)).encode('utf-8'))
+        for item in inputs:
+            h.update(b"\0")
+            h.update(item.encode('utf-8'))
+        return h.hexdigest()
+
+    def _is_output_current(self, output_path: str, inputs_hash: str) -> bool:
+        """True if output_path exists and its .hash sidecar matches inputs_hash from the run that wrote it."""
+        if not os.path.exists(output_path):
+            return False
+        try:
+            with open(f"{output_path}.hash", 'r', encoding='utf-8') as f:
+                return f.read().strip() == inputs_hash
+        except OSError:
+            return False
+
+    def _write_output_hash(self, output_path: str, inputs_hash: str | None):
+        """Records inputs_hash in the .hash sidecar of output_path; None removes it (output being regenerated)."""
+        hash_path = f"{output_path}.hash"
+        try:
+            if inputs_hash is None:
+                if os.path.exists(hash_path):
+                    os.remove(hash_path)
+                return
+            tmp_path = f"{hash_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(inputs_hash)
+            os.replace(tmp_path, hash_path)
+        except OSError as e:
+            self.logger.warning(f"Error updating hash file {hash_path}: {e}")
+
+    async def _aread_file(self, file_path: str) -> str | None:
+        """Async helper that runs _read_file in a worker thread to keep the event loop free."""
+        return await asyncio.to_thread(self._read_file, file_path)
+
+    async def _awrite_file(self, file_path: str, content: str | list[str]):
+        """Async helper that runs _write_file in a worker thread to keep the event loop free."""
+        await asyncio.to_thread(self._write_file, file_path, content)
+
+    async def _astream_to_file(self, file_path: str, chunks, prefix: str = "") -> str:
+        """
+        Writes prefix and then the streamed chunks to file_path as they arrive.
+        Chunks are coalesced and flushed every STREAM_FLUSH_BYTES or STREAM_FLUSH_INTERVAL
+        seconds, so per-token chunks don't turn into one write syscall each.
+        The stream goes to a temp file that replaces file_path only once it completed, so a failed
+        or interrupted request leaves the previous file intact.
+
+        Returns:
+            The full streamed text (without prefix).
+        """
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        received = []
+        buf = bytearray(prefix.encode('utf-8'))
+        fd, tmp_path = self._create_temp_file(file_path)
+        try:
+            with open(fd, 'wb', buffering=0) as f:
+                last_flush = time.monotonic()
+                async for chunk in chunks:
+                    received.append(chunk)
+                    buf.extend(chunk.encode('utf-8'))
+                    if len(buf) >= STREAM_FLUSH_BYTES or time.monotonic() - last_flush > STREAM_FLUSH_INTERVAL:
+                        self._write_all(f, buf)
+                        buf.clear()
+                        last_flush = time.monotonic()
+                self._write_all(f, buf)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            self._remove_temp_file(tmp_path)
+            raise
+        _docs_cache.pop(file_path, None)
+        _pending_fsync.add(file_path)
+        self.logger.info(f"Successfully streamed to {file_path}")
+        return "".join(received)
+
+    @staticmethod
+    def _create_temp_file(file_path: str) -> tuple[int, str]:
+        """
+        Creates a uniquely named temp file next to file_path to be renamed over it, and returns (fd, path).
+        It gets file_path's current permissions (0o644 for a new file), so replacing e.g. gradlew keeps its exec bit.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+        try:
+            try:
+                mode = os.stat(file_path).st_mode & 0o7777
+            except FileNotFoundError:
+                mode = 0o644
+            os.fchmod(fd, mode)
+        except BaseException:
+            os.close(fd)
+            BaseAgent._remove_temp_file(tmp_path)
+            raise
+        return fd, tmp_path
+
+    @staticmethod
+    def _remove_temp_file(tmp_path: str):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write_all(f, data: bytearray):
+        """Writes all of data to an unbuffered file, handling short writes."""
+        view = memoryview(data)
+        while view:
+            written = f.write(view)
+            view = view[written:]
+
     def _ensure_dir_exists(self, dir_path: str):
         """Helper method to ensure a directory exists."""
         try:
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import weakref
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 10 # Seconds between batch status checks
+BATCH_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+BATCH_FLUSH_WINDOW = 2.0 # Seconds BatchingModelProxy waits for more prompts before submitting a batch
+BATCH_MAX_SIZE = 100 # Prompts per batch before BatchingModelProxy submits immediately
+
+
+class BatchProcessor:
+    """
+    Runs a set of independent prompts through the provider Batch API (OpenAI-compatible
+    /v1/batches, e.g. OpenAI or Groq) instead of one chat completion request each.
+    Batches are billed at a discount but can take minutes to complete, so use it only
+    where latency does not matter.
+    """
+
+    def __init__(self, client):
+        """
+        Args:
+            client: The OpenAIClient (optionally wrapped) whose async_model, model_name,
+                    temperature and reasoning_effort are used for the batch requests.
+        """
+        self.client = client
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _create_batch_file(self, prompts: list[str], schemas: list[dict | None] | None = None) -> bytes:
+        """Builds the JSONL batch input, one chat completion request per prompt (in JSON schema mode where schemas[i] is set)."""
+        lines = []
+        for i, prompt in enumerate(prompts):
+            body = {
+                "model": self.client.model_name,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": self.client.temperature,
+            }
+            if self.client.reasoning_effort != "none":
+                body["reasoning_effort"] = self.client.reasoning_effort
+            if schemas and schemas[i] is not None:
+                body["response_format"] = {"type": "json_schema", "json_schema": {"name": "response", "schema": schemas[i]}}
+            lines.append(json.dumps({"custom_id": f"request-{i}", "method": "POST", "url": BATCH_ENDPOINT, "body": body}))
+        return "\n".join(lines).encode('utf-8')
+
+    async def agenerate_batch(self, prompts: list[str], schemas: list[dict | None] | None = None) -> list[str]:
+        """
+        Submits prompts as a single batch, waits for it to finish and returns the responses in prompt order.
+        schemas optionally gives a JSON schema (or None) per prompt, as the schema argument of generate_content.
+        """
+        api = self.client.async_model
+        try:
+            batch_file = await api.files.create(file=("batch_input.jsonl", self._create_batch_file(prompts, schemas)), purpose="batch")
+            batch = await api.batches.create(input_file_id=batch_file.id, endpoint=BATCH_ENDPOINT,
+                                             completion_window=BATCH_COMPLETION_WINDOW)
+            self.logger.info(f"Submitted batch {batch.id} with {len(prompts)} request(s).")
+
+            while batch.status not in BATCH_FINAL_STATES:
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                batch = await api.batches.retrieve(batch.id)
+                self.logger.debug(f"Batch {batch.id} status: {batch.status}")
+
+            if batch.status != "completed" or not batch.output_file_id:
+                raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+
+            output = await api.files.content(batch.output_file_id)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Batch API request failed: {e}", exc_info=True)
+            raise RuntimeError(f"Batch API request failed: {e}")
+
+        responses = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                raise RuntimeError(f"Batch request {result.get('custom_id')} failed: {result.get('error') or response}")
+            responses[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+
+        missing = [i for i in range(len(prompts)) if f"request-{i}" not in responses]
+        if missing:
+            raise RuntimeError(f"Batch output is missing responses for request(s): {missing}")
+        return [responses[f"request-{i}"] for i in range(len(prompts))]
+
+
+class BatchingModelProxy:
+    """
+    Collects prompts submitted by concurrently running agents and sends them to the Batch API
+    as one job: a batch is flushed BATCH_FLUSH_WINDOW seconds after its first prompt, or as soon as
+    it holds BATCH_MAX_SIZE prompts. Each submit() returns a future resolved with that prompt's response.
+    Responses are not cached here; BaseAgent routes them through the response cache (CachedModel).
+    """
+
+    def __init__(self, client, flush_window: float | None = None, max_batch_size: int | None = None):
+        self.processor = BatchProcessor(client)
+        self.flush_window = BATCH_FLUSH_WINDOW if flush_window is None else flush_window
+        self.max_batch_size = max_batch_size or BATCH_MAX_SIZE
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._pending: list[tuple[str, dict | None, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task] = set() # Keeps running batches referenced until done
+
+    def submit(self, prompt: str, schema: dict | None = None) -> asyncio.Future:
+        """Queues prompt (with an optional JSON schema) for the next batch. Must be called from a running event loop."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, schema, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_window, self._flush)
+        return future
+
+    async def agenerate_content(self, prompt: str, schema: dict | None = None) -> str:
+        return await self.submit(prompt, schema)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, dict | None, asyncio.Future]]):
+        self.logger.info(f"Flushing {len(batch)} queued prompt(s) to the Batch API.")
+        try:
+            responses = await self.processor.agenerate_batch([prompt for prompt, _, _ in batch],
+                                                             [schema for _, schema, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+
+_batching_proxies = weakref.WeakKeyDictionary() # Event loop -> {model name: BatchingModelProxy}
+
+
+def get_batching_proxy(client) -> BatchingModelProxy:
+    """
+    Returns the BatchingModelProxy shared by all agents using client's model on the running event loop,
+    so prompts from different agents and projects end up in the same batch.
+    """
+    proxies = _batching_proxies.setdefault(asyncio.get_running_loop(), {})
+    if client.model_name not in proxies:
+        proxies[client.model_name] = BatchingModelProxy(client)
+    return proxies[client.model_name]
@@ -1,64 +1,13 @@
+import asyncio
 import os
-from .base_agent import BaseAgent
-
-class CheckListTasksAgent(BaseAgent):
-    """
-    Generate tasks file for project.
-    """
-
-    def run(self):
-        """
-        Executes the Tasks agent's task: creating the tasks.md file.
-
-        """
-        self.logger.info(f"Running Tasks Agent for project: {self.project_name})")
-
-        # Model initialization is now handled by BaseAgent
-        if not self.model:
-            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
-            # Or raise a specific exception
-            raise RuntimeError("TasksAgent requires a configured Generative Model.")
-
-        idea_md_path = os.path.join(self.docs_path, "idea.md")
-        if not os.path.exists(idea_md_path):
-            raise Exception("idea.md file does not exists")
-
-        idea_text = self._read_file(idea_md_path)
+from functools import lru_cache
+from string import Template
 
-        tasks_md_path = os.path.join(self.docs_path, "tasks.md")
-
-        # Create mode
-        prompt = self._create_prompt(idea_text)
-        self.logger.debug(f"Generated create prompt for:\n{prompt[:500]}...")
-
-        try:
-            self.logger.info("Sending request to LLM API...")
-            generated_output = self.model.generate_content(prompt)
-            self.logger.info("Received response from LLM API.")
-            self.logger.debug(f"Generated Output (first 200 chars):\n{generated_output[:200]}...")
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during API call: {e}", exc_info=True)
-            raise RuntimeError(f"Failed to generate concept using AI: {e}")
-
-        # Determine content to write
-
-        # Create mode - add prefix
-        content_prefix = f"# Project **{self.project_name}** tasks perspective:\n\n"
-        final_content_to_write = content_prefix + generated_output
-        write_action = "wrote"
-
-        try:
-            self._write_file(tasks_md_path, final_content_to_write)
-            self.logger.info(f"Successfully {write_action} {tasks_md_path}")
-        except Exception as e:
-            # Error already logged by _write_file
-            raise IOError(f"Failed to write tasks.md for project {self.project_name}: {e}")
+from .base_agent import BaseAgent
 
-        return tasks_md_path
 
-    def _create_prompt(self, idea_text: str) -> str: 
-        """Creates the prompt for the generative AI model."""
-        prompt = f"""
+# Task list instructions, shared with CombinedDocsAgent.
+CHECK_LIST_TASKS_SPEC = """
         Act as a project planner. Take the provided project idea document and convert it into a comprehensive Markdown task list suitable for tracking development progress.
 
         Instructions:
@@ -90,12 +39,91 @@ class CheckListTasksAgent(BaseAgent):
         7.  **Label Enhancements:** Clearly mark tasks derived from the 'Enhancements' or 'Future Ideas' section (e.g., using `[Enhancement]` prefix).
         8.  **Maintain Context:** Ensure the tasks reflect the overall goals and target users described in the document.
 
-        Here is the project idea document:
+"""
+
+_CHECK_LIST_TASKS_TMPL = Template(CHECK_LIST_TASKS_SPEC + """        Here is the project idea document:
         
          ```markdown
-        {idea_text}
+        $idea_text
         ```
         
+        """)
+
+class CheckListTasksAgent(BaseAgent):
+    """
+    Generate tasks file for project.
+    """
+
+    def run(self, num_variants: int = 1):
         """
-        
-        return prompt
+        Executes the Tasks agent's task: creating the tasks.md file.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun(num_variants=num_variants))
+
+    async def arun(self, num_variants: int = 1):
+        """
+        Executes the Tasks agent's task: creating the tasks.md file.
+
+        Args:
+            num_variants: When > 1, sample this many drafts from one request and write them to
+                          tasks.v1.md, tasks.v2.md, ... instead (the list of paths is returned).
+        """
+        self.logger.info(f"Running Tasks Agent for project: {self.project_name})")
+
+        # Model initialization is now handled by BaseAgent
+        if not self.model:
+            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
+            # Or raise a specific exception
+            raise RuntimeError("TasksAgent requires a configured Generative Model.")
+
+        idea_md_path = self.idea_md_path
+        if not os.path.exists(idea_md_path):
+            raise Exception("idea.md file does not exists")
+
+        idea_text = await self._aread_file(idea_md_path)
+        if idea_text is None:
+            raise FileNotFoundError(f"Could not read idea.md for project {self.project_name}.")
+        idea_text = self._truncate_to_tokens(idea_text, self.MAX_IDEA_TOKENS)
+
+        tasks_md_path = os.path.join(self.docs_path, "tasks.md")
+
+        # Create mode
+        prompt = self._create_prompt(idea_text)
+        self.logger.debug("Generated create prompt for:\n%.500s...", prompt)
+
+        # Create mode - add prefix
+        content_prefix = f"# Project **{self.project_name}** tasks perspective:\n\n"
+
+        if num_variants > 1:
+            try:
+                self.logger.info(f"Generating {num_variants} tasks variants.")
+                return await self._generate_variants_to_files(tasks_md_path, prompt, num_variants, prefix=content_prefix)
+            except OSError as e:
+                self.logger.error(f"Error writing tasks variants: {e}")
+                raise IOError(f"Failed to write tasks variants for project {self.project_name}: {e}")
+            except Exception as e:
+                self.logger.error(f"An unexpected error occurred during API call: {e}", exc_info=True)
+                raise RuntimeError(f"Failed to generate tasks variants using AI: {e}")
+
+        try:
+            self.logger.info(f"Streaming response from LLM API to: {tasks_md_path}")
+            generated_output = await self._generate_to_file(tasks_md_path, prompt, prefix=content_prefix)
+            self.logger.info("Received response from LLM API.")
+            self.logger.debug("Generated Output (first 200 chars):\n%.200s...", generated_output)
+        except OSError as e:
+            self.logger.error(f"Error writing file {tasks_md_path}: {e}")
+            raise IOError(f"Failed to write tasks.md for project {self.project_name}: {e}")
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during API call: {e}", exc_info=True)
+            raise RuntimeError(f"Failed to generate concept using AI: {e}")
+
+        self.logger.info(f"Successfully wrote {tasks_md_path}")
+
+        return tasks_md_path
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _create_prompt(idea_text: str) -> str:
+        """Creates the prompt for the generative AI model. Memoized per idea text."""
+        return _CHECK_LIST_TASKS_TMPL.substitute(idea_text=idea_text)
@@ -1,10 +1,16 @@
 
+import asyncio
+import hashlib
+import io
 import os
 
 
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from .base_agent import BaseAgent
+from string import Template
+from .base_agent import WRITE_WORKERS, BaseAgent
 import logging # Make sure logging is imported if not already
 
 # Assume logger is configured elsewhere or replace with print/basic logging
@@ -14,10 +20,46 @@ logger = logging.getLogger(__name__)
 
 
 # --- Helper: Structure Parsing Configuration (similar to scaffolder) ---
-TREE_CHARS_PATTERN = r"^[│├└─ L|]+" # Regex to remove tree drawing characters
+TREE_CHARS_RE = re.compile(r"^[│├└─ L|]+") # Removes tree drawing characters
 DIR_MARKER = '/' # Character indicating a directory in the structure text
 # --- End Helper Configuration ---
 
+READ_WORKERS = 8 # Thread pool size for batched source file reads
+# Source files longer than this (chars) keep only their head and tail in prompts; MAAI_SOURCE_FILE_MAX_CHARS overrides it
+SOURCE_FILE_MAX_CHARS = int(os.environ.get("MAAI_SOURCE_FILE_MAX_CHARS") or 32_000)
+SOURCE_FILE_HEAD_RATIO = 0.75 # Share of the kept chars taken from the start (imports, class and function signatures)
+TRUNCATED_MARKER = "\n# ... truncated ...\n"
+
+# Combined project content, shared by all CoderAgent instances (e.g. the one each Tester/Diagram/ImplTasks
+# agent creates) and reused while the inputs' names, mtimes and sizes are unchanged.
+_all_content_cache: dict[str, tuple[str, str, tuple[str, ...]]] = {} # docs_path -> (fingerprint, content, files)
+_source_code_cache: dict[str, tuple[tuple, str]] = {} # project_path -> (source file signature, combined source)
+
+BLOCK_START = "<<<FILENAME:" # Opens a generated file block, followed by the path on the same line
+BLOCK_END = "\n>>>" # Closes a generated file block
+EXTENSIONLESS_FILES = frozenset({'.gitignore', 'Dockerfile'}) # Accepted block filenames without an extension
+
+# Opening line of a <<<FILENAME: path/to/file ... >>> block in LLM output. The block body is then located with
+# str.find(BLOCK_END), so a truncated response missing its closing fence is scanned in linear time.
+_BLOCK_START_RE = re.compile(r"<<<FILENAME:\s+(?P<filename>[^\s`]+)[^\S\n]*\n", re.IGNORECASE)
+# Used by astream_code_blocks: where an opening line may start, and whether buffered text could still become one
+_BLOCK_MARKER_RE = re.compile(re.escape(BLOCK_START), re.IGNORECASE)
+_PARTIAL_BLOCK_START_RE = re.compile(r"<<<FILENAME:\s*(?:[^\s`]+[^\S\n]*)?", re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _match_file_blocks(generated_text: str) -> tuple[tuple[str, str], ...]:
+    """(raw filename, stripped code) of every <<<FILENAME: ...>>> block, memoized so identical responses are scanned once."""
+    blocks = []
+    pos = 0
+    while match := _BLOCK_START_RE.search(generated_text, pos):
+        end = generated_text.find(BLOCK_END, match.end())
+        if end < 0:
+            break # No closing fence after this point, so no later block can be complete either
+        blocks.append((match.group("filename"), generated_text[match.end():end].strip()))
+        pos = end + len(BLOCK_END)
+    return tuple(blocks)
+
 source_code_extensions = [
     # Java / Kotlin / Android
     ".java", ".class", ".jar", ".kt", ".kts", ".xml", ".gradle", ".pro", ".aidl", ".smali", ".dex",
@@ -118,6 +160,132 @@ programing_extensions = [
     ".jl"
 ]
 
+# Code generation instructions, built once; only the project details are substituted per call
+_CODE_GENERATION_PROMPT_TMPL = Template("""
+Generate the complete, runnable code content for ALL files for the project described in the provided project details. 
+The project might involve various programming languages (like Python, JavaScript, TypeScript, Java, Kotlin, etc.) and platforms (like backend, web frontend, Android, etc.).
+Adhere strictly to the plan's specifications regarding languages, frameworks, modules, classes, methods, file structure, and overall architecture.
+
+** Project Details (incorporating idea, features, integration, and implementation plans):**
+```markdown
+$impl_content
+```
+**Instructions:**
+
+1.  **Generate the full content for ALL required files.** This includes source code files (e.g., `.py`, `.js`, `.ts`, `.java`, `.kt`, `.html`, `.css`), configuration files (e.g., `requirements.txt`, `package.json`, `build.gradle`, `AndroidManifest.xml`, `tsconfig.json`, `Dockerfile`, `.gitignore`), documentation (`README.md`), tests, and any other files specified or implied by the project details.
+2.  **Adhere to the language, version, and style conventions specified or implied in the plan.**
+    *   For **Python**: Use Python 3.11+ syntax with type hints if specified.
+    *   For **JavaScript/TypeScript**: Use modern standards (e.g., ES6+/latest TypeScript) and specified frameworks (React, Vue, Angular, Node.js, etc.).
+    *   For **Java/Kotlin (Android/Backend)**: Use the specified Java/Kotlin versions and adhere to platform conventions (Android SDK, Spring Boot, etc.).
+    *   For **Web**: Use HTML5, CSS3, and follow specified preprocessor/framework guidelines.
+    *   If language specifics are unclear in the plan, use common modern standards and best practices for that language/platform.
+3.  **Implement all core logic, classes, functions, UI layouts, components, etc.** defined in the plan. Include basic error handling where appropriate (e.g., file I/O, network requests, user input validation, null checks).
+4.  **Include all import/require/include statements** at the beginning of each source file, appropriate for the language and module system used (e.g., Python imports, ES modules, CommonJS, Java imports, Kotlin imports).
+5.  **Include basic documentation comments** for primary functions, classes, and methods in the respective languages (e.g., Python docstrings, JSDoc, JavaDoc, KDoc). For configuration or markup files, add comments where clarification is needed.
+6.  **Structure the output using Markdown code blocks.** Each block MUST be prefixed with the intended relative filename from the project root, like this:
+
+    *Example Structure:*
+    ```
+    <<<FILENAME: src/main.py
+    # Python example
+    import os
+
+    def main() -> None:
+        \"\"\"Main entry point.\"\"\"
+        print("Hello from Python!")
+
+    if __name__ == "__main__":
+        main()
+    >>>
+
+    <<<FILENAME: static/js/app.js
+    // JavaScript example
+    document.addEventListener('DOMContentLoaded', () => {
+      console.log('Hello from JavaScript!');
+    });
+    >>>
+
+    <<<FILENAME: app/src/main/java/com/example/myapp/MainActivity.java
+    // Java/Android example
+    package com.example.myapp;
+
+    import androidx.appcompat.app.AppCompatActivity;
+    import android.os.Bundle;
+    import android.util.Log;
+
+    public class MainActivity extends AppCompatActivity {
+        private static final String TAG = "MainActivity";
+
+        @Override
+        protected void onCreate(Bundle savedInstanceState) {
+            super.onCreate(savedInstanceState);
+            setContentView(R.layout.activity_main);
+            Log.d(TAG, "Hello from Android!");
+        }
+    }
+    >>>
+
+    <<<FILENAME: templates/index.html
+    <!-- HTML example -->
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>My Web App</title>
+        <link rel="stylesheet" href="/static/css/style.css">
+    </head>
+    <body>
+        <h1>Hello from HTML!</h1>
+        <script src="/static/js/app.js"></script>
+    </body>
+    </html>
+    >>>
+
+    <<<FILENAME: requirements.txt
+    # Python dependencies
+    flask>=2.0
+    requests
+    >>>
+
+    <<<FILENAME: package.json
+    {
+      "name": "my-web-app",
+      "version": "1.0.0",
+      "description": "",
+      "main": "server.js",
+      "scripts": {
+        "start": "node server.js"
+      },
+      "dependencies": {
+        "express": "^4.17.1"
+      }
+    }
+    >>>
+
+    <<<FILENAME: README.md
+    # My Project
+    This project implements [features] using [technology stack].
+    Follow setup instructions...
+    >>>
+
+    <<<FILENAME: .gitignore
+    # General ignores
+    __pycache__/
+    *.pyc
+    node_modules/
+    build/
+    .env
+    *.log
+    >>>
+    ```
+7.  **Ensure the `<<<FILENAME:` paths are relative to the project root** and accurately reflect the structure outlined or implied in the project plan (e.g., `src/main.py`, `app/src/main/res/layout/activity_main.xml`, `public/index.html`, `README.md`).
+8.  **Do NOT add any explanatory text, introductions, or summaries outside the formatted code blocks.** Focus solely on generating the file contents within their respective `<<<FILENAME: ...>>> ... >>>` blocks.
+9.  If the plan is unclear on a specific implementation detail, make a reasonable assumption aligned with the overall architecture and add a `# TODO:` or `<!-- TODO: -->` comment (or equivalent for the language) explaining the assumption or the need for clarification.
+10. **Generate ALL specified and implied files in a single, complete response.** Ensure the generated code is runnable or buildable given the correct environment and dependencies.
+""")
+
+
 class CoderAgent(BaseAgent):
     """
     Determines project structure, scaffolds directories/files, and generates
@@ -126,7 +294,7 @@ class CoderAgent(BaseAgent):
     """
     def get_idea_content(self):        
         self.logger.info(f"Reading ideas from idea.md")
-        file_path = os.path.join(self.docs_path, "idea.md")
+        file_path = self.idea_md_path
         content = self._read_file(file_path)
         if content is not None:
             content = f"# --- Content from: idea.md ---\n\n{content}\n\n# --- End of: idea.md ---"
@@ -144,7 +312,8 @@ class CoderAgent(BaseAgent):
 
         all_files = []
         try:
-            all_files = os.listdir(self.docs_path)
+            with os.scandir(self.docs_path) as entries:
+                all_files = [entry.name for entry in entries if entry.is_file()]
             feature_files = [
                 f for f in all_files
                 if f.startswith("feature_") and f.endswith(".md")
@@ -164,14 +333,8 @@ class CoderAgent(BaseAgent):
         combined_content = []
         combined_files = feature_files
         self.logger.info(f"Reading features content from: {', '.join(combined_files)}")
-        for filename in combined_files:
-            file_path = os.path.join(self.docs_path, filename)
-            content = self._read_file(file_path)
-            if content is not None:
-                combined_content.append(f"# --- Content from: {filename} ---\n\n{content}\n\n# --- End of: {filename} ---")
-            else:
-                self.logger.warning(f"Could not read content from file: {file_path}")
-                raise Exception("FATAL error - Stopping!")
+        for filename, content in zip(combined_files, self._read_doc_files(combined_files)):
+            combined_content.append(f"# --- Content from: {filename} ---\n\n{content}\n\n# --- End of: {filename} ---")
 
         if not combined_content:
                 raise FileNotFoundError(f"Failed to read content from files: {', '.join(combined_files)}")
@@ -180,13 +343,11 @@ class CoderAgent(BaseAgent):
         self.logger.info(f"Successfully combined content from {len(combined_files)} file(s). Total length: {len(content)} chars.")
         return content, combined_content
 
-    def get_all_content(self):
-        self.logger.info(f"Searching for features, implementation and integration files in: {self.docs_path}")
-        
-        all_files = ["idea.md"]
-
+    def _list_doc_files(self) -> list[str]:
+        """Returns the sorted feature_*, impl_* and integ_*.md file names in docs_path, in that group order."""
         try:
-            all_files = os.listdir(self.docs_path)
+            with os.scandir(self.docs_path) as entries:
+                all_files = sorted(entry.name for entry in entries if entry.is_file())
             feature_files = [
                 f for f in all_files
                 if f.startswith("feature_") and f.endswith(".md")
@@ -221,28 +382,85 @@ class CoderAgent(BaseAgent):
             self.logger.error(f"No integration plan files (integ*.md, integ.md) found in {self.docs_path}.")
             raise FileNotFoundError(f"No integrationfiles found for project {self.project_name} in {self.docs_path}. Ensure the Architect Agent ran successfully.")
 
-        combined_content = []
-        combined_files = feature_files+impl_files+integ_files
+        return feature_files + impl_files + integ_files
+
+    def iter_all_content(self):
+        """
+        Yields (filename, content) for every feature, implementation and integration document,
+        one file at a time, so callers can consume large projects without a combined copy.
+        """
+        self.logger.info(f"Searching for features, implementation and integration files in: {self.docs_path}")
+        combined_files = self._list_doc_files()
         self.logger.info(f"Reading implementation plans from: {', '.join(combined_files)}")
         for filename in combined_files:
-            file_path = os.path.join(self.docs_path, filename)
-            content = self._read_file(file_path)
-            if content is not None:
-                combined_content.append(f"# --- Content from: {filename} ---\n\n{content}\n\n# --- End of: {filename} ---")
-            else:
-                self.logger.warning(f"Could not read content from file: {file_path}")
-                raise Exception("FATAL error - Stopping!")
+            yield filename, self._read_doc_file(filename)
 
-        if not combined_content:
-                raise FileNotFoundError(f"Failed to read content from files: {', '.join(combined_files)}")
+    def _read_doc_file(self, filename: str) -> str:
+        """Reads a document from docs_path; unreadable documents are fatal."""
+        file_path = os.path.join(self.docs_path, filename)
+        content = self._read_file(file_path)
+        if content is None:
+            self.logger.warning(f"Could not read content from file: {file_path}")
+            raise Exception("FATAL error - Stopping!")
+        return content
 
-        content = "\n\n".join(combined_content)
+    def _read_doc_files(self, filenames: list[str]) -> list[str]:
+        """Reads the documents concurrently, in filenames order (for callers that need them all at once)."""
+        if not filenames:
+            return []
+        with ThreadPoolExecutor(max_workers=min(READ_WORKERS, len(filenames))) as executor:
+            return list(executor.map(self._read_doc_file, filenames))
+
+    def fingerprint(self, doc_files: list[str] | None = None) -> str:
+        """Hash of the names, mtimes and sizes of all project documents (doc_files if already listed); changes whenever any of them does."""
+        h = hashlib.sha256()
+        for filename in self._list_doc_files() if doc_files is None else doc_files:
+            st = os.stat(os.path.join(self.docs_path, filename))
+            h.update(f"{filename}\0{st.st_mtime_ns}\0{st.st_size}\n".encode('utf-8'))
+        return h.hexdigest()
+
+    def get_all_content(self):
+        """
+        Returns (content, files): all project documents combined into one string, and the file names read.
+        """
+        self.logger.info(f"Searching for features, implementation and integration files in: {self.docs_path}")
+        doc_files = self._list_doc_files()
+        fingerprint = self.fingerprint(doc_files)
+        cached = _all_content_cache.get(self.docs_path)
+        if cached and cached[0] == fingerprint:
+            self.logger.info(f"Project documents unchanged - reusing combined content of {len(cached[2])} file(s).")
+            return cached[1], list(cached[2])
+
+        self.logger.info(f"Reading implementation plans from: {', '.join(doc_files)}")
+
+        buf = io.StringIO()
+        combined_files = []
+        for filename, content in zip(doc_files, self._read_doc_files(doc_files)):
+            if combined_files:
+                buf.write("\n\n")
+            buf.write(f"# --- Content from: {filename} ---\n\n")
+            buf.write(content)
+            buf.write(f"\n\n# --- End of: {filename} ---")
+            combined_files.append(filename)
+
+        if not combined_files:
+                raise FileNotFoundError(f"Failed to read content from files in {self.docs_path}")
+
+        content = buf.getvalue()
         self.logger.info(f"Successfully combined content from {len(combined_files)} file(s). Total length: {len(content)} chars.")
-        return content, combined_content
+        _all_content_cache[self.docs_path] = (fingerprint, content, tuple(combined_files))
+        return content, combined_files
 
     def run(self):
         """
         Executes the Coder agent's task: structuring the project and generating/updating source files.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun())
+
+    async def arun(self):
+        """
+        Executes the Coder agent's task: structuring the project and generating/updating source files.
 
         Args:
             feedback: Optional feedback from Reviewer/Tester agents (used in build loop).
@@ -274,24 +492,18 @@ class CoderAgent(BaseAgent):
         #         raise RuntimeError(f"An unexpected error occurred in Coder Agent structure phase: {e}")
 
 
-        # 3. Generate Code Content
+        # 3. Generate Code Content, writing each file as soon as its block arrives
         self.logger.info("Phase 1: Generating code content ...")
-        generated_content = self._generate(
-            all_content=all_content
-        )
+        self.logger.info(f"Writing generated code files to project path: {self.project_path}")
+        written_files = await self._agenerate_code_files(all_content)
         log_action = "generated"
 
-
-        # 4. Write Generated Code Content (Common to both modes)
-        if not generated_content:
+        if written_files is None:
              self.logger.warning(f"AI did not return any parseable code content. No files were {log_action}.")
              # Decide if this is an error. If structure was created, maybe it's okay?
              # For now, return empty list, but consider raising if critical.
              return [] # No files to write
 
-        self.logger.info(f"Writing {log_action} code files to project path: {self.project_path}")
-        written_files = self._write_code_files(generated_content)
-
         if not written_files:
              self.logger.warning(f"Coder Agent finished but did not produce/update any valid code files after parsing the response.")
              # Consider if this should be an error based on context.
@@ -309,13 +521,13 @@ class CoderAgent(BaseAgent):
             raise RuntimeError("Generative model not initialized.")
 
         prompt = self._create_structure_prompt(impl_content)
-        self.logger.debug(f"Generated structure prompt for LLM:\n{prompt[:500]}...")
+        self.logger.debug("Generated structure prompt for LLM:\n%.500s...", prompt)
 
         try:
             self.logger.info("Sending request to LLM API for project structure...")
             structure_text = self.model.generate_content(prompt)
             self.logger.info("Received structure response from LLM API.")
-            self.logger.debug(f"Structure Text (raw):\n{structure_text[:300]}...")
+            self.logger.debug("Structure Text (raw):\n%.300s...", structure_text)
             if not structure_text or not structure_text.strip():
                 raise ValueError("Gemini returned an empty response for the project structure.")
             return structure_text
@@ -402,7 +614,7 @@ my_project_root/
                  level = round(leading_spaces / indent_unit)
 
             # Clean name: remove tree chars, strip surrounding whitespace
-            cleaned_name = re.sub(TREE_CHARS_PATTERN, '', line).strip()
+            cleaned_name = TREE_CHARS_RE.sub('', line).strip()
 
             is_dir = cleaned_name.endswith(DIR_MARKER)
             item_name = cleaned_name.rstrip(DIR_MARKER) if is_dir else cleaned_name
@@ -516,193 +728,134 @@ my_project_root/
         return created_files
 
 
+    async def aread_project_context(self) -> tuple[str, str]:
+        """Reads the combined project documents and the combined source code concurrently, in worker threads."""
+        (all_content, _), source_code = await asyncio.gather(
+            asyncio.to_thread(self.get_all_content),
+            asyncio.to_thread(self.read_all_code_files),
+        )
+        return all_content, source_code
+
     def read_all_code_files(self) -> str:
         """Recursively reads all files (not just .py) from project directory."""
-        base_path = Path(self.project_path)
+        paths = self._scan_code_files(self.project_path)
+        signature = self._source_signature(paths)
+        cached = _source_code_cache.get(self.project_path)
+        if signature is not None and cached and cached[0] == signature:
+            self.logger.info(f"Source files unchanged - reusing combined source of {len(paths)} file(s).")
+            return cached[1]
+
+        # Submit all reads up front so slow filesystems overlap the I/O waits
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            contents = list(executor.map(self._read_source_file, paths))
+
+        buf = io.StringIO() # Each file is written straight into one buffer, without a per-file framed copy
+        for item, content in zip(paths, contents):
+            if content is None:
+                # Unreadable file, continue with other files
+                continue
 
-        all_source_code = ""
+            # Calculate path relative to the starting path
+            relative_path = os.path.relpath(item, self.project_path)
+            # Use os specific separators for dictionary keys? Match LLM format?
+            # Let's use POSIX-style separators for keys, as often used in web/LLMs
+            relative_path_posix = relative_path.replace(os.sep, '/')
+            content = self._truncate_source(relative_path_posix, content)
+
+            buf.write("<<<FILENAME: ")
+            buf.write(relative_path_posix)
+            buf.write("\n\n")
+            buf.write(content)
+            buf.write("\n\n>>>")
+
+        source_code = buf.getvalue()
+        if signature is not None:
+            _source_code_cache[self.project_path] = (signature, source_code)
+        return source_code
+
+    def _truncate_source(self, relative_path: str, content: str) -> str:
+        """Keeps the head and tail of a source file longer than SOURCE_FILE_MAX_CHARS, with a marker in between."""
+        if len(content) <= SOURCE_FILE_MAX_CHARS:
+            return content
+        head = int(SOURCE_FILE_MAX_CHARS * SOURCE_FILE_HEAD_RATIO)
+        tail = SOURCE_FILE_MAX_CHARS - head
+        self.logger.warning(f"Truncated {relative_path} from {len(content)} to {SOURCE_FILE_MAX_CHARS} chars for the prompt.")
+        return content[:head] + TRUNCATED_MARKER + content[-tail:]
+
+    def source_state(self) -> dict[str, tuple[int, int]]:
+        """(mtime, size) of every source file in the project, by real path."""
+        state = {}
+        for path in self._scan_code_files(self.project_path):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            state[os.path.realpath(path)] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    @staticmethod
+    def source_state_digest(source_state: dict[str, tuple[int, int]], generated_files: list[str]) -> str:
+        """Serializes source_state without generated_files, so writing an agent's output does not invalidate the run that wrote it."""
+        excluded = {os.path.realpath(f) for f in generated_files}
+        return "\n".join(f"{path}\0{mtime}\0{size}" for path, (mtime, size) in sorted(source_state.items()) if path not in excluded)
+
+    @staticmethod
+    def _source_signature(paths: list[str]) -> tuple | None:
+        """(path, mtime, size) of every source file, or None if one vanished while scanning."""
+        try:
+            return tuple((path, st.st_mtime_ns, st.st_size) for path, st in zip(paths, map(os.stat, paths)))
+        except OSError:
+            return None
 
-        for item in base_path.rglob('*'): # Recursively find all items
-            if item.is_file():
-                try:
-                    if Path(item).suffix not in programing_extensions:
-                         continue
-                    
-                    # Calculate path relative to the starting path
-                    relative_path = str(item.relative_to(base_path))
-                    # Use os specific separators for dictionary keys? Match LLM format?
-                    # Let's use POSIX-style separators for keys, as often used in web/LLMs
-                    relative_path_posix = relative_path.replace(os.sep, '/')
-
-                    content = self._read_file(str(item)) # Read file using existing helper
-                    all_source_code += f"<<<FILENAME: {relative_path_posix}\n\n"
-                    all_source_code += content + "\n\n"
-                    all_source_code += ">>>"
-                 
-                except Exception as e:
-                    # Log error but continue reading other files
-                    self.logger.error(f"Error reading file {item} for update context: {e}", exc_info=False) # Keep log brief
-
-        return all_source_code
-
-
-    def _generate(self, all_content: str) -> dict[str, str]:
-        """Uses Generative AI to create the code content for ALL files."""
+    def _scan_code_files(self, dir_path: str) -> list[str]:
+        """
+        Recursively lists the files with a programming extension under dir_path (symlinked directories are not followed).
+        Uses os.scandir, whose DirEntry types come with the directory listing, so files are not stat'ed one by one.
+        """
+        paths = []
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    paths.extend(self._scan_code_files(entry.path))
+                elif os.path.splitext(entry.name)[1] in programing_extensions and entry.is_file():
+                    paths.append(entry.path)
+        return paths
+
+
+    async def _agenerate_code_files(self, all_content: str) -> list[str] | None:
+        """
+        Uses Generative AI to create the code content for ALL files. The response is streamed through
+        astream_code_blocks and each file is written in a worker thread as soon as its block closes.
+
+        Returns:
+            The paths of the written files, or None if the response had no valid code blocks.
+        """
         if not self.model:
             raise RuntimeError("Generative model not initialized.")
 
 
         prompt = self._create_code_generation_prompt(all_content) # Renamed from _create_prompt
-        self.logger.debug(f"Generated create prompt for LLM (Coder):\n{prompt[:500]}...")
+        self.logger.debug("Generated create prompt for LLM (Coder):\n%.500s...", prompt)
         try:
             self.logger.info("Sending request to LLM API for code content generation ...")
-            # Consider increasing max output tokens if needed
-            # generation_config = genai.types.GenerationConfig(max_output_tokens=16384) # Example
-            # response = self.model.generate_content(prompt, generation_config=generation_config)
-            generated_text = self.model.generate_content(prompt)
+            async with self._llm_semaphore():
+                generated_text, written_files = await self.astream_to_code_files(self.model.stream_generate_content(prompt))
             self.logger.info("Received code generation response from LLM API.")
-            self.logger.debug(f"Generated Text (first 200 chars):\n{generated_text[:200]}...")
+            self.logger.debug("Generated Text (first 200 chars):\n%.200s...", generated_text)
 
-            # --- Parsing the generated text into files ---
-            # Use the existing robust parser
-            code_files = self._parse_code_blocks(generated_text)
-            if not code_files:
+            if written_files is None:
                  # This is more critical now, as it means no code was generated 
-                 self.logger.warning("AI response parsed, but no valid code blocks (```python filename=...```) found.")
-                 # Returning empty dict, the caller handles the warning/error.
+                 self.logger.warning("AI response parsed, but no valid code blocks (<<<FILENAME: ...>>>) found.")
+                 return None
 
-            return code_files
+            return written_files
         except Exception as e:
             self.logger.error(f"An unexpected error occurred during LLM API call (Code Gen): {e}", exc_info=True)
             raise RuntimeError(f"Failed to generate code using AI: {e}")
 
     def _create_code_generation_prompt(self, impl_content: str) -> str:
         """Creates the prompt for the generative AI model to generate code for ALL files from scratch or based on feedback."""
-    
-        prompt = f"""
-Generate the complete, runnable code content for ALL files for the project described in the provided project details. 
-The project might involve various programming languages (like Python, JavaScript, TypeScript, Java, Kotlin, etc.) and platforms (like backend, web frontend, Android, etc.).
-Adhere strictly to the plan's specifications regarding languages, frameworks, modules, classes, methods, file structure, and overall architecture.
-
-** Project Details (incorporating idea, features, integration, and implementation plans):**
-```markdown
-{impl_content}
-```
-**Instructions:**
-
-1.  **Generate the full content for ALL required files.** This includes source code files (e.g., `.py`, `.js`, `.ts`, `.java`, `.kt`, `.html`, `.css`), configuration files (e.g., `requirements.txt`, `package.json`, `build.gradle`, `AndroidManifest.xml`, `tsconfig.json`, `Dockerfile`, `.gitignore`), documentation (`README.md`), tests, and any other files specified or implied by the project details.
-2.  **Adhere to the language, version, and style conventions specified or implied in the plan.**
-    *   For **Python**: Use Python 3.11+ syntax with type hints if specified.
-    *   For **JavaScript/TypeScript**: Use modern standards (e.g., ES6+/latest TypeScript) and specified frameworks (React, Vue, Angular, Node.js, etc.).
-    *   For **Java/Kotlin (Android/Backend)**: Use the specified Java/Kotlin versions and adhere to platform conventions (Android SDK, Spring Boot, etc.).
-    *   For **Web**: Use HTML5, CSS3, and follow specified preprocessor/framework guidelines.
-    *   If language specifics are unclear in the plan, use common modern standards and best practices for that language/platform.
-3.  **Implement all core logic, classes, functions, UI layouts, components, etc.** defined in the plan. Include basic error handling where appropriate (e.g., file I/O, network requests, user input validation, null checks).
-4.  **Include all import/require/include statements** at the beginning of each source file, appropriate for the language and module system used (e.g., Python imports, ES modules, CommonJS, Java imports, Kotlin imports).
-5.  **Include basic documentation comments** for primary functions, classes, and methods in the respective languages (e.g., Python docstrings, JSDoc, JavaDoc, KDoc). For configuration or markup files, add comments where clarification is needed.
-6.  **Structure the output using Markdown code blocks.** Each block MUST be prefixed with the intended relative filename from the project root, like this:
-
-    *Example Structure:*
-    ```
-    <<<FILENAME: src/main.py
-    # Python example
-    import os
-
-    def main() -> None:
-        \"\"\"Main entry point.\"\"\"
-        print("Hello from Python!")
-
-    if __name__ == "__main__":
-        main()
-    >>>
-
-    <<<FILENAME: static/js/app.js
-    // JavaScript example
-    document.addEventListener('DOMContentLoaded', () => {{
-      console.log('Hello from JavaScript!');
-    }});
-    >>>
-
-    <<<FILENAME: app/src/main/java/com/example/myapp/MainActivity.java
-    // Java/Android example
-    package com.example.myapp;
-
-    import androidx.appcompat.app.AppCompatActivity;
-    import android.os.Bundle;
-    import android.util.Log;
-
-    public class MainActivity extends AppCompatActivity {{
-        private static final String TAG = "MainActivity";
-
-        @Override
-        protected void onCreate(Bundle savedInstanceState) {{
-            super.onCreate(savedInstanceState);
-            setContentView(R.layout.activity_main);
-            Log.d(TAG, "Hello from Android!");
-        }}
-    }}
-    >>>
-
-    <<<FILENAME: templates/index.html
-    <!-- HTML example -->
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>My Web App</title>
-        <link rel="stylesheet" href="/static/css/style.css">
-    </head>
-    <body>
-        <h1>Hello from HTML!</h1>
-        <script src="/static/js/app.js"></script>
-    </body>
-    </html>
-    >>>
-
-    <<<FILENAME: requirements.txt
-    # Python dependencies
-    flask>=2.0
-    requests
-    >>>
-
-    <<<FILENAME: package.json
-    {{
-      "name": "my-web-app",
-      "version": "1.0.0",
-      "description": "",
-      "main": "server.js",
-      "scripts": {{
-        "start": "node server.js"
-      }},
-      "dependencies": {{
-        "express": "^4.17.1"
-      }}
-    }}
-    >>>
-
-    <<<FILENAME: README.md
-    # My Project
-    This project implements [features] using [technology stack].
-    Follow setup instructions...
-    >>>
-
-    <<<FILENAME: .gitignore
-    # General ignores
-    __pycache__/
-    *.pyc
-    node_modules/
-    build/
-    .env
-    *.log
-    >>>
-    ```
-7.  **Ensure the `<<<FILENAME:` paths are relative to the project root** and accurately reflect the structure outlined or implied in the project plan (e.g., `src/main.py`, `app/src/main/res/layout/activity_main.xml`, `public/index.html`, `README.md`).
-8.  **Do NOT add any explanatory text, introductions, or summaries outside the formatted code blocks.** Focus solely on generating the file contents within their respective `<<<FILENAME: ...>>> ... >>>` blocks.
-9.  If the plan is unclear on a specific implementation detail, make a reasonable assumption aligned with the overall architecture and add a `# TODO:` or `<!-- TODO: -->` comment (or equivalent for the language) explaining the assumption or the need for clarification.
-10. **Generate ALL specified and implied files in a single, complete response.** Ensure the generated code is runnable or buildable given the correct environment and dependencies.
-"""
-        return prompt
+        return _CODE_GENERATION_PROMPT_TMPL.substitute(impl_content=impl_content)
 
 
     # ===========================================
@@ -723,85 +876,186 @@ Adhere strictly to the plan's specifications regarding languages, frameworks, mo
         #     re.DOTALL | re.IGNORECASE
         # )
 
-        pattern = re.compile(
-            r"<<<FILENAME:\s+(?P<filename>[^\s`]+)\s*\n" # Start fence, filename
-            r"(?P<code>.*?)\n"                                         # Code content (non-greedy)
-            r">>>",                                                    # End fence
-            re.DOTALL | re.IGNORECASE
-        )
+        files = {}
+        blocks = _match_file_blocks(generated_text)
+        for filename, code in blocks:
+            clean_filename = self._clean_block_filename(filename, code)
+            if clean_filename is None:
+                continue
 
-        files_pattern = re.compile(r"<<<FILENAME:\s*(.*?)>>>\s*(.*?)(?=\s*<<<FILENAME|\Z)", re.DOTALL | re.IGNORECASE)
+            files[clean_filename] = code
+            self.logger.info(f"Parsed content block for: {clean_filename}")
 
 
-        files = {}
-        matches = pattern.finditer(generated_text)
-        found_blocks = False
-        for match in matches:
-            found_blocks = True
-            # Use POSIX paths for keys internally for consistency
-            filename = match.group("filename").strip().replace(os.sep, '/')
-            code = match.group("code").strip()
-
-            # Basic validation and path safety checks
-            if not filename or not code:
-                 self.logger.warning(f"Ignoring parsed block with empty filename or code.")
-                 continue
+        if not blocks:
+             self.logger.warning("No code/content blocks matching the expected format (<<<FILENAME: ...>>>) were found in the AI response.")
 
-            # Clean up potential leading/trailing slashes from filename
-            clean_filename = filename.strip('/')
+        return files
 
-            # Prevent path traversal and absolute paths
-            path_parts = clean_filename.split('/')
-            if ".." in path_parts or os.path.isabs(clean_filename):
-                 self.logger.warning(f"Ignoring parsed block with unsafe path: {filename}")
-                 continue
+    def _clean_block_filename(self, filename: str, code: str) -> str | None:
+        """
+        Validates a parsed block's filename and code.
 
-            # Check if filename seems plausible (e.g., has an extension or is a known config)
-            # This is a heuristic check, might need refinement
-            if '.' not in path_parts[-1] and clean_filename not in ['.gitignore', 'Dockerfile']: # Allow extensionless files like Dockerfile
-                 if len(path_parts) == 1: # Allow simple names like 'run' if needed, but maybe warn?
-                      self.logger.debug(f"Parsed block for potentially extensionless root file: {clean_filename}")
-                 elif not clean_filename.endswith('/'): # If it ends with /, it was likely meant as a dir by mistake
-                     self.logger.warning(f"Ignoring parsed block with potentially invalid filename (no extension?): {clean_filename}")
-                     continue
+        Returns:
+            The POSIX relative filename to write, or None if the block must be ignored.
+        """
+        # Use POSIX paths for keys internally for consistency
+        filename = filename.strip().replace(os.sep, '/')
+
+        # Basic validation and path safety checks
+        if not filename or not code:
+             self.logger.warning(f"Ignoring parsed block with empty filename or code.")
+             return None
+
+        # Clean up potential leading/trailing slashes from filename
+        clean_filename = filename.strip('/')
+
+        # Prevent path traversal and absolute paths (only names containing '..' need to be split)
+        if (".." in clean_filename and ".." in clean_filename.split('/')) or os.path.isabs(clean_filename):
+             self.logger.warning(f"Ignoring parsed block with unsafe path: {filename}")
+             return None
+
+        # Check if filename seems plausible (e.g., has an extension or is a known config)
+        # This is a heuristic check, might need refinement
+        _, slash, base_name = clean_filename.rpartition('/')
+        if '.' not in base_name and clean_filename not in EXTENSIONLESS_FILES: # Allow extensionless files like Dockerfile
+             if not slash: # Allow simple names like 'run' if needed, but maybe warn?
+                  self.logger.debug(f"Parsed block for potentially extensionless root file: {clean_filename}")
+             else:
+                 self.logger.warning(f"Ignoring parsed block with potentially invalid filename (no extension?): {clean_filename}")
+                 return None
+
+        return clean_filename
+
+    async def astream_code_blocks(self, chunks):
+        """
+        Pull parser for streamed LLM output: yields (filename, code) for each <<<FILENAME: ... >>> block
+        as soon as its closing line arrives, so files can be written while the model is still generating.
+        Opening lines are matched with _BLOCK_START_RE, so it accepts the same blocks as _parse_code_blocks.
+        """
+        buf = ""
+        filename = None # Set while inside a block
+        search_from = 0 # Where to resume looking for the next marker, so buffered text isn't rescanned
+        async for chunk in chunks:
+            buf += chunk
+            pos = 0
+            while True:
+                if filename is None:
+                    marker = _BLOCK_MARKER_RE.search(buf, search_from)
+                    if marker is None:
+                        # Keep a tail that may hold the start of a split marker
+                        pos = max(pos, len(buf) - len(BLOCK_START) + 1)
+                        search_from = pos
+                        break
+                    start = marker.start()
+                    header = _BLOCK_START_RE.match(buf, start)
+                    if header is None:
+                        if _PARTIAL_BLOCK_START_RE.fullmatch(buf, start):
+                            pos = search_from = start # The opening line is still arriving
+                            break
+                        search_from = start + 1 # Not a valid opening line
+                        continue
+                    filename = header.group("filename")
+                    pos = search_from = header.end() # Body starts after the opening line
+                else:
+                    end = buf.find(BLOCK_END, search_from)
+                    if end < 0:
+                        search_from = max(pos, len(buf) - len(BLOCK_END) + 1)
+                        break
+                    code = buf[pos:end].strip()
+                    clean_filename = self._clean_block_filename(filename, code)
+                    filename = None
+                    pos = search_from = end + len(BLOCK_END)
+                    if clean_filename is not None:
+                        self.logger.info(f"Parsed content block for: {clean_filename}")
+                        yield clean_filename, code
+            buf = buf[pos:]
+            search_from -= pos
+
+    async def astream_to_code_files(self, chunks, on_written=None) -> tuple[str, list[str] | None]:
+        """
+        Parses streamed LLM output with astream_code_blocks and writes each file in a worker thread as soon
+        as its block closes. A repeated filename replaces the earlier block, as in _parse_code_blocks.
+        If the stream fails midway, the writes already started are cancelled and awaited before re-raising.
 
-            files[clean_filename] = code
-            self.logger.info(f"Parsed content block for: {clean_filename}")
+        Args:
+            chunks: Async iterator of response text chunks.
+            on_written: Optional coroutine function awaited with each written path (e.g. to render it).
 
+        Returns:
+            The full response text and the written paths (None if the response had no valid blocks).
+        """
+        received = []
 
-        if not found_blocks:
-             self.logger.warning("No code/content blocks matching the expected format (<<<FILENAME: ...>>>) were found in the AI response.")
+        async def record():
+            async for chunk in chunks:
+                received.append(chunk)
+                yield chunk
 
-        return files
+        async def write(filename: str, code: str) -> str | None:
+            path = await self._awrite_code_file(filename, code)
+            if path is not None and on_written is not None:
+                await on_written(path)
+            return path
+
+        writes: dict[str, asyncio.Task] = {}
+        try:
+            async for filename, code in self.astream_code_blocks(record()):
+                if filename in writes:
+                    await writes[filename]
+                writes[filename] = asyncio.create_task(write(filename, code))
+            written_files = [f for f in await asyncio.gather(*writes.values()) if f is not None]
+        finally:
+            for task in writes.values():
+                task.cancel() # No-op for finished writes
+            await asyncio.gather(*writes.values(), return_exceptions=True)
+        return "".join(received), written_files if writes else None
 
     def _write_code_files(self, generated_files: dict[str, str]) -> list[str]:
-        """Writes the generated code content to the appropriate files."""
-        written_files_list = []
+        """Writes the generated code content to the appropriate files, concurrently in a thread pool (fsync is deferred to BaseAgent.finalize)."""
+        if not generated_files:
+            return []
         base_path = Path(self.project_path).resolve()
+        with ThreadPoolExecutor(max_workers=min(WRITE_WORKERS, len(generated_files))) as executor:
+            written_files_list = list(executor.map(
+                lambda item: self._write_code_file(base_path, *item), generated_files.items()))
+        return [f for f in written_files_list if f is not None]
+
+    async def _awrite_code_files(self, generated_files: dict[str, str]) -> list[str]:
+        """Async variant of _write_code_files: all files are written concurrently in worker threads."""
+        written_files_list = await asyncio.gather(*[
+            self._awrite_code_file(relative_path_posix, code_content)
+            for relative_path_posix, code_content in generated_files.items()
+        ])
+        return [f for f in written_files_list if f is not None]
+
+    async def _awrite_code_file(self, relative_path_posix: str, code_content: str) -> str | None:
+        """Writes a single generated file in a worker thread. Returns its full path, or None if the write failed."""
+        return await asyncio.to_thread(self._write_code_file, Path(self.project_path).resolve(), relative_path_posix, code_content)
+
+    def _write_code_file(self, base_path: Path, relative_path_posix: str, code_content: str) -> str | None:
+        """Writes a single generated file under base_path. Returns its full path, or None if the write failed."""
+        # Convert POSIX path key back to OS-specific path for writing
+        relative_path_os = os.path.join(*relative_path_posix.split('/'))
+        full_path = base_path / relative_path_os
 
-        for relative_path_posix, code_content in generated_files.items():
-            # Convert POSIX path key back to OS-specific path for writing
-            relative_path_os = os.path.join(*relative_path_posix.split('/'))
-            full_path = base_path / relative_path_os
-
-            try:
-                 display_path_rel = full_path.relative_to(base_path.parent)
-            except ValueError:
-                 display_path_rel = full_path
-
-            try:
-                # Ensure the parent directory exists (critical step)
-                full_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+             display_path_rel = full_path.relative_to(base_path.parent)
+        except ValueError:
+             display_path_rel = full_path
 
-                # Write the file content
-                self._write_file(str(full_path), code_content) # Use existing helper
-                written_files_list.append(str(full_path)) # Store full path of written file
-                self.logger.info(f"Successfully wrote content to {display_path_rel}")
+        try:
+            # Ensure the parent directory exists (critical step)
+            full_path.parent.mkdir(parents=True, exist_ok=True)
 
-            except OSError as e:
-                self.logger.error(f"Error writing file '{display_path_rel}': {e}", exc_info=True)
-                # Decide whether to continue or raise. Let's log and continue.
-            except Exception as e:
-                 self.logger.error(f"Unexpected error writing file '{display_path_rel}': {e}", exc_info=True)
+            # Write the file content
+            self._write_file(str(full_path), code_content) # Use existing helper
+            self.logger.info(f"Successfully wrote content to {display_path_rel}")
+            return str(full_path) # Full path of written file
 
-        return written_files_list
+        except OSError as e:
+            self.logger.error(f"Error writing file '{display_path_rel}': {e}", exc_info=True)
+            # Decide whether to continue or raise. Let's log and continue.
+        except Exception as e:
+             self.logger.error(f"Unexpected error writing file '{display_path_rel}': {e}", exc_info=True)
+        return None
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import re
+import textwrap
+from string import Template
+
+from .base_agent import BaseAgent
+from .check_list_tasks_agent import CHECK_LIST_TASKS_SPEC
+from .market_analyst import MARKET_ANALYSIS_SPEC
+from .scoring import SCORING_SPEC, ScoringAgent
+
+# Separator line preceding each document in the combined response, in output order
+DOC_SENTINELS = ("SCORING", "TASKS", "MARKET")
+_SENTINEL_RE = re.compile(r"^===(" + "|".join(DOC_SENTINELS) + r")===[ \t]*$", re.MULTILINE)
+
+_COMBINED_DOCS_TMPL = Template(
+    "\nProduce three Markdown documents for the project whose idea document and business review are given at the end of this prompt.\n"
+    "Start each document with its separator line on a line of its own: ===SCORING=== before Document 1, "
+    "===TASKS=== before Document 2 and ===MARKET=== before Document 3. Output nothing else.\n"
+    "\n## Document 1: scoring (scoring.md), based on the Business Idea Review\n"
+    + textwrap.dedent(SCORING_SPEC)
+    + "\n## Document 2: check list tasks (tasks.md), based on the Project Idea Document\n"
+    + textwrap.dedent(CHECK_LIST_TASKS_SPEC)
+    + "\n## Document 3: market analysis (market_analysis.md), based on the Project Idea Document\n"
+    "\nAnalyze the project concept from a business and market perspective. Provide innovative insights beyond a simple summary.\n"
+    + MARKET_ANALYSIS_SPEC
+    + "\n**Project Idea Document (idea.md):**\n```markdown\n$idea_content\n```\n"
+    "\n**Business Idea Review (business.md):**\n```markdown\n$business_text\n```\n"
+)
+
+
+class CombinedDocsAgent(BaseAgent):
+    """
+    Creates scoring.md, tasks.md and market_analysis.md with a single LLM request, instead of
+    separate Scoring, CheckListTasks and Market Analyst calls that each re-send idea.md / business.md.
+    """
+
+    def run(self) -> tuple[str, str, str]:
+        """
+        Executes the agent's task: creating the scoring.md, tasks.md and market_analysis.md files.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun())
+
+    async def arun(self) -> tuple[str, str, str]:
+        """
+        Executes the agent's task: creating the scoring.md, tasks.md and market_analysis.md files.
+
+        Returns:
+            The paths of the written scoring.md, tasks.md and market_analysis.md files.
+        """
+        self.logger.info(f"Running Combined Docs Agent for project: {self.project_name})")
+
+        # Model initialization is handled by BaseAgent
+        if not self.model:
+            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
+            raise RuntimeError("CombinedDocsAgent requires a configured Generative Model.")
+
+        business_md_path = os.path.join(self.docs_path, "business.md")
+        idea_content, business_text = await asyncio.gather(
+            self._aread_file(self.idea_md_path),
+            self._aread_file(business_md_path),
+        )
+        if idea_content is None:
+            raise FileNotFoundError(f"Could not read idea.md for project {self.project_name}. Please ensure it exists.")
+        if business_text is None:
+            raise FileNotFoundError(f"Could not read business.md for project {self.project_name}. Please run --business first.")
+        idea_content = self._truncate_to_tokens(idea_content, self.MAX_IDEA_TOKENS)
+        business_text = self._truncate_to_tokens(business_text, ScoringAgent.MAX_BUSINESS_TOKENS)
+
+        prompt = _COMBINED_DOCS_TMPL.substitute(idea_content=idea_content, business_text=business_text)
+        self.logger.debug("Generated combined docs prompt:\n%.500s...", prompt)
+
+        try:
+            self.logger.info("Sending request to LLM API...")
+            generated_output = await self._generate(prompt)
+            self.logger.info("Received response from LLM API.")
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during LLM API call: {e}", exc_info=True)
+            raise RuntimeError(f"Failed to generate scoring, tasks and market analysis using AI: {e}")
+
+        documents = self._split_documents(generated_output)
+
+        scoring_md_path = os.path.join(self.docs_path, "scoring.md")
+        tasks_md_path = os.path.join(self.docs_path, "tasks.md")
+        # MarketAnalystAgent's sidecar describes the previous market_analysis.md; drop it so --analyze regenerates
+        self._write_output_hash(self.analysis_md_path, None)
+        try:
+            await asyncio.gather(
+                self._awrite_file(scoring_md_path, [f"# Project {self.project_name} scoring for business: {self.project_name}\n\n",
+                                                    documents["SCORING"], "\n"]),
+                self._awrite_file(tasks_md_path, [f"# Project **{self.project_name}** tasks perspective:\n\n",
+                                                  documents["TASKS"], "\n"]),
+                self._awrite_file(self.analysis_md_path, [documents["MARKET"], "\n"]),
+            )
+        except Exception as e:
+            raise IOError(f"Failed to write scoring.md / tasks.md / market_analysis.md for project {self.project_name}: {e}")
+
+        return scoring_md_path, tasks_md_path, self.analysis_md_path
+
+    @staticmethod
+    def _split_documents(generated_output: str) -> dict[str, str]:
+        """Splits the combined response on its separator lines. Raises RuntimeError if a document is missing."""
+        parts = _SENTINEL_RE.split(generated_output)
+        documents = {name: body.strip() for name, body in zip(parts[1::2], parts[2::2])}
+        missing = [name for name in DOC_SENTINELS if not documents.get(name)]
+        if missing:
+            raise RuntimeError(f"LLM response is missing the document(s) for separator(s): {', '.join(f'==={name}===' for name in missing)}")
+        return documents
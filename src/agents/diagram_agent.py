@@ -1,15 +1,90 @@
+import asyncio
+import json
 import os
+import subprocess
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
 from .base_agent import BaseAgent
 from .coder import CoderAgent
 
+RENDER_WORKERS = 2 # Concurrent mmdc renders; each one starts a headless Chromium
+_render_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="mmdc")
+
+# Invariant instructions and format example first, documents and source code last, so
+# provider-side prompt caching can reuse the prefix across runs.
+_DIAGRAM_PROMPT_TMPL = Template(textwrap.dedent("""
+        Create mermaid diagram for the documents and source code given at the end of this prompt.
+
+        Instructions:
+        1.  **Diagram Selection:** Smartly choose the most appropriate Mermaid diagram type for each input file's content. For example:
+            *   Use Class Diagrams for source code (showing classes, hierarchy, connections, methods, attributes).
+            *   Use Flowcharts (`graph TD`) or Sequence Diagrams for feature descriptions or implementation plans (`.md` files) to show system flow, components, integration, connections, and communication.
+        2.  **Detail Level:** The diagrams must contain sufficient detail for software programmers and team managers to understand the system flow, components, integration, connections, and communication between modules and components.
+        3.  **Source Code Diagrams:** If generating diagrams for source code, focus on class structure, inheritance/relationships, key methods/attributes, API interactions (if evident), and data structures.
+        4.  **Mandatory Output Format:** The output structure is critical. You *must* follow the format specified below for *every* generated Mermaid diagram.
+            *   Enclose each complete Mermaid diagram definition within a fenced code block.
+            *   **Prefix** each code block with `<<<FILENAME: path/to/diagram_name.mdd` on its own line. Use a relevant path and filename (e.g., `diagrams/feature_flow.mdd`, `diagrams/backend_components.mdd`).
+            *   **Postfix** each code block with `>>>` on its own line.
+
+        **Required Output Format Example:**
+
+        *This example shows the MANDATORY structure for EACH diagram you generate:*
+
+        <<<FILENAME: diagrams/duck_example.mdd
+        ---
+        title: Animal example
+        ---
+        classDiagram
+            note "From Duck till Zebra"
+            Animal <|-- Duck
+            note for Duck "can fly\ncan swim\ncan dive\ncan help in debugging"
+            Animal <|-- Fish
+            Animal <|-- Zebra
+            Animal : +int age
+            Animal : +String gender
+            Animal: +isMammal()
+            Animal: +mate()
+            class Duck{
+                +String beakColor
+                +swim()
+                +quack()
+            }
+            class Fish{
+                -int sizeInFeet
+                -canEat()
+            }
+            class Zebra{
+                +bool is_wild
+                +run()
+            }
+        >>>
+
+        The documents and source code:
+
+        ```
+        $files_content
+        ```
+"""))
+
+
 class DiagramAgent(BaseAgent):
     """
     Source code and flow diagrams generator.
     """
 
+    MANIFEST_FILE = ".diagrams.json" # Diagram files written by the last run, kept in the project root
+
     def run(self):
         """
         Executes the Diagram agent's task: creating the tasks.md file.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun())
+
+    async def arun(self):
+        """
+        Executes the Diagram agent's task: creating the tasks.md file.
 
         """
         self.logger.info(f"Running Diagram Agent for project: {self.project_name})")
@@ -21,14 +96,26 @@ class DiagramAgent(BaseAgent):
             raise RuntimeError("DiagramAgent requires a configured Generative Model.")
 
         coder = CoderAgent(project_name=self.project_name, project_path=self.project_path)
-        all_content, _ = coder.get_all_content()
+
+        # Skip the LLM call when neither the project documents nor the source files (other than the
+        # diagrams themselves) changed since the last successful run
+        manifest_path = os.path.join(self.project_path, self.MANIFEST_FILE)
+        previous_diagrams = json.loads(self._read_file(manifest_path) or "[]") if os.path.exists(manifest_path) else []
+        docs_fingerprint = coder.fingerprint()
+        source_state = coder.source_state()
+        inputs_hash = self._inputs_hash(docs_fingerprint, coder.source_state_digest(source_state, previous_diagrams), _DIAGRAM_PROMPT_TMPL.template)
+        if self._is_output_current(manifest_path, inputs_hash):
+            if previous_diagrams and all(os.path.exists(f) for f in previous_diagrams):
+                self.logger.info("Diagrams are up to date with the project documents and source code - skipping LLM call.")
+                return previous_diagrams
+        self._write_output_hash(manifest_path, None)
+        # --- Read Context (project documents and source code, concurrently) ---
+        self.logger.info(f"Reading source code from: {self.src_path}")
+        all_content, source_code = await coder.aread_project_context()
         if not all_content:
             self.logger.warning(f"No project markdown documents found in {self.src_path}.")
             raise RuntimeError(f"Diagrams Agent failed during diagrams generation: project markdown documents found in project path") 
        
-        # --- Read Context (Source Code, Existing Tests if updating) ---
-        self.logger.info(f"Reading source code from: {self.src_path}")
-        source_code = coder.read_all_code_files()
         if not source_code:
             self.logger.warning(f"No source code found in {self.src_path}.")
             raise RuntimeError(f"Diagram Agent failed during diagrams generation: No source code found in project path") 
@@ -39,29 +126,26 @@ class DiagramAgent(BaseAgent):
         try:
             create_diagrams_prompt = self._create_diagram_prompt(all_content + "\n\n" + source_code)
 
-            generated_mermaid_files_content = self.model.generate_content(create_diagrams_prompt)
+            # Stream the response; each diagram is written and rendered as soon as its block closes
+            async with self._llm_semaphore():
+                generated_mermaid_files_content, diagram_files = await coder.astream_to_code_files(
+                    self.model.stream_generate_content(create_diagrams_prompt), on_written=self._arender_svg)
             if not generated_mermaid_files_content:
                 raise RuntimeError(f"Diagram Agent failed during mermaid diagrams generation)") 
     
             self.logger.info("Received diagrams generation response from LLM API.")
-            self.logger.debug(f"Generated Text (first 200 chars):\n{generated_mermaid_files_content[:200]}...")
+            self.logger.debug("Generated Text (first 200 chars):\n%.200s...", generated_mermaid_files_content)
 
-            # --- Parsing the generated text into files ---
-            # Use the existing robust parser
-            generated_content = coder._parse_code_blocks(generated_mermaid_files_content)
-            if not generated_content:
+            if diagram_files is None:
                 # This is more critical now, as it means no code was generated 
                 raise RuntimeError(f"AI response parsed, but no valid code blocks (<<<FILENAME: ...) found.") # Re-raise to signal failure
 
-            diagram_files = coder._write_code_files(generated_content)
-            for mdd_file in diagram_files:
-                svg_file = mdd_file.replace(".mdd",".svg")
-                cmd = f"mmdc -i {mdd_file} -o {svg_file}"
-                print(cmd)
-                os.system(cmd)
+            self._write_file(manifest_path, json.dumps(diagram_files, indent=2))
+            self._write_output_hash(manifest_path, self._inputs_hash(
+                docs_fingerprint, coder.source_state_digest(source_state, diagram_files), _DIAGRAM_PROMPT_TMPL.template))
 
             log_action =  "generated"
-            self.logger.info(f"Successfully {log_action} content for {len(generated_mermaid_files_content)} diagram file(s) using AI.")
+            self.logger.info(f"Successfully {log_action} content for {len(diagram_files)} diagram file(s) using AI.")
             
             return diagram_files
 
@@ -73,58 +157,26 @@ class DiagramAgent(BaseAgent):
             raise RuntimeError(f"An unexpected error occurred during diagrams generation: {e}")
 
 
-    def _create_diagram_prompt(self, files_content: str) -> str: 
-        """Creates a diagram prompt for the generative AI model."""
-        prompt = f"""
-        Create mermaid diagram for documents and source code:
-
-        ```
-        {files_content}
-        ```
-
-        Instructions:
-        1.  **Diagram Selection:** Smartly choose the most appropriate Mermaid diagram type for each input file's content. For example:
-            *   Use Class Diagrams for source code (showing classes, hierarchy, connections, methods, attributes).
-            *   Use Flowcharts (`graph TD`) or Sequence Diagrams for feature descriptions or implementation plans (`.md` files) to show system flow, components, integration, connections, and communication.
-        2.  **Detail Level:** The diagrams must contain sufficient detail for software programmers and team managers to understand the system flow, components, integration, connections, and communication between modules and components.
-        3.  **Source Code Diagrams:** If generating diagrams for source code, focus on class structure, inheritance/relationships, key methods/attributes, API interactions (if evident), and data structures.
-        4.  **Mandatory Output Format:** The output structure is critical. You *must* follow the format specified below for *every* generated Mermaid diagram.
-            *   Enclose each complete Mermaid diagram definition within a fenced code block.
-            *   **Prefix** each code block with `<<<FILENAME: path/to/diagram_name.mdd` on its own line. Use a relevant path and filename (e.g., `diagrams/feature_flow.mdd`, `diagrams/backend_components.mdd`).
-            *   **Postfix** each code block with `>>>` on its own line.
-
-        **Required Output Format Example:**
+    async def _arender_svg(self, mdd_file: str):
+        """
+        Renders a written diagram file to SVG in a worker thread. Renders share a pool of
+        RENDER_WORKERS threads, so at most that many mmdc processes run at once.
+        """
+        await asyncio.get_running_loop().run_in_executor(_render_executor, self._render_svg, mdd_file)
 
-        *This example shows the MANDATORY structure for EACH diagram you generate:*
+    def _render_svg(self, mdd_file: str):
+        """Renders mdd_file to an .svg next to it. mmdc is run without a shell, as the file name comes from the LLM."""
+        svg_file = os.path.splitext(mdd_file)[0] + ".svg"
+        cmd = ["mmdc", "-i", mdd_file, "-o", svg_file]
+        self.logger.debug("Rendering diagram: %s", cmd)
+        try:
+            result = subprocess.run(cmd, check=False)
+        except FileNotFoundError:
+            self.logger.warning(f"mmdc not found - skipping SVG rendering of {mdd_file}.")
+            return
+        if result.returncode != 0:
+            self.logger.warning(f"mmdc failed with exit code {result.returncode} rendering {mdd_file}.")
 
-        <<<FILENAME: diagrams/duck_example.mdd
-        ---
-        title: Animal example
-        ---
-        classDiagram
-            note "From Duck till Zebra"
-            Animal <|-- Duck
-            note for Duck "can fly\ncan swim\ncan dive\ncan help in debugging"
-            Animal <|-- Fish
-            Animal <|-- Zebra
-            Animal : +int age
-            Animal : +String gender
-            Animal: +isMammal()
-            Animal: +mate()
-            class Duck{{
-                +String beakColor
-                +swim()
-                +quack()
-            }}
-            class Fish{{
-                -int sizeInFeet
-                -canEat()
-            }}
-            class Zebra{{
-                +bool is_wild
-                +run()
-            }}
-        >>>
-        """
-        
-        return prompt
+    def _create_diagram_prompt(self, files_content: str) -> str: 
+        """Creates a diagram prompt for the generative AI model."""
+        return _DIAGRAM_PROMPT_TMPL.substitute(files_content=files_content)
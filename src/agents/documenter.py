@@ -1,221 +1,26 @@
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
 
+from .base_agent import IMPL_CONTENT_MAX_CHARS, BaseAgent
+from .coder import READ_WORKERS
 
-from .base_agent import BaseAgent
-
-class DocumenterAgent(BaseAgent):
-    """
-    Generates user-friendly documentation based on the project concept,
-    implementation plan, and final source code.
-    """
-
-    SUPPORTED_DOC_TYPES = ['sdd', 'srs', 'api', 'user_manual', 'project_overview']
-
-    def run(self, doc_type: str) -> str:
-        """
-        Executes the Documenter agent's task: generating a specific type of documentation.
-
-        Args:
-            doc_type: The type of document to generate (e.g., 'srs', 'api', 'user_manual').
-
-        Returns:
-            The absolute path to the generated document file.
-        """
-        self.logger.info(f"Running Documenter Agent for project: {self.project_name} (Doc Type: {doc_type})")
-
-        if doc_type not in self.SUPPORTED_DOC_TYPES:
-            raise ValueError(f"Unsupported document type '{doc_type}'. Supported types: {', '.join(self.SUPPORTED_DOC_TYPES)}")
-
-        # Determine output path based on doc_type
-        output_filename = f"{doc_type}.md" # Simple naming convention
-        if doc_type == 'project_overview': # Keep original name for general docs
-             output_filename = "project_docs.md"
-        output_doc_path = os.path.join(self.docs_path, output_filename)
-        idea_md_path = os.path.join(self.docs_path, "idea.md")
-
-        # --- Read Input Files ---
-        self.logger.info(f"Reading concept from: {idea_md_path}")
-        idea_content = self._read_file(idea_md_path)
-        if idea_content is None:
-            self.logger.warning(f"Could not read {idea_md_path}. Documentation might be incomplete.")
-            idea_content = "# Project Concept\n\n(Could not read idea.md)"
-
-        impl_content = "Implementation plan for the project:\n\n"
-        for filename in os.listdir(self.docs_path):
-            if filename.startswith("impl_") and filename.endswith(".md"):
-                impl_md_path = os.path.join(self.docs_path, filename)
-                # project_docs_md_path = os.path.join(self.docs_path, "project_docs.md") # Replaced by dynamic path
-
-                self.logger.info(f"Reading implementation plan from: {impl_md_path}")
-                impl_content += f"Reading implementation plan from file {impl_md_path}\n"
-
-                impl_content_file_content = self._read_file(impl_md_path)
-                if impl_content_file_content is None:
-                    self.logger.warning(f"Could not read {impl_md_path}. Documentation might be incomplete.")
-                    impl_content = f"# Implementation Plan\n\n(Could not read {impl_md_path})" # Keep reading context
-                else:
-                    impl_content += f"{impl_content_file_content}\n\n"
-
-        self.logger.info("Reading source code...")
-        source_code_content = self._read_source_code()
-        if not source_code_content:
-             self.logger.warning("No source code found. Documentation quality may be limited.")
-
-        # --- Generate Specific Documentation ---
-        self.logger.info(f"Attempting to generate '{doc_type}' documentation using AI.")
-        try:
-            documentation = self._generate_specific_documentation(
-                doc_type=doc_type,
-                idea_content=idea_content,
-                impl_content=impl_content,
-                source_code=source_code_content
-            )
-            self.logger.info(f"Successfully generated '{doc_type}' documentation content using AI.")
-        except (ValueError, ConnectionError, RuntimeError) as e:
-            self.logger.error(f"Failed to generate '{doc_type}' documentation using AI: {e}")
-            raise RuntimeError(f"Documenter Agent failed: {e}")
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during '{doc_type}' documentation generation: {e}", exc_info=True)
-            raise RuntimeError(f"An unexpected error occurred in Documenter Agent: {e}")
-
-        # --- Write Documentation File ---
-        self.logger.info(f"Writing documentation to: {output_doc_path}")
-        try:
-            self._write_file(output_doc_path, documentation)
-            self.logger.info(f"Successfully wrote {output_doc_path}")
-        except Exception as e:
-            # Error logged by _write_file
-            raise IOError(f"Failed to write {output_filename} for project {self.project_name}: {e}")
-
-        return output_doc_path
-
-
-    def _read_source_code(self) -> dict[str, str]:
-        """Reads all .py files from the project's src directory."""
-        # This is identical to the one in TesterAgent - consider moving to BaseAgent
-        code_files = {}
-        if not os.path.isdir(self.src_path):
-            self.logger.warning(f"Source directory not found: {self.src_path}")
-            return code_files
-
-        try:
-            for filename in os.listdir(self.src_path):
-                if filename.endswith(".py"):
-                    file_path = os.path.join(self.src_path, filename)
-                    content = self._read_file(file_path)
-                    if content is not None:
-                        # Store with path relative to project root (e.g., src/module.py)
-                        relative_path = os.path.relpath(file_path, self.project_path)
-                        code_files[relative_path] = content
-        except Exception as e:
-            self.logger.error(f"Error reading source code files from {self.src_path}: {e}", exc_info=True)
-        return code_files
-
-    def _generate_specific_documentation(self, doc_type: str, idea_content: str, impl_content: str, source_code: dict[str, str]) -> str:
-        """Generates the content for a specific documentation type."""
-        if not self.model:
-            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
-            raise RuntimeError("DocumenterAgent requires a configured Generative Model.")
-
-        # Dispatch to the correct prompt creation function
-        prompt_func = getattr(self, f"_create_{doc_type}_prompt", None)
-        if not prompt_func:
-             # Fallback or error if specific prompt function doesn't exist
-             self.logger.warning(f"No specific prompt function found for doc type '{doc_type}'. Using project overview prompt.")
-             prompt_func = self._create_project_overview_prompt # Default to overview
-
-        prompt = prompt_func(idea_content, impl_content, source_code)
-        self.logger.debug(f"Generated prompt for '{doc_type}' using {prompt_func.__name__}:\n{prompt[:500]}...")
-        try:
-            self.logger.info(f"Sending request to LLM API for '{doc_type}' documentation...")
-            # Consider adjusting token limits if context is large
-            # generation_config = genai.types.GenerationConfig(max_output_tokens=4096)
-            # response = self.model.generate_content(prompt, generation_config=generation_config)
-            generated_docs = self.model.generate_content(prompt)
-            self.logger.info(f"Received '{doc_type}' documentation response from LLM API.")
-            self.logger.debug(f"Generated '{doc_type}' Docs (first 200 chars):\n{generated_docs[:200]}...")
-            return generated_docs
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during LLM API call (Documenter - {doc_type}): {e}", exc_info=True)
-            raise RuntimeError(f"Failed to generate '{doc_type}' documentation using AI: {e}")
-
-
-    # --- Prompt Creation Functions ---
-
-    def _create_project_overview_prompt(self, idea_content: str, impl_content: str, source_code: dict[str, str]) -> str:
-        """Creates the prompt for the general project documentation (project_docs.md)."""
-
-        source_code_blocks = []
-        if source_code:
-            for path, code in source_code.items():
-                 # Limit code length per file in prompt if necessary
-                 max_code_len = 1500
-                 truncated_code = code[:max_code_len] + ("\n..." if len(code) > max_code_len else "")
-                 source_code_blocks.append(f"**File: `{path}`**\n```python\n{truncated_code}\n```")
-        else:
-             source_code_blocks.append("*(No source code provided)*")
-
-        source_code_section = "\n\n".join(source_code_blocks)
-
-        prompt = f"""
+_PROJECT_OVERVIEW_TMPL = Template("""
 Generate user-friendly project documentation in Markdown format (`project_docs.md`) based on the provided project concept, implementation plan, and final source code.
 
 **Project Concept (from idea.md):**
 ```markdown
-{idea_content}
+$idea_content
 ```
 
 **Implementation Plan (from impl_*.md):**
 ```markdown
-{impl_content}
+$impl_content
 ```
 
 **Final Source Code Snippets (from src/):**
-{source_code_section}
-
-**Instructions:**
-
-1.  **Generate a comprehensive `project_docs.md` file.**
-2.  **Target Audience:** Assume a user who wants to understand what the project does and how to use it. Technical users might also appreciate architecture overview.
-3.  **Include the following sections:**
-    *   **Project Overview:** Briefly describe the project's purpose and main goal (synthesize from `idea.md`).
-    *   **Features:** List the key features implemented (refer to `idea.md` and `impl_*.md`).
-    *   **Getting Started / Usage:** Explain how to run or use the generated application/tool. Include example commands if it's a CLI tool. Mention any prerequisites (e.g., Python version, `pip install requirements.txt`).
-    *   **Architecture Overview (Optional but Recommended):** Briefly describe the main components and how they work together (summarize from `impl_*.md`). A Mermaid diagram from `impl_*.md` could be included if relevant and simple.
-    *   **Configuration (if applicable):** Mention any required configuration (e.g., environment variables like API keys).
-    *   **Troubleshooting (Optional):** Common issues and solutions.
-4.  **Synthesize information** from all provided inputs (`idea.md`, `impl_*.md`, source code snippets).
-5.  **Maintain a clear and concise writing style.** Use Markdown formatting effectively (headings, lists, code blocks).
-6.  **Do NOT just copy sections verbatim.** Rephrase and structure the information logically for documentation purposes.
-7.  **Format the entire output strictly as Markdown.** Do not include introductory or concluding remarks outside the Markdown structure.
-"""
-        # This prompt is the same as the original _create_prompt
-        # ... (keep the original prompt content here) ...
-        source_code_blocks = []
-        if source_code:
-            for path, code in source_code.items():
-                 max_code_len = 1500 # Keep truncation for prompt size
-                 truncated_code = code[:max_code_len] + ("\n..." if len(code) > max_code_len else "")
-                 source_code_blocks.append(f"**File: `{path}`**\n```python\n{truncated_code}\n```")
-        else:
-             source_code_blocks.append("*(No source code provided)*")
-        source_code_section = "\n\n".join(source_code_blocks)
-
-        prompt = f"""
-Generate user-friendly project documentation in Markdown format (`project_docs.md`) based on the provided project concept, implementation plan, and final source code.
-
-**Project Concept (from idea.md):**
-```markdown
-{idea_content}
-```
-
-**Implementation Plan (from impl_*.md):**
-```markdown
-{impl_content}
-```
-
-**Final Source Code Snippets (from src/):**
-{source_code_section}
+$source_code_section
 
 **Instructions:**
 
@@ -232,24 +37,19 @@ Generate user-friendly project documentation in Markdown format (`project_docs.m
 5.  **Maintain a clear and concise writing style.** Use Markdown formatting effectively (headings, lists, code blocks).
 6.  **Do NOT just copy sections verbatim.** Rephrase and structure the information logically for documentation purposes.
 7.  **Format the entire output strictly as Markdown.** Do not include introductory or concluding remarks outside the Markdown structure.
-"""
-        return prompt
+""")
 
-
-    def _create_srs_prompt(self, idea_content: str, impl_content: str, source_code: dict[str, str]) -> str:
-         """Creates the prompt for generating an SRS document."""
-         # Note: Source code might be less relevant for SRS, but included for context
-         prompt = f"""
+_SRS_TMPL = Template("""
 Generate a System Requirements Specification (SRS) document in Markdown format based on the provided project concept and implementation plan.
 
 **Project Concept (idea.md):**
 ```markdown
-{idea_content}
+$idea_content
 ```
 
 **Implementation Plan (impl_*.md):**
 ```markdown
-{impl_content}
+$impl_content
 ```
 
 **Instructions:**
@@ -267,33 +67,18 @@ Generate a System Requirements Specification (SRS) document in Markdown format b
 5.  **Format the entire output strictly as Markdown.** Use clear headings and structured lists for requirements.
 
 **Generate the complete SRS document (`srs.md`) below:**
-"""
-         return prompt
-
-    def _create_api_docs_prompt(self, idea_content: str, impl_content: str, source_code: dict[str, str]) -> str:
-         """Creates the prompt for generating API documentation."""
-         # Note: Requires source code analysis by the LLM.
-         source_code_blocks = []
-         if source_code:
-             for path, code in source_code.items():
-                  # Include full code for API docs if possible, maybe truncate less aggressively
-                  max_code_len = 4000
-                  truncated_code = code[:max_code_len] + ("\n..." if len(code) > max_code_len else "")
-                  source_code_blocks.append(f"**File: `{path}`**\n```python\n{truncated_code}\n```")
-         else:
-              return "**Error:** Cannot generate API documentation without source code."
-         source_code_section = "\n\n".join(source_code_blocks)
+""")
 
-         prompt = f"""
+_API_DOCS_TMPL = Template("""
 Generate API documentation in Markdown format based on the provided Python source code and implementation plan. Focus on documenting public functions, classes, and methods that form the project's API (internal or external).
 
 **Implementation Plan (impl_*.md):**
 ```markdown
-{impl_content}
+$impl_content
 ```
 
 **Source Code (src/):**
-{source_code_section}
+$source_code_section
 
 **Instructions:**
 
@@ -310,23 +95,19 @@ Generate API documentation in Markdown format based on the provided Python sourc
 6.  **Format the entire output strictly as Markdown.** Use code blocks for signatures and examples.
 
 **Generate the complete API documentation (`api.md`) below:**
-"""
-         return prompt
+""")
 
-    def _create_user_manual_prompt(self, idea_content: str, impl_content: str, source_code: dict[str, str]) -> str:
-         """Creates the prompt for generating a User Manual."""
-         # Note: Source code less critical here, focus on idea/impl
-         prompt = f"""
+_USER_MANUAL_TMPL = Template("""
 Generate a user manual (or help guide) in Markdown format for the project described below. Assume the target audience is an end-user who wants to install and use the application/tool.
 
 **Project Concept (idea.md):**
 ```markdown
-{idea_content}
+$idea_content
 ```
 
 **Implementation Plan (impl_*.md):**
 ```markdown
-{impl_content}
+$impl_content
 ```
 
 **Instructions:**
@@ -345,33 +126,18 @@ Generate a user manual (or help guide) in Markdown format for the project descri
 5.  **Format the entire output strictly as Markdown.** Use clear headings, lists, and code blocks for commands/examples.
 
 **Generate the complete User Manual (`user_manual.md`) below:**
-"""
-         return prompt
+""")
 
-    def _create_sdd_prompt(self, idea_content: str, impl_content: str, source_code: dict[str, str]) -> str:
-         """Creates the prompt for generating a Software Design Document (SDD)."""
-         # Note: Relies heavily on impl_*.md and source code.
-         source_code_blocks = []
-         if source_code:
-             for path, code in source_code.items():
-                  # Include full code if possible, maybe truncate less aggressively
-                  max_code_len = 4000
-                  truncated_code = code[:max_code_len] + ("\n..." if len(code) > max_code_len else "")
-                  source_code_blocks.append(f"**File: `{path}`**\n```python\n{truncated_code}\n```")
-         else:
-              source_code_blocks.append("*(No source code provided)*")
-         source_code_section = "\n\n".join(source_code_blocks)
-
-         prompt = f"""
+_SDD_TMPL = Template("""
 Generate a Software Design Document (SDD) in Markdown format based on the provided implementation plan and source code.
 
 **Implementation Plan (impl_*.md):**
 ```markdown
-{impl_content}
+$impl_content
 ```
 
 **Source Code (src/):**
-{source_code_section}
+$source_code_section
 
 **Instructions:**
 
@@ -395,6 +161,219 @@ Generate a Software Design Document (SDD) in Markdown format based on the provid
 5.  **Format the entire output strictly as Markdown.** Use clear headings, subheadings, lists, and code blocks where appropriate.
 
 **Generate the complete SDD document (`sdd.md`) below:**
-"""
-         return prompt
+""")
+
+class DocumenterAgent(BaseAgent):
+    """
+    Generates user-friendly documentation based on the project concept,
+    implementation plan, and final source code.
+    """
+
+    SUPPORTED_DOC_TYPES = ['sdd', 'srs', 'api', 'user_manual', 'project_overview']
+
+    def run(self, doc_type: str) -> str:
+        """
+        Executes the Documenter agent's task: generating a specific type of documentation.
+
+        Args:
+            doc_type: The type of document to generate (e.g., 'srs', 'api', 'user_manual').
+
+        Returns:
+            The absolute path to the generated document file.
+        """
+        self.logger.info(f"Running Documenter Agent for project: {self.project_name} (Doc Type: {doc_type})")
+
+        if doc_type not in self.SUPPORTED_DOC_TYPES:
+            raise ValueError(f"Unsupported document type '{doc_type}'. Supported types: {', '.join(self.SUPPORTED_DOC_TYPES)}")
+
+        # Determine output path based on doc_type
+        output_filename = f"{doc_type}.md" # Simple naming convention
+        if doc_type == 'project_overview': # Keep original name for general docs
+             output_filename = "project_docs.md"
+        output_doc_path = os.path.join(self.docs_path, output_filename)
+        idea_md_path = self.idea_md_path
+
+        # --- Read Input Files ---
+        self.logger.info(f"Reading concept from: {idea_md_path}")
+        idea_content = self._read_file(idea_md_path)
+        if idea_content is None:
+            self.logger.warning(f"Could not read {idea_md_path}. Documentation might be incomplete.")
+            idea_content = "# Project Concept\n\n(Could not read idea.md)"
+
+        impl_parts = ["Implementation plan for the project:\n\n"]
+        impl_chars = 0
+        with os.scandir(self.docs_path) as entries:
+            impl_md_paths = sorted(
+                entry.path for entry in entries
+                if entry.name.startswith("impl_") and entry.name.endswith(".md") and entry.is_file()
+            )
+        for impl_md_path, impl_content_file_content in zip(impl_md_paths, self._read_files(impl_md_paths)):
+            # project_docs_md_path = os.path.join(self.docs_path, "project_docs.md") # Replaced by dynamic path
+
+            self.logger.info(f"Reading implementation plan from: {impl_md_path}")
+            impl_parts.append(f"Reading implementation plan from file {impl_md_path}\n")
+
+            if impl_content_file_content is None:
+                self.logger.warning(f"Could not read {impl_md_path}. Documentation might be incomplete.")
+                impl_parts = [f"# Implementation Plan\n\n(Could not read {impl_md_path})"] # Keep reading context
+            else:
+                impl_parts.append(f"{impl_content_file_content}\n\n")
+                impl_chars += len(impl_content_file_content)
+                if impl_chars > IMPL_CONTENT_MAX_CHARS:
+                    self.logger.warning(f"Implementation plans exceed {IMPL_CONTENT_MAX_CHARS} chars - skipping the plans after {impl_md_path}.")
+                    break
+        impl_content = "".join(impl_parts)
+
+        self.logger.info("Reading source code...")
+        source_code_content = self._read_source_code()
+        if not source_code_content[0]:
+             self.logger.warning("No source code found. Documentation quality may be limited.")
+
+        # --- Generate Specific Documentation ---
+        self.logger.info(f"Attempting to generate '{doc_type}' documentation using AI.")
+        try:
+            documentation = self._generate_specific_documentation(
+                doc_type=doc_type,
+                idea_content=idea_content,
+                impl_content=impl_content,
+                source_code=source_code_content
+            )
+            self.logger.info(f"Successfully generated '{doc_type}' documentation content using AI.")
+        except (ValueError, ConnectionError, RuntimeError) as e:
+            self.logger.error(f"Failed to generate '{doc_type}' documentation using AI: {e}")
+            raise RuntimeError(f"Documenter Agent failed: {e}")
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during '{doc_type}' documentation generation: {e}", exc_info=True)
+            raise RuntimeError(f"An unexpected error occurred in Documenter Agent: {e}")
+
+        # --- Write Documentation File ---
+        self.logger.info(f"Writing documentation to: {output_doc_path}")
+        try:
+            self._write_file(output_doc_path, documentation)
+            self.logger.info(f"Successfully wrote {output_doc_path}")
+        except Exception as e:
+            # Error logged by _write_file
+            raise IOError(f"Failed to write {output_filename} for project {self.project_name}: {e}")
+
+        return output_doc_path
+
+
+    def _read_source_code(self) -> tuple[list[str], list[str]]:
+        """
+        Reads all .py files from the project's src directory.
+
+        Returns:
+            Parallel lists (paths, codes): paths relative to the project root and the matching file contents.
+        """
+        paths, codes = [], []
+        try:
+            try:
+                entries = os.scandir(self.src_path)
+            except (FileNotFoundError, NotADirectoryError):
+                self.logger.warning(f"Source directory not found: {self.src_path}")
+                return paths, codes
+            with entries:
+                file_paths = [
+                    entry.path for entry in entries
+                    if entry.name.endswith(".py") and entry.is_file(follow_symlinks=False)
+                ]
+            for file_path, content in zip(file_paths, self._read_files(file_paths, self._read_source_file)):
+                if content is not None:
+                    # Store with path relative to project root (e.g., src/module.py)
+                    paths.append(os.path.relpath(file_path, self.project_path))
+                    codes.append(content)
+        except Exception as e:
+            self.logger.error(f"Error reading source code files from {self.src_path}: {e}", exc_info=True)
+        return paths, codes
+
+    def _read_files(self, file_paths: list[str], read=None) -> list[str | None]:
+        """Reads file_paths concurrently with read (default _read_file), in order, so the I/O waits overlap."""
+        if not file_paths:
+            return []
+        with ThreadPoolExecutor(max_workers=min(READ_WORKERS, len(file_paths))) as executor:
+            return list(executor.map(read or self._read_file, file_paths))
+
+    def _generate_specific_documentation(self, doc_type: str, idea_content: str, impl_content: str, source_code: tuple[list[str], list[str]]) -> str:
+        """Generates the content for a specific documentation type."""
+        if not self.model:
+            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
+            raise RuntimeError("DocumenterAgent requires a configured Generative Model.")
+
+        # Dispatch to the correct prompt creation function
+        prompt_func = getattr(self, f"_create_{doc_type}_prompt", None)
+        if not prompt_func:
+             # Fallback or error if specific prompt function doesn't exist
+             self.logger.warning(f"No specific prompt function found for doc type '{doc_type}'. Using project overview prompt.")
+             prompt_func = self._create_project_overview_prompt # Default to overview
+
+        prompt = prompt_func(idea_content, impl_content, source_code)
+        self.logger.debug("Generated prompt for '%s' using %s:\n%.500s...", doc_type, prompt_func.__name__, prompt)
+        try:
+            self.logger.info(f"Sending request to LLM API for '{doc_type}' documentation...")
+            # Consider adjusting token limits if context is large
+            # generation_config = genai.types.GenerationConfig(max_output_tokens=4096)
+            # response = self.model.generate_content(prompt, generation_config=generation_config)
+            generated_docs = self.model.generate_content(prompt)
+            self.logger.info(f"Received '{doc_type}' documentation response from LLM API.")
+            self.logger.debug("Generated '%s' Docs (first 200 chars):\n%.200s...", doc_type, generated_docs)
+            return generated_docs
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during LLM API call (Documenter - {doc_type}): {e}", exc_info=True)
+            raise RuntimeError(f"Failed to generate '{doc_type}' documentation using AI: {e}")
+
+
+    # --- Prompt Creation Functions ---
+
+    @staticmethod
+    def _format_source_code(source_code: tuple[list[str], list[str]], max_code_len: int) -> str:
+        """Formats the source files as fenced blocks, each truncated to max_code_len chars, written into one buffer."""
+        buf = io.StringIO()
+        for path, code in zip(*source_code):
+            if buf.tell():
+                buf.write("\n\n")
+            buf.write(f"**File: `{path}`**\n```python\n")
+            buf.write(code[:max_code_len])
+            if len(code) > max_code_len:
+                buf.write("\n...")
+            buf.write("\n```")
+        return buf.getvalue()
+
+    def _create_project_overview_prompt(self, idea_content: str, impl_content: str, source_code: tuple[list[str], list[str]]) -> str:
+        """Creates the prompt for the general project documentation (project_docs.md)."""
+
+        # This prompt is the same as the original _create_prompt
+        # ... (keep the original prompt content here) ...
+        # Keep truncation for prompt size
+        source_code_section = self._format_source_code(source_code, max_code_len=1500) or "*(No source code provided)*"
+
+        return _PROJECT_OVERVIEW_TMPL.substitute(idea_content=idea_content, impl_content=impl_content, source_code_section=source_code_section)
+
+
+    def _create_srs_prompt(self, idea_content: str, impl_content: str, source_code: tuple[list[str], list[str]]) -> str:
+         """Creates the prompt for generating an SRS document."""
+         # Note: Source code might be less relevant for SRS, but included for context
+         return _SRS_TMPL.substitute(idea_content=idea_content, impl_content=impl_content)
+
+    def _create_api_docs_prompt(self, idea_content: str, impl_content: str, source_code: tuple[list[str], list[str]]) -> str:
+         """Creates the prompt for generating API documentation."""
+         # Note: Requires source code analysis by the LLM.
+         if not source_code[0]:
+              return "**Error:** Cannot generate API documentation without source code."
+         # Include full code for API docs if possible, maybe truncate less aggressively
+         source_code_section = self._format_source_code(source_code, max_code_len=4000)
+
+         return _API_DOCS_TMPL.substitute(impl_content=impl_content, source_code_section=source_code_section)
+
+    def _create_user_manual_prompt(self, idea_content: str, impl_content: str, source_code: tuple[list[str], list[str]]) -> str:
+         """Creates the prompt for generating a User Manual."""
+         # Note: Source code less critical here, focus on idea/impl
+         return _USER_MANUAL_TMPL.substitute(idea_content=idea_content, impl_content=impl_content)
+
+    def _create_sdd_prompt(self, idea_content: str, impl_content: str, source_code: tuple[list[str], list[str]]) -> str:
+         """Creates the prompt for generating a Software Design Document (SDD)."""
+         # Note: Relies heavily on impl_*.md and source code.
+         # Include full code if possible, maybe truncate less aggressively
+         source_code_section = self._format_source_code(source_code, max_code_len=4000) or "*(No source code provided)*"
+
+         return _SDD_TMPL.substitute(impl_content=impl_content, source_code_section=source_code_section)
 
@@ -0,0 +1,83 @@
+import asyncio
+from string import Template
+
+from .base_agent import BaseAgent
+from .innovator import IDEA_CONCEPT_SPEC, WILD_IDEA_TEXT
+from .market_analyst import MARKET_ANALYSIS_SPEC
+
+ANALYSIS_SENTINEL = "===MARKET_ANALYSIS==="
+
+_IDEA_ANALYSIS_TMPL = Template(
+    "\nWrite two Markdown documents for the user idea given at the end of this prompt.\n"
+    "\n## Document 1: project concept (idea.md)\n"
+    "\nExpand the user idea into a detailed project concept document in Markdown format.\n"
+    + IDEA_CONCEPT_SPEC
+    + "\n## Document 2: market analysis (market_analysis.md)\n"
+    "\nAnalyze the project concept from Document 1 from a business and market perspective. Provide innovative insights beyond a simple summary.\n"
+    + MARKET_ANALYSIS_SPEC
+    + f"\n**Output Document 1, then a line containing only {ANALYSIS_SENTINEL}, then Document 2.**\n"
+    "\n$wild\n\n**User Idea:** \"$idea_text\"\n"
+)
+
+
+class CombinedIdeaAnalystAgent(BaseAgent):
+    """
+    Creates idea.md and market_analysis.md with a single LLM request, instead of an
+    Innovator call followed by a Market Analyst call that re-sends the generated concept.
+    """
+
+    def run(self, idea_text: str, wild_mode: bool):
+        """
+        Executes the agent's task: creating the idea.md and market_analysis.md files.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun(idea_text=idea_text, wild_mode=wild_mode))
+
+    async def arun(self, idea_text: str, wild_mode: bool) -> tuple[str, str]:
+        """
+        Executes the agent's task: creating the idea.md and market_analysis.md files.
+
+        Args:
+            idea_text: The initial idea text.
+            wild_mode: Use the innovative / futuristic prompt variant.
+
+        Returns:
+            The paths of the written idea.md and market_analysis.md files.
+        """
+        self.logger.info(f"Running Combined Idea Analyst Agent for project: {self.project_name})")
+
+        if not idea_text:
+            raise ValueError("Initial idea text is required")
+
+        # Model initialization is handled by BaseAgent
+        if not self.model:
+            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
+            raise RuntimeError("CombinedIdeaAnalystAgent requires a configured Generative Model.")
+
+        prompt = _IDEA_ANALYSIS_TMPL.substitute(idea_text=idea_text, wild=WILD_IDEA_TEXT if wild_mode else "")
+
+        try:
+            self.logger.info("Sending request to LLM API...")
+            generated_output = await self._generate(prompt)
+            self.logger.info("Received response from LLM API.")
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during LLM API call: {e}", exc_info=True)
+            raise RuntimeError(f"Failed to generate concept and market analysis using AI: {e}")
+
+        idea_part, sentinel, analysis_part = generated_output.partition(ANALYSIS_SENTINEL)
+        if not sentinel or not idea_part.strip() or not analysis_part.strip():
+            raise RuntimeError(f"LLM response is missing the {ANALYSIS_SENTINEL} separator or one of the documents.")
+
+        content_prefix = f"# Project Idea: {self.project_name}\n\n## Initial Concept\n\n"
+        # The Innovator / Market Analyst sidecars describe the previous contents; drop them so those agents regenerate
+        self._write_output_hash(self.idea_md_path, None)
+        self._write_output_hash(self.analysis_md_path, None)
+        try:
+            await asyncio.gather(
+                self._awrite_file(self.idea_md_path, [content_prefix, idea_part.strip(), "\n"]),
+                self._awrite_file(self.analysis_md_path, analysis_part.strip() + "\n"),
+            )
+        except Exception as e:
+            raise IOError(f"Failed to write idea.md / market_analysis.md for project {self.project_name}: {e}")
+
+        return self.idea_md_path, self.analysis_md_path
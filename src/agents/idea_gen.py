@@ -1,20 +1,105 @@
-import os
+import asyncio
+import json
+import math
+import textwrap
+from string import Template
 from .base_agent import BaseAgent
+from .batch import BatchProcessor
+
+# Invariant instructions and JSON format first; the field and per-chunk numbering go last
+# so provider-side prompt caching can reuse the prefix across chunks and runs.
+_IDEAS_PROMPT_BASE = textwrap.dedent("""
+        Generate a diverse list of startup ideas that leverage AI, machine learning,
+        or other advanced technologies to solve problems or **CREATE NEW OPPORTUNITIES** in the field given at the end of this prompt.
+
+        Each idea must be:
+        - Feasible for a solo founder or a small team.
+        - Clearly categorized (e.g., "Healthcare", "Education", "HR and Recruitment", etc.).
+        - Accompanied by a concise description covering:
+        - Core concept
+        - Key features
+        - Potential benefits
+        - Target audience
+
+        Ensure the ideas represent a variety of use cases within the given field.
+
+        Return only the following JSON structure—no comments, markdown, or extra text:
+
+        {
+        "startup_ideas": [
+            {
+            "id": 1,
+            "category": "Virtual Assistance",
+            "title": "AI-powered virtual event planning assistant",
+            "description": "Develop an AI-powered assistant that helps plan and manage events such as conferences, weddings, and parties. It suggests venues, caterers, and entertainment options based on user preferences and budget."
+            },
+            {
+            "id": 2,
+            "category": "Travel",
+            "title": "Personalized virtual travel planning assistant",
+            "description": "Create a travel assistant that uses AI to build custom itineraries based on user interests, travel history, and budget. It can also handle bookings for flights, hotels, and activities."
+            },
+            ...
+        ]
+        }
+
+        $w1
+
+        $w2
+
+        Generate exactly **$count** ideas, numbered with "id" from $first_id to $last_id.
+        $angle
+        The field: **$subject**
+""")
+
+_IDEAS_PROMPT_TMPL = Template(Template(_IDEAS_PROMPT_BASE).safe_substitute(w1="", w2=""))
+_WILD_IDEAS_PROMPT_TMPL = Template(Template(_IDEAS_PROMPT_BASE).safe_substitute(
+    w1="The ideas should be **INNOVATIVE** **FUTURISTIC** **WILD** **IMAGINATIVE**.",
+    w2="**DONT** generate a projects concept based on current market trends or existing products. **BE INNOVATIVE** **FUTURISTIC** **THINK OUTSIDE THE BOX** **BE ORIGINAL** **BE UNIQUE**",
+))
+
+# Angle given to each concurrently generated chunk, so parallel requests explore different parts
+# of the field instead of independently sampling the same most likely ideas
+IDEA_ANGLES = (
+    "consumer products for individual end users",
+    "B2B tools for small and mid-sized businesses",
+    "enterprise workflows and operations",
+    "developer tools, infrastructure and automation",
+    "hardware, IoT and the physical world",
+    "data, analytics and research",
+    "education, community and social impact",
+    "marketplaces and platforms connecting different groups",
+)
+
 
 class IdeaGenAgent(BaseAgent):
     """
     Create list of ideas based on subject provided by user.
     """
 
+    MODEL_TIER = "cheap" # Brainstorming titles and blurbs doesn't need the strong model
+    IDEAS_PER_REQUEST = 5 # Ideas requested per LLM call
+    IDEA_FIELDS = ("category", "title", "description") # Required string fields of each idea
+
     def run(self, idea_subject_text: str, subject_name: str, num_ideas: int, wild_mode: bool):
         """
         Executes the IdeaGenAgent  task: creating the subject_name.json file.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun(idea_subject_text=idea_subject_text, subject_name=subject_name,
+                                     num_ideas=num_ideas, wild_mode=wild_mode))
+
+    async def arun(self, idea_subject_text: str, subject_name: str, num_ideas: int, wild_mode: bool):
+        """
+        Executes the IdeaGenAgent  task: creating the subject_name.json file.
 
         """
         self.logger.info(f"Running IdeaGenAgent for project: {self.project_name})")
 
         if not idea_subject_text:
             raise ValueError("Initial idea text is required")
+        if not num_ideas or num_ideas < 1:
+            raise ValueError("Number of ideas must be a positive integer")
         self.logger.info(f"Received initial idea: '{idea_subject_text[:100]}...'")
 
 
@@ -25,29 +110,77 @@ class IdeaGenAgent(BaseAgent):
             raise RuntimeError("IdeaGenAgent requires a configured Generative Model.")
 
 
-        ideas_list_path = os.path.join(self.docs_path, f"{subject_name}.json")
+        ideas_list_path = str(self._docs / f"{subject_name}.json")
+
+        # Split the list into smaller prompts - decode time scales with output length,
+        # so several short concurrent requests finish well before one long one.
+        num_chunks = math.ceil(num_ideas / self.IDEAS_PER_REQUEST)
+        prompts = []
+        for i in range(num_chunks):
+            start_id = i * self.IDEAS_PER_REQUEST + 1
+            count = min(self.IDEAS_PER_REQUEST, num_ideas - i * self.IDEAS_PER_REQUEST)
+            angle = IDEA_ANGLES[i % len(IDEA_ANGLES)] if num_chunks > 1 else None
+            prompts.append(self._create_prompt_chunk(idea_subject_text, start_id, count, wild_mode, angle))
+        self.logger.debug("Generated %d create prompt(s), first:\n%.500s...", len(prompts), prompts[0])
+
+        inputs_hash = self._inputs_hash(*prompts)
+        if self._is_output_current(ideas_list_path, inputs_hash):
+            self.logger.info(f"{ideas_list_path} is up to date for this subject - skipping LLM calls.")
+            return ideas_list_path
+        self._write_output_hash(ideas_list_path, None)
 
-        # Create mode
-        prompt = self._create_prompt(idea_subject_text, num_ideas, wild_mode)
-        self.logger.debug(f"Generated create prompt for:\n{prompt[:500]}...")
+        async def generate_chunk(prompt: str) -> str:
+            async with self._llm_semaphore():
+                return await self.model.agenerate_content(prompt)
 
         try:
-            self.logger.info("Sending request to LLM API...")
-            generated_output = self.model.generate_content(prompt)
-            self.logger.info("Received response from LLM API.")
-            self.logger.debug(f"Generated Output (first 200 chars):\n{generated_output[:200]}...")
+            if self._use_batch_api():
+                self.logger.info(f"Submitting {len(prompts)} request(s) to LLM Batch API...")
+                generated_outputs = await BatchProcessor(self.model).agenerate_batch(prompts)
+            else:
+                self.logger.info(f"Sending {len(prompts)} request(s) to LLM API...")
+                generated_outputs = await asyncio.gather(*[generate_chunk(p) for p in prompts])
+            self.logger.info("Received response(s) from LLM API.")
         except Exception as e:
             self.logger.error(f"An unexpected error occurred during API call: {e}", exc_info=True)
             raise RuntimeError(f"Failed to generate concept using AI: {e}")
 
-        # Determine content to write
+        async def parse_chunk(prompt: str, generated_output: str) -> list[dict]:
+            self.logger.debug("Generated Output (first 200 chars):\n%.200s...", generated_output)
+            try:
+                return self._parse_ideas(generated_output)
+            except ValueError as e:
+                # One self-repair attempt: resend the prompt with the validation error
+                self.logger.warning(f"Invalid ideas JSON from LLM ({e}) - retrying once with error feedback.")
+                async with self._llm_semaphore():
+                    repaired_output = await self.model.agenerate_content(self._create_repair_prompt(prompt, generated_output, str(e)))
+                return self._parse_ideas(repaired_output)
 
-        # Create mode - add prefix
-        final_content_to_write = generated_output
+        try:
+            parsed_chunks = await asyncio.gather(*[parse_chunk(p, o) for p, o in zip(prompts, generated_outputs)])
+        except ValueError as e:
+            self.logger.error(f"LLM returned invalid ideas JSON: {e}")
+            raise RuntimeError(f"Failed to generate valid ideas list using AI: {e}")
+
+        # Merge the partial lists, drop ideas another chunk already produced and renumber ids
+        startup_ideas = []
+        seen_titles = set()
+        for idea in (idea for chunk in parsed_chunks for idea in chunk):
+            title_key = " ".join(idea["title"].casefold().split())
+            if title_key not in seen_titles:
+                seen_titles.add(title_key)
+                startup_ideas.append(idea)
+        if len(startup_ideas) < num_ideas:
+            self.logger.info(f"Kept {len(startup_ideas)} of {num_ideas} requested ideas after removing duplicates.")
+        for idea_id, idea in enumerate(startup_ideas, start=1):
+            idea["id"] = idea_id
+
+        final_content_to_write = json.dumps({"startup_ideas": startup_ideas}, indent=2, ensure_ascii=False)
         write_action = "wrote"
 
         try:
-            self._write_file(ideas_list_path, final_content_to_write)
+            await self._awrite_file(ideas_list_path, final_content_to_write)
+            self._write_output_hash(ideas_list_path, inputs_hash)
             self.logger.info(f"Successfully {write_action} {ideas_list_path}")
         except Exception as e:
             # Error already logged by _write_file
@@ -55,58 +188,47 @@ class IdeaGenAgent(BaseAgent):
 
         return ideas_list_path
 
-    def _create_prompt(self, idea_subject_text: str, num_ideas: int, wild_mode: bool) -> str:
-        """Creates the prompt for the generative AI model to generate structured startup ideas."""
-        w1 = ""
-        w2 = ""
-
-        if wild_mode:
-            w1 = """**INNOVATIVE** **FUTURISTIC** **WILD** **IMAGINATIVE**"""
-            w2 = """**DONT** generate a projects concept based on current market trends or existing products. **BE INNOVATIVE** **FUTURISTIC** **THINK OUTSIDE THE BOX** **BE ORIGINAL** **BE UNIQUE**"""
-            
-        prompt = f"""
-        Generate a diverse {w1} list of **{num_ideas}** startup ideas that leverage AI, machine learning,
-        or other advanced technologies to solve problems or **CREATE NEW OPPORTUNITIES** in the field of:
-
-        **{idea_subject_text}**
-
-        {w2}
-
-        Each idea must be:
-        - Feasible for a solo founder or a small team.
-        - Clearly categorized (e.g., "Healthcare", "Education", "HR and Recruitment", etc.).
-        - Accompanied by a concise description covering:
-        - Core concept
-        - Key features
-        - Potential benefits
-        - Target audience
-
-        Ensure the ideas represent a variety of use cases within the **{idea_subject_text}** domain.
-
-        Return only the following JSON structure—no comments, markdown, or extra text:
-
-        {{
-        "startup_ideas": [
-            {{
-            "id": 1,
-            "category": "Virtual Assistance",
-            "title": "AI-powered virtual event planning assistant",
-            "description": "Develop an AI-powered assistant that helps plan and manage events such as conferences, weddings, and parties. It suggests venues, caterers, and entertainment options based on user preferences and budget."
-            }},
-            {{
-            "id": 2,
-            "category": "Travel",
-            "title": "Personalized virtual travel planning assistant",
-            "description": "Create a travel assistant that uses AI to build custom itineraries based on user interests, travel history, and budget. It can also handle bookings for flights, hotels, and activities."
-            }},
-            ...
-            {{
-            "id": {num_ideas},
-            "category": "HR and Recruitment",
-            "title": "AI-based employee onboarding and training",
-            "description": "Build a platform that provides AI-driven onboarding and training, offering personalized learning paths and performance tracking for new employees."
-            }}
-        ]
-        }}
+    def _parse_ideas(self, generated_output: str) -> list[dict]:
+        """
+        Extracts and validates the startup_ideas list from a single LLM response (tolerates surrounding markdown fences).
+        Returns the ideas with only the id and IDEA_FIELDS keys; raises ValueError if the response does not match the schema.
+        """
+        start = generated_output.find("{")
+        end = generated_output.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("LLM response does not contain a JSON object.")
+        try:
+            data = json.loads(generated_output[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"LLM response is not valid JSON: {e}")
+
+        ideas = data.get("startup_ideas") if isinstance(data, dict) else None
+        if not isinstance(ideas, list) or not ideas:
+            raise ValueError("LLM response has no 'startup_ideas' list.")
+        startup_ideas = []
+        for i, idea in enumerate(ideas):
+            if not isinstance(idea, dict):
+                raise ValueError(f"startup_ideas[{i}] is not an object.")
+            for field in self.IDEA_FIELDS:
+                if not isinstance(idea.get(field), str) or not idea[field].strip():
+                    raise ValueError(f"startup_ideas[{i}] is missing a '{field}' string.")
+            startup_ideas.append({"id": idea.get("id"), **{field: idea[field] for field in self.IDEA_FIELDS}})
+        return startup_ideas
+
+    def _create_repair_prompt(self, prompt: str, generated_output: str, error: str) -> str:
+        """Creates a follow-up prompt asking the model to fix a response that failed validation."""
+        return (f"{prompt}\n\nYour previous response could not be used: {error}\n\n"
+                f"Previous response:\n{generated_output}\n\n"
+                "Return only the corrected JSON structure—no comments, markdown, or extra text.")
+
+    def _create_prompt_chunk(self, idea_subject_text: str, start_id: int, count: int, wild_mode: bool,
+                             angle: str | None = None) -> str:
+        """
+        Creates the prompt for the generative AI model to generate `count` structured startup ideas, numbered from `start_id`.
+        angle restricts the chunk to one of IDEA_ANGLES when the list is generated by several concurrent requests.
         """
-        return prompt.strip()
+        template = _WILD_IDEAS_PROMPT_TMPL if wild_mode else _IDEAS_PROMPT_TMPL
+        angle_text = (f"Other requests cover the rest of the field: only generate ideas for **{angle}**.\n"
+                      if angle else "")
+        return template.substitute(subject=idea_subject_text, count=count, angle=angle_text,
+                                   first_id=start_id, last_id=start_id + count - 1).strip()
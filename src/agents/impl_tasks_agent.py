@@ -1,71 +1,15 @@
+import asyncio
+import json
 import os
+import textwrap
+from string import Template
 from .base_agent import BaseAgent
 from .coder import CoderAgent
 
-class ImplTasksAgent(BaseAgent):
-    """
-    Source code and flow ImplTasks generator.
-    """
-
-    def run(self):
-        """
-        Executes the ImplTasks agent's task: creating the tasks_*.md files.
-
-        """
-        self.logger.info(f"Running ImplTasks Agent for project: {self.project_name})")
-
-        # Model initialization is now handled by BaseAgent
-        if not self.model:
-            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
-            # Or raise a specific exception
-            raise RuntimeError("ImplTasksAgent requires a configured Generative Model.")
-
-        coder = CoderAgent(project_name=self.project_name, project_path=self.project_path)
-        all_content, _ = coder.get_all_content()
-        if not all_content:
-            self.logger.warning(f"No project markdown documents found in {self.src_path}.")
-            raise RuntimeError(f"ImplTasks Agent failed during ImplTasks generation: project markdown documents found in project path") 
-       
-        # --- Generate or Update Test Cases ---
-        self.logger.info("Attempting to generate impl.. tasks using AI.")
-        generated_tasks_files_content = ""
-        try:
-            create_tasks_prompt = self._create_impl_tasks_prompt(all_content)
-
-            generated_tasks_files_content = self.model.generate_content(create_tasks_prompt)
-            if not generated_tasks_files_content:
-                raise RuntimeError(f"ImplTasks Agent failed during  impl.. tasks generation)") 
-    
-            self.logger.info("Received ImplTasks generation response from LLM API.")
-            self.logger.debug(f"Generated Text (first 200 chars):\n{generated_tasks_files_content[:200]}...")
-
-            # --- Parsing the generated text into files ---
-            # Use the existing robust parser
-            generated_content = coder._parse_code_blocks(generated_tasks_files_content)
-            if not generated_content:
-                # This is more critical now, as it means no code was generated 
-                raise RuntimeError(f"AI response parsed, but no valid code blocks (<<<FILENAME: ...) found.") # Re-raise to signal failure
-
-            impl_tasks_files = coder._write_code_files(generated_content)
-          
-            log_action =  "generated"
-            self.logger.info(f"Succesfully {log_action} content for {len(impl_tasks_files)} impl tasks file(s) using AI.")
-            
-            return impl_tasks_files
-
-        except (ValueError, ConnectionError, RuntimeError) as e:
-            self.logger.error(f"Failed to generate ImplTasks using AI: {e}")
-            raise RuntimeError(f"ImplTasks Agent failed during ImplTasks generation: {e}") # Re-raise to signal failure
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during ImplTasks generation: {e}", exc_info=True)
-            raise RuntimeError(f"An unexpected error occurred during ImplTasks generation: {e}")
-
-
-    def _create_impl_tasks_prompt(self, files_content: str) -> str: 
-        """Creates a ImplTasks prompt for the generative AI model."""
-
-        prompt = f"""
-        Given the following implementation documents `(impl_*.md)`, extract and generate a comprehensive, step-by-step task list. 
+# Invariant instructions and format example first, project documents last, so
+# provider-side prompt caching can reuse the prefix across runs.
+_IMPL_TASKS_PROMPT_TMPL = Template(textwrap.dedent("""
+        Given the implementation documents `(impl_*.md)` provided at the end of this prompt, extract and generate a comprehensive, step-by-step task list. 
         
         Instructions:
         1. Generate tasks lists `(task_*.md)` for **ALL** implementation files.
@@ -79,11 +23,6 @@ class ImplTasksAgent(BaseAgent):
             *   **Prefix** each code block with `<<<FILENAME: path/to/[task list name].md` on its own line. Use a relevant path and filename (e.g., `tasks/task_aaa.md`, `tasks/task_bbb.md`).
             *   **Postfix** each code block with `>>>` on its own line.
 
-        The implementation documents:
-
-        ```
-        {files_content}
-        ```
 
         **Required tasks output Format example:**
 
@@ -141,9 +80,9 @@ class ImplTasksAgent(BaseAgent):
                 *   Details:
                     *   Import `JSONB` from `sqlalchemy.dialects.postgresql`.
                     *   Import `Column`, `Integer`, `String`, etc., from `sqlalchemy` if not already.
-                    *   Add the new column: `algorithm_costs_reimbursement = Column(JSONB, nullable=True, default=lambda: {{}})`
+                    *   Add the new column: `algorithm_costs_reimbursement = Column(JSONB, nullable=True, default=lambda: {})`
                         *   `nullable=True`: Allows existing scenarios to not have this data initially.
-                        *   `default=lambda: {{}}`: Provides a default empty JSON object for new scenarios if no data is provided. Consider if a more structured default is needed.
+                        *   `default=lambda: {}`: Provides a default empty JSON object for new scenarios if no data is provided. Consider if a more structured default is needed.
                 *   Example Snippet (conceptual):
                     ```python
                     from sqlalchemy import Column, Integer, String, Float, DateTime # ... and other types
@@ -156,7 +95,7 @@ class ImplTasksAgent(BaseAgent):
                         __tablename__ = "scenarios"
                         id = Column(Integer, primary_key=True, index=True)
                         # ... other existing columns ...
-                        algorithm_costs_reimbursement = Column(JSONB, nullable=True, default=lambda: {{}})
+                        algorithm_costs_reimbursement = Column(JSONB, nullable=True, default=lambda: {})
                         # ... other existing columns ...
                     ```
                 *   Verification: `algorithm_costs_reimbursement` column is added to the `Scenario` model definition.
@@ -169,8 +108,8 @@ class ImplTasksAgent(BaseAgent):
             4.  **Edit Migration Script:**
                 *   Action: Edit the newly generated migration script.
                 *   Details:
-                    *   In the `upgrade()` function, add `op.add_column('scenarios', sa.Column('algorithm_costs_reimbursement', postgresql.JSONB(astext_type=sa.Text()), nullable=True, server_default=sa.text("'{{}}'::jsonb")))`.
-                        *   Using `server_default` ensures the database handles the default for existing NULLs if desired, or for direct DB inserts. `sa.text("'{{}}'::jsonb")` is a common way to set a JSONB default.
+                    *   In the `upgrade()` function, add `op.add_column('scenarios', sa.Column('algorithm_costs_reimbursement', postgresql.JSONB(astext_type=sa.Text()), nullable=True, server_default=sa.text("'{}'::jsonb")))`.
+                        *   Using `server_default` ensures the database handles the default for existing NULLs if desired, or for direct DB inserts. `sa.text("'{}'::jsonb")` is a common way to set a JSONB default.
                     *   In the `downgrade()` function, add `op.drop_column('scenarios', 'algorithm_costs_reimbursement')`.
                 *   Verification: Migration script correctly defines adding and dropping the column.
 
@@ -212,8 +151,8 @@ class ImplTasksAgent(BaseAgent):
                         class Config:
                             orm_mode = True # If you intend to return this model directly from an ORM object
                             # Consider adding example data for OpenAPI docs
-                            schema_extra = {{
-                                "example": {{
+                            schema_extra = {
+                                "example": {
                                     "acquisition_cost": 50000.00,
                                     "annual_maintenance_cost": 10000.00,
                                     "cost_per_scan": 5.00,
@@ -222,8 +161,8 @@ class ImplTasksAgent(BaseAgent):
                                     "estimated_reimbursement_per_scan": 10.00,
                                     "amortization_period": 5,
                                     "estimated_radiologist_hourly_cost": 150.00
-                                }}
-                            }}
+                                }
+                            }
                     ```
                 *   Verification: Model is defined with all specified fields, types, and validation constraints (`ge=0`, `ge=1`).
 
@@ -260,6 +199,95 @@ class ImplTasksAgent(BaseAgent):
                         return total_upfront_costs / costs_data.amortization_period
                     ```   
         >>>
+
+        The implementation documents:
+
+        ```
+        $files_content
+        ```
+"""))
+
+class ImplTasksAgent(BaseAgent):
+    """
+    Source code and flow ImplTasks generator.
+    """
+
+    MANIFEST_FILE = ".impl_tasks.json" # Task files written by the last run, kept in the project root
+
+    def run(self):
+        """
+        Executes the ImplTasks agent's task: creating the tasks_*.md files.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun())
+
+    async def arun(self):
+        """
+        Executes the ImplTasks agent's task: creating the tasks_*.md files.
+
         """
+        self.logger.info(f"Running ImplTasks Agent for project: {self.project_name})")
+
+        # Model initialization is now handled by BaseAgent
+        if not self.model:
+            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
+            # Or raise a specific exception
+            raise RuntimeError("ImplTasksAgent requires a configured Generative Model.")
+
+        coder = CoderAgent(project_name=self.project_name, project_path=self.project_path)
+
+        # Skip the LLM call when no project document changed since the last successful run
+        manifest_path = os.path.join(self.project_path, self.MANIFEST_FILE)
+        inputs_hash = self._inputs_hash(coder.fingerprint(), _IMPL_TASKS_PROMPT_TMPL.template)
+        if self._is_output_current(manifest_path, inputs_hash):
+            impl_tasks_files = json.loads(self._read_file(manifest_path) or "[]")
+            if impl_tasks_files and all(os.path.exists(f) for f in impl_tasks_files):
+                self.logger.info("Implementation tasks are up to date with the project documents - skipping LLM call.")
+                return impl_tasks_files
+        self._write_output_hash(manifest_path, None)
+
+        all_content, _ = coder.get_all_content()
+        if not all_content:
+            self.logger.warning(f"No project markdown documents found in {self.src_path}.")
+            raise RuntimeError(f"ImplTasks Agent failed during ImplTasks generation: project markdown documents found in project path") 
+       
+        # --- Generate or Update Test Cases ---
+        self.logger.info("Attempting to generate impl.. tasks using AI.")
+        generated_tasks_files_content = ""
+        try:
+            create_tasks_prompt = self._create_impl_tasks_prompt(all_content)
+
+            # Stream the response and start writing each task file as soon as its block closes
+            async with self._llm_semaphore():
+                generated_tasks_files_content, impl_tasks_files = await coder.astream_to_code_files(
+                    self.model.stream_generate_content(create_tasks_prompt))
+
+            if not generated_tasks_files_content:
+                raise RuntimeError(f"ImplTasks Agent failed during  impl.. tasks generation)") 
     
-        return prompt
+            self.logger.info("Received ImplTasks generation response from LLM API.")
+            self.logger.debug("Generated Text (first 200 chars):\n%.200s...", generated_tasks_files_content)
+
+            if not impl_tasks_files:
+                # This is more critical now, as it means no code was generated 
+                raise RuntimeError(f"AI response parsed, but no valid code blocks (<<<FILENAME: ...) found.") # Re-raise to signal failure
+          
+            self._write_file(manifest_path, json.dumps(impl_tasks_files, indent=2))
+            self._write_output_hash(manifest_path, inputs_hash)
+
+            log_action =  "generated"
+            self.logger.info(f"Succesfully {log_action} content for {len(impl_tasks_files)} impl tasks file(s) using AI.")
+            
+            return impl_tasks_files
+
+        except (ValueError, ConnectionError, RuntimeError) as e:
+            self.logger.error(f"Failed to generate ImplTasks using AI: {e}")
+            raise RuntimeError(f"ImplTasks Agent failed during ImplTasks generation: {e}") # Re-raise to signal failure
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during ImplTasks generation: {e}", exc_info=True)
+            raise RuntimeError(f"An unexpected error occurred during ImplTasks generation: {e}")
+
+
+    def _create_impl_tasks_prompt(self, files_content: str) -> str: 
+        """Creates a ImplTasks prompt for the generative AI model."""
+        return _IMPL_TASKS_PROMPT_TMPL.substitute(files_content=files_content)
@@ -1,89 +1,14 @@
-import os
+import asyncio
+import json
+import textwrap
+from functools import lru_cache
+from string import Template
 
 
 from .base_agent import BaseAgent
 
-class InnovatorAgent(BaseAgent):
-    """
-    Expands a simple user idea into a more detailed concept using a Generative AI model.
-    """
-
-    def run(self, idea_text: str, wild_mode: bool):
-        """
-        Executes the Innovator agent's task: creating the idea.md file.
-
-        Args:
-            idea_text: The initial idea text.
-            modification_text: Instructions on how to modify the existing idea.
-        """
-        self.logger.info(f"Running Innovator Agent for project: {self.project_name})")
-
-        if not idea_text:
-            raise ValueError("Initial idea text is required")
-        self.logger.info(f"Received initial idea: '{idea_text[:100]}...'")
-
-        # Model initialization is now handled by BaseAgent
-        if not self.model:
-            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
-            # Or raise a specific exception
-            raise RuntimeError("InnovatorAgent requires a configured Generative Model.")
-
-        idea_md_path = os.path.join(self.docs_path, "idea.md")
-
-        # Create mode
-        prompt = self._create_prompt(idea_text, wild_mode=wild_mode)
-        self.logger.debug(f"Generated create prompt for LLM:\n{prompt[:500]}...")
-
-        try:
-            self.logger.info("Sending request to LLM API...")
-            generated_output = self.model.generate_content(prompt)
-            self.logger.info("Received response from LLM API.")
-            self.logger.debug(f"Generated Output (first 200 chars):\n{generated_output[:200]}...")
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during LLM API call: {e}", exc_info=True)
-            raise RuntimeError(f"Failed to generate concept using AI: {e}")
-
-        # Determine content to write
-
-        # Create mode - add prefix
-        content_prefix = f"# Project Idea: {self.project_name}\n\n## Initial Concept\n\n"
-        final_content_to_write = content_prefix + generated_output
-        write_action = "wrote"
-
-        try:
-            self._write_file(idea_md_path, final_content_to_write)
-            self.logger.info(f"Successfully {write_action} {idea_md_path}")
-        except Exception as e:
-            # Error already logged by _write_file
-            raise IOError(f"Failed to write idea.md for project {self.project_name}: {e}")
-
-        return idea_md_path
-
-    def _improve_idea_prompt(self, idea_path):
-        prompt = f"""Please review the project proposal and the associated business plan,
-        including the current scoring. I would like you to enhance the idea to make the business
-        opportunity more compelling. As you do so, recalculate the score after each iteration while
-        critically evaluating the proposal.
-        Repeat this process multiple times to maximize the final score.
-        Important: Do not alter the scoring method or formula.
-        """
-        return ""
-
-    def _create_prompt(self, idea_text: str, wild_mode: bool) -> str: # For initial creation
-        """Creates the prompt for the generative AI model."""
-        w1 = ""
-        w2 = ""
-        if wild_mode:
-            w1 = """**INNOVATIVE** **FUTURISTIC** **WILD** **IMAGINATIVE**"""
-            w2 = """**DONT** generate a project concept based on current market trends or existing products. **BE INNOVATIVE** **THINK OUTSIDE THE BOX** **BE ORIGINAL** **BE UNIQUE**"""
-
-        prompt = f"""
-            Expand the following user idea into a detailed {w1} project concept document in Markdown format.
-            
-            {w2}
-
-            **User Idea:** "{idea_text}"
-
+# Section specification of idea.md, shared with CombinedIdeaAnalystAgent.
+IDEA_CONCEPT_SPEC = textwrap.dedent("""
             * Use appropriate Markdown headers to clearly separate each section (e.g., `## Expanded Concept`).
             * Maintain a professional tone, clear structure, and consistent formatting using bullet points or paragraphs as needed.
             * Be imaginative yet practical—propose features that are technically feasible and aligned with the core concept.
@@ -120,6 +45,169 @@ class InnovatorAgent(BaseAgent):
                 `As a [type of user], I want to [do something] so that [I achieve a benefit].`
 
                 * Example: `As a returning user, I want to save my settings so that I don’t have to reconfigure them each time.`
+""")
+
+# Invariant instructions first, wild-mode lines and the user idea last, so provider-side
+# prompt caching can reuse the same prefix for every idea in both modes.
+_IDEA_PROMPT_BASE = (
+    "\nExpand the user idea given at the end of this prompt into a detailed project concept document in Markdown format.\n"
+    + IDEA_CONCEPT_SPEC
+    + '\n$wild\n\n**User Idea:** "$idea_text"\n'
+)
+
+WILD_IDEA_TEXT = ("The project concept must be **INNOVATIVE** **FUTURISTIC** **WILD** **IMAGINATIVE**. "
+                  "**DONT** generate a project concept based on current market trends or existing products. **BE INNOVATIVE** **THINK OUTSIDE THE BOX** **BE ORIGINAL** **BE UNIQUE**")
+
+_IDEA_PROMPT_TMPL = Template(Template(_IDEA_PROMPT_BASE).safe_substitute(wild=""))
+_WILD_IDEA_PROMPT_TMPL = Template(Template(_IDEA_PROMPT_BASE).safe_substitute(wild=WILD_IDEA_TEXT))
+
+# Structured variant (llm.structured_output): the model returns the idea.md sections as JSON
+# and the Markdown layout is rendered locally with _IDEA_MD_TMPL.
+_IDEA_JSON_PROMPT_BASE = textwrap.dedent("""
+            Expand the user idea given at the end of this prompt into a detailed project concept.
+            * Be imaginative yet practical—propose features that are technically feasible and aligned with the core concept.
+            * If the input idea is vague or underdeveloped, expand on it to establish a clear understanding first.
+            * Describe features and future ideas from the user's perspective, without implementation-level details.
+
+            **Output ONLY a JSON object (no Markdown, no extra text) with exactly these keys:**
+
+            * "expanded_concept": string - the core idea, the problem it addresses and its primary goal.
+            * "target_users": list of strings - intended user profiles (roles, skill levels, goals or needs).
+            * "key_features": list of 5-20 {"name": string, "description": string} objects - core features solving real user problems.
+            * "future_ideas": list of 5-10 {"name": string, "description": string} objects - advanced or long-term enhancements.
+            * "technical_considerations": list of strings - high-level technologies, platforms or architectures, no code.
+            * "user_stories": list of 5-10 strings in the form "As a [type of user], I want to [do something] so that [I achieve a benefit]."
+""") + '\n$wild\n\n**User Idea:** "$idea_text"\n'
+
+_IDEA_JSON_PROMPT_TMPL = Template(Template(_IDEA_JSON_PROMPT_BASE).safe_substitute(wild=""))
+_WILD_IDEA_JSON_PROMPT_TMPL = Template(Template(_IDEA_JSON_PROMPT_BASE).safe_substitute(wild=WILD_IDEA_TEXT))
+
+_IDEA_MD_TMPL = Template(
+    "## Expanded Concept\n\n$expanded_concept\n\n"
+    "## Target Users\n\n$target_users\n\n"
+    "## Key Features\n\n$key_features\n\n"
+    "## Potential Enhancements / Future Ideas\n\n$future_ideas\n\n"
+    "## High-Level Technical Considerations\n\n$technical_considerations\n\n"
+    "## User Stories (Examples)\n\n$user_stories\n"
+)
+
+class InnovatorAgent(BaseAgent):
+    """
+    Expands a simple user idea into a more detailed concept using a Generative AI model.
+    """
+
+    def run(self, idea_text: str, wild_mode: bool):
+        """
+        Executes the Innovator agent's task: creating the idea.md file.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun(idea_text=idea_text, wild_mode=wild_mode))
+
+    async def arun(self, idea_text: str, wild_mode: bool):
+        """
+        Executes the Innovator agent's task: creating the idea.md file.
 
+        Args:
+            idea_text: The initial idea text.
+            wild_mode: Use the innovative / futuristic prompt variant.
         """
-        return prompt
+        self.logger.info(f"Running Innovator Agent for project: {self.project_name})")
+
+        if not idea_text:
+            raise ValueError("Initial idea text is required")
+        self.logger.info(f"Received initial idea: '{idea_text[:100]}...'")
+
+        # Model initialization is now handled by BaseAgent
+        if not self.model:
+            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
+            # Or raise a specific exception
+            raise RuntimeError("InnovatorAgent requires a configured Generative Model.")
+
+        idea_md_path = self.idea_md_path
+
+        # Create mode
+        structured = self._use_structured_output()
+        prompt = self._create_prompt(idea_text, wild_mode=wild_mode, structured=structured)
+        self.logger.debug("Generated create prompt for LLM:\n%.500s...", prompt)
+
+        inputs_hash = self._inputs_hash(prompt)
+        if self._is_output_current(idea_md_path, inputs_hash):
+            self.logger.info(f"{idea_md_path} is up to date for this idea - skipping LLM call.")
+            return idea_md_path
+        self._write_output_hash(idea_md_path, None)
+
+        # Create mode - add prefix
+        content_prefix = f"# Project Idea: {self.project_name}\n\n## Initial Concept\n\n"
+
+        try:
+            if structured:
+                self.logger.info("Sending structured request to LLM API...")
+                try:
+                    generated_output = self._render_concept(await self._generate(prompt))
+                except ValueError as e:
+                    # The invalid response may have come from the response cache: request a fresh one, which also replaces it
+                    self.logger.warning(f"Invalid concept JSON from LLM ({e}) - retrying once without the response cache.")
+                    generated_output = self._render_concept(await self._generate(prompt, cache=False))
+                await self._awrite_file(idea_md_path, [content_prefix, generated_output])
+            else:
+                self.logger.info("Streaming response from LLM API...")
+                generated_output = await self._generate_to_file(idea_md_path, prompt, prefix=content_prefix)
+            self.logger.info("Received response from LLM API.")
+            self.logger.debug("Generated Output (first 200 chars):\n%.200s...", generated_output)
+            self._write_output_hash(idea_md_path, inputs_hash)
+        except OSError as e:
+            self.logger.error(f"Error writing file {idea_md_path}: {e}")
+            raise IOError(f"Failed to write idea.md for project {self.project_name}: {e}")
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during LLM API call: {e}", exc_info=True)
+            raise RuntimeError(f"Failed to generate concept using AI: {e}")
+
+        return idea_md_path
+
+    @staticmethod
+    def _render_concept(generated_output: str) -> str:
+        """
+        Renders the JSON concept returned for the structured prompt as the idea.md sections
+        (tolerates surrounding markdown fences). Raises ValueError if the response does not match the schema.
+        """
+        start = generated_output.find("{")
+        end = generated_output.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("LLM response does not contain a JSON object.")
+        try:
+            data = json.loads(generated_output[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"LLM response is not valid JSON: {e}")
+        if not isinstance(data, dict) or not isinstance(data.get("expanded_concept"), str):
+            raise ValueError("LLM response has no 'expanded_concept' string.")
+
+        def bullets(key: str) -> str:
+            items = data.get(key)
+            if not isinstance(items, list) or not items:
+                raise ValueError(f"LLM response has no '{key}' list.")
+            lines = []
+            for item in items:
+                if isinstance(item, dict):
+                    lines.append(f"* **{item.get('name', '')}:** {item.get('description', '')}")
+                else:
+                    lines.append(f"* {item}")
+            return "\n".join(lines)
+
+        return _IDEA_MD_TMPL.substitute(
+            expanded_concept=data["expanded_concept"].strip(),
+            target_users=bullets("target_users"),
+            key_features=bullets("key_features"),
+            future_ideas=bullets("future_ideas"),
+            technical_considerations=bullets("technical_considerations"),
+            user_stories=bullets("user_stories"),
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _create_prompt(idea_text: str, wild_mode: bool, structured: bool = False) -> str: # For initial creation
+        """Creates the prompt for the generative AI model. Memoized, since bulk runs and retries repeat inputs."""
+        if structured:
+            template = _WILD_IDEA_JSON_PROMPT_TMPL if wild_mode else _IDEA_JSON_PROMPT_TMPL
+        else:
+            template = _WILD_IDEA_PROMPT_TMPL if wild_mode else _IDEA_PROMPT_TMPL
+        return template.substitute(idea_text=idea_text)
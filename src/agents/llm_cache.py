@@ -0,0 +1,288 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+
+SEMANTIC_THRESHOLD = 0.97 # Minimum cosine similarity for a semantic cache hit
+SEMANTIC_MAX_PROMPT_CHARS = 24000 # Longer prompts are not embedded (they would exceed the embedding model's input)
+CACHE_TRIM_RATIO = 0.9 # Fraction of max_entries kept when LLMCache trims its oldest entries
+
+
+class LLMCache:
+    """
+    Disk-backed cache of LLM responses, one file per prompt key.
+    Entries older than `ttl` seconds (based on file mtime) are treated as misses.
+    Once more than `max_entries` entries are stored, the oldest ones are removed.
+    """
+
+    def __init__(self, cache_dir: str, ttl: float | None = None, max_entries: int | None = None):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._entry_count: int | None = None # Counted on the first new entry when max_entries is set
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached response for key, or None on miss / expired entry."""
+        path = self._entry_path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Error reading cache entry {path}: {e}")
+            return None
+
+    def set(self, key: str, value: str):
+        """Stores value under key. Written to a temp file and renamed so readers never see partial entries."""
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            is_new = self.max_entries is not None and not os.path.exists(path)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.warning(f"Error writing cache entry {path}: {e}")
+            return
+        if is_new:
+            self._count_new_entry()
+
+    def _entries(self) -> list[os.DirEntry]:
+        with os.scandir(self.cache_dir) as entries:
+            return [entry for entry in entries if entry.name.endswith(".txt") and entry.is_file()]
+
+    def _count_new_entry(self):
+        """Keeps a running entry count (scanned once per instance) and trims the cache when it exceeds max_entries."""
+        if self._entry_count is None:
+            self._entry_count = len(self._entries())
+        else:
+            self._entry_count += 1
+        if self._entry_count > self.max_entries:
+            self._trim()
+
+    def _trim(self):
+        """Removes the oldest entries (by mtime) until CACHE_TRIM_RATIO of max_entries are left."""
+        try:
+            entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        except OSError as e:
+            self.logger.warning(f"Error listing cache entries in {self.cache_dir}: {e}")
+            return
+        excess = entries[:max(0, len(entries) - int(self.max_entries * CACHE_TRIM_RATIO))]
+        for entry in excess:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass # Already removed by a concurrent trim
+            except OSError as e:
+                self.logger.warning(f"Error removing cache entry {entry.path}: {e}")
+        self._entry_count = len(entries) - len(excess)
+        self.logger.info(f"Trimmed {len(excess)} oldest LLM cache entries from {self.cache_dir}.")
+
+
+class SemanticCache:
+    """
+    Cache of LLM responses looked up by prompt embedding: a prompt whose embedding has cosine
+    similarity >= `threshold` with a stored prompt is served that prompt's response, so near-duplicate
+    prompts (e.g. re-runs after a minor idea.md edit) skip generation. The index is an append-only
+    JSONL file of unit vectors scanned linearly, which is fast enough for a project's few hundred prompts.
+    """
+
+    def __init__(self, cache_dir: str, threshold: float = SEMANTIC_THRESHOLD, ttl: float | None = None):
+        self.index_path = os.path.join(cache_dir, "semantic_index.jsonl")
+        self.responses = LLMCache(os.path.join(cache_dir, "semantic"), ttl=ttl)
+        self.threshold = threshold
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._entries: list[tuple[list[float], str]] | None = None # (unit embedding, response key)
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> list[float]:
+        norm = math.sqrt(sum(x * x for x in embedding)) or 1.0
+        return [x / norm for x in embedding]
+
+    def _load(self) -> list[tuple[list[float], str]]:
+        if self._entries is None:
+            self._entries = []
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries.append((entry["embedding"], entry["key"]))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.logger.warning(f"Error reading semantic cache index {self.index_path}: {e}")
+        return self._entries
+
+    def get(self, embedding: list[float]) -> str | None:
+        """Returns the response of the most similar stored prompt, or None if none reaches the threshold."""
+        query = self._normalize(embedding)
+        best_score, best_key = -1.0, None
+        for vector, key in self._load():
+            score = sum(a * b for a, b in zip(query, vector))
+            if score > best_score:
+                best_score, best_key = score, key
+        if best_key is None or best_score < self.threshold:
+            return None
+        self.logger.info(f"Semantic cache hit (similarity {best_score:.3f}) - skipping API call.")
+        return self.responses.get(best_key)
+
+    def add(self, embedding: list[float], response: str):
+        """Stores response under embedding."""
+        key = hashlib.blake2b(response.encode('utf-8'), digest_size=16).hexdigest()
+        vector = self._normalize(embedding)
+        self.responses.set(key, response)
+        try:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"key": key, "embedding": vector}) + "\n")
+            self._load().append((vector, key))
+        except Exception as e:
+            self.logger.warning(f"Error writing semantic cache index {self.index_path}: {e}")
+
+
+class CachedModel:
+    """
+    Wraps an AiClient so identical prompts (same model, temperature and reasoning effort) are served from an LLMCache
+    instead of a new API round trip. Calls made with cache=False skip the lookup and refresh the stored response.
+    With a SemanticCache, exact misses are also looked up by prompt embedding.
+    All other attributes are delegated to the wrapped client.
+    """
+
+    def __init__(self, model, cache: LLMCache, semantic: SemanticCache | None = None):
+        self.model = model
+        self.cache = cache
+        self.semantic = semantic
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def _effective_model(self) -> str | None:
+        """The model the wrapped client would send a request to now (its fallback while rate limited)."""
+        effective_model_name = getattr(self.model, "effective_model_name", None)
+        return effective_model_name() if effective_model_name else getattr(self.model, "model_name", None)
+
+    def _key(self, prompt: str, schema: dict | None = None, system: str | None = None, model_name: str | None = None) -> str:
+        """Cache key of prompt; model_name is the model serving it (default: the wrapped client's model_name)."""
+        payload = {
+            "prompt": prompt,
+            "model": model_name or getattr(self.model, "model_name", None),
+            "temperature": getattr(self.model, "temperature", None),
+            "reasoning_effort": getattr(self.model, "reasoning_effort", None),
+        }
+        # Only keyed when set, so existing entries stay valid
+        if schema is not None:
+            payload["schema"] = schema
+        if system is not None:
+            payload["system"] = system
+        return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+    def _lookup(self, key: str) -> str | None:
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.logger.info(f"LLM cache hit ({key[:12]}...) - skipping API call.")
+        return cached
+
+    def _store(self, key: str, response: str, embedding: list[float] | None = None, model_name: str | None = None):
+        """
+        Stores response under key. With model_name (the model the key was computed for), responses are only
+        stored if the client still uses that model, since a request that moved to the fallback model mid-retry
+        would otherwise be cached under the other model's key; the model-agnostic semantic index only takes
+        responses from the primary model.
+        """
+        if not response:
+            return
+        if model_name is not None and self._effective_model() != model_name:
+            self.logger.info("LLM request may have been served by the fallback model - response not cached.")
+            return
+        self.cache.set(key, response)
+        if embedding is not None and model_name in (None, getattr(self.model, "model_name", None)):
+            self.semantic.add(embedding, response)
+
+    def _use_semantic(self, prompt: str, system: str | None = None, schema: dict | None = None) -> bool:
+        # Only the prompt is embedded, so calls with a system block are matched exactly; JSON schema calls are
+        # too, since a similar prompt's response need not follow the schema
+        return (self.semantic is not None and system is None and schema is None
+                and len(prompt) <= SEMANTIC_MAX_PROMPT_CHARS)
+
+    def _embed(self, prompt: str) -> list[float] | None:
+        try:
+            return self.model.embed(prompt)
+        except Exception as e:
+            self.logger.warning(f"Prompt embedding failed, semantic cache skipped: {e}")
+            return None
+
+    async def _aembed(self, prompt: str) -> list[float] | None:
+        try:
+            return await self.model.aembed(prompt)
+        except Exception as e:
+            self.logger.warning(f"Prompt embedding failed, semantic cache skipped: {e}")
+            return None
+
+    def generate_content(self, prompt: str, cache: bool = True, schema: dict | None = None, system: str | None = None) -> str:
+        model_name = self._effective_model()
+        key = self._key(prompt, schema, system, model_name)
+        cached = self._lookup(key) if cache else None
+        if cached is not None:
+            return cached
+        embedding = self._embed(prompt) if self._use_semantic(prompt, system, schema) else None
+        cached = self.semantic.get(embedding) if cache and embedding is not None else None
+        if cached is not None:
+            return cached
+        response = self.model.generate_content(prompt, schema=schema, system=system)
+        self._store(key, response, embedding, model_name)
+        return response
+
+    async def agenerate_content(self, prompt: str, cache: bool = True, schema: dict | None = None, system: str | None = None) -> str:
+        model_name = self._effective_model()
+        key = self._key(prompt, schema, system, model_name)
+        cached = self._lookup(key) if cache else None
+        if cached is not None:
+            return cached
+        embedding = await self._aembed(prompt) if self._use_semantic(prompt, system, schema) else None
+        cached = self.semantic.get(embedding) if cache and embedding is not None else None
+        if cached is not None:
+            return cached
+        response = await self.model.agenerate_content(prompt, schema=schema, system=system)
+        self._store(key, response, embedding, model_name)
+        return response
+
+    async def agenerate_cached(self, prompt: str, generate, cache: bool = True, schema: dict | None = None) -> str:
+        """
+        Like agenerate_content, but a miss is served by awaiting generate() instead of the wrapped client,
+        e.g. a Batch API submission, whose response is then stored under the prompt's exact key.
+        """
+        key = self._key(prompt, schema)
+        cached = self._lookup(key) if cache else None
+        if cached is not None:
+            return cached
+        response = await generate()
+        self._store(key, response)
+        return response
+
+    async def stream_generate_content(self, prompt: str, cache: bool = True, system: str | None = None):
+        model_name = self._effective_model()
+        key = self._key(prompt, system=system, model_name=model_name)
+        cached = self._lookup(key) if cache else None
+        embedding = None
+        if cached is None:
+            embedding = await self._aembed(prompt) if self._use_semantic(prompt, system) else None
+            cached = self.semantic.get(embedding) if cache and embedding is not None else None
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        async for chunk in self.model.stream_generate_content(prompt, system=system):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, "".join(chunks), embedding, model_name)
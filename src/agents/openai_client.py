@@ -1,41 +1,92 @@
+import asyncio
+import functools
+import hashlib
+import json
 import logging
 import os
-import requests
+import importlib.util
+import weakref
+import httpx
 from utils import load_config
 from agents.ai_client import AiClient
-from openai import OpenAI
+from agents.retry import rate_limit_breaker, with_retry, with_retry_sync
+from openai import OpenAI, AsyncOpenAI, RateLimitError
+
+# Clients are shared process-wide so every agent reuses the same HTTP connection pool
+# (keep-alive connections, no TLS handshake per agent).
+_async_clients = weakref.WeakKeyDictionary() # event loop -> {(api_key, base_url): AsyncOpenAI}
+_inflight_requests = weakref.WeakKeyDictionary() # event loop -> {request key: Task}, see agenerate_content
+
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+HTTP_TIMEOUT = httpx.Timeout(600.0, connect=10.0) # Long read timeout: completions can take minutes
+HTTP2 = importlib.util.find_spec("h2") is not None # httpx needs the optional h2 package for HTTP/2
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Provider name (llm.provider) -> (API key environment variable, OpenAI-compatible base URL)
+PROVIDER_ENDPOINTS = {
+    "grok": ("XAI_API_KEY", "https://api.x.ai/v1"),
+    "groq": ("GROQ_API_KEY", "https://api.groq.com/openai/v1"),
+    "openrouter": ("OPENROUTER_API_KEY", "https://openrouter.ai/api/v1"),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_config() -> dict:
+    """config.yaml, read once per process instead of once per client."""
+    return load_config()
+
+
+@functools.lru_cache(maxsize=None)
+def _provider_endpoint(provider: str) -> tuple[str | None, str]:
+    """Returns (API key, base URL) for provider. Raises ValueError for unknown providers."""
+    if provider not in PROVIDER_ENDPOINTS:
+        raise ValueError(f"Unknown AI provider: {provider}")
+    env_var, base_url = PROVIDER_ENDPOINTS[provider]
+    return os.environ.get(env_var), base_url
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_client(api_key: str | None, base_url: str | None) -> OpenAI:
+    http_client = httpx.Client(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+
+
+@functools.lru_cache(maxsize=None)
+def get_client(model_name: str | None = None) -> "OpenAIClient":
+    """
+    Returns the OpenAIClient for model_name shared by all agents in the process. Clients hold no per-agent
+    state, so agents (including the CoderAgent helpers other agents create) need not construct their own.
+    """
+    return OpenAIClient(model_name=model_name)
+
 
 class OpenAIClient(AiClient):
 
-    def __init__(self):
+    def __init__(self, model_name: str | None = None):
         """
         Initializes the ai model client api.
+
+        Args:
+            model_name: Model to use instead of llm.model from config.yaml.
         """
 
         self.logger = logging.getLogger(self.__class__.__name__)
 
         # Load configuration
-        config = load_config()
-        self.model_name = config.get('llm', {}).get('model')
+        config = _cached_config()
+        self.model_name = model_name or config.get('llm', {}).get('model')
         self.provider = config.get('llm', {}).get('provider')
         self.reasoning_effort = config.get('llm', {}).get('reasoning_effort')
         self.temperature = config.get('llm', {}).get('temperature')
+        self.embedding_model = config.get('llm', {}).get('embedding_model') or DEFAULT_EMBEDDING_MODEL
+        self.fallback_model_name = config.get('llm', {}).get('fallback_model')
 
         self.logger.info(f"Using LLM - Provider: {self.provider}, Model: {self.model_name}, Reasoning effort: {self.reasoning_effort}")
 
-        # Configure xAI API (ensure XAI_API_KEY is set in the environment)
+        # API keys come from the environment (XAI_API_KEY / GROQ_API_KEY / OPENROUTER_API_KEY)
         try:
-            if "grok" in self.provider:
-                self.api_key = os.environ.get("XAI_API_KEY")
-                self.base_url="https://api.x.ai/v1"
-            elif "groq" in self.provider:
-                self.api_key = os.environ.get("GROQ_API_KEY")
-                self.base_url="https://api.groq.com/openai/v1"
-            elif "openrouter" in self.provider:
-                self.api_key = os.environ.get("OPENROUTER_API_KEY")
-                self.base_url="https://openrouter.ai/api/v1"
-
-            self.model = OpenAI( api_key=self.api_key, base_url=self.base_url)
+            self.api_key, self.base_url = _provider_endpoint(self.provider)
+            self.model = _shared_client(self.api_key, self.base_url)
 
         except ValueError as e:
             self.logger.error(f"API Key Configuration Error: {e}")
@@ -46,44 +97,178 @@ class OpenAIClient(AiClient):
 
         self.logger.info(f"{self.provider} initialized for model: {self.model_name}")
 
+    @property
+    def async_model(self) -> AsyncOpenAI:
+        """
+        The AsyncOpenAI client for the running event loop, shared by all agents on that loop.
+        httpx async connection pools are bound to the loop they were created on, so there is one client per loop.
+        """
+        loop = asyncio.get_running_loop()
+        clients = _async_clients.setdefault(loop, {})
+        key = (self.api_key, self.base_url)
+        if key not in clients:
+            http_client = httpx.AsyncClient(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            clients[key] = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
+        return clients[key]
+
 
-    def generate_content(self, prompt: str) -> str:
+    def embed(self, text: str) -> list[float]:
+        """Returns the embedding of text (llm.embedding_model), used by the semantic response cache."""
+        response = self.model.embeddings.create(model=self.embedding_model, input=text)
+        return response.data[0].embedding
+
+    async def aembed(self, text: str) -> list[float]:
+        """Async variant of embed."""
+        response = await with_retry(lambda: self.async_model.embeddings.create(model=self.embedding_model, input=text))
+        return response.data[0].embedding
+
+    def effective_model_name(self) -> str:
+        """The model for the next request: llm.fallback_model while the provider's rate-limit breaker is open."""
+        if self.fallback_model_name and rate_limit_breaker.is_open(self.provider):
+            return self.fallback_model_name
+        return self.model_name
+
+    def _request_model_name(self) -> str:
+        """effective_model_name(), logging when the fallback model is used."""
+        model_name = self.effective_model_name()
+        if model_name != self.model_name:
+            self.logger.warning(f"Sustained rate limiting from {self.provider} - using fallback model {model_name}.")
+        return model_name
+
+    def _system_message(self, system: str) -> dict:
+        """
+        The system message for system. OpenRouter forwards cache_control breakpoints to providers with explicit
+        prompt caching (Anthropic, Gemini); OpenAI-compatible providers cache the static prefix automatically.
+        """
+        if self.provider == "openrouter":
+            return {"role": "system", "content": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]}
+        return {"role": "system", "content": system}
+
+    def _completion_kwargs(self, prompt: str, schema: dict | None = None, system: str | None = None, **extra) -> dict:
+        messages = [{"role": "user", "content": prompt}]
+        if system is not None:
+            messages.insert(0, self._system_message(system))
+        kwargs = dict(messages=messages, temperature=self.temperature, **extra)
+        if self.reasoning_effort != "none":
+            kwargs["reasoning_effort"] = self.reasoning_effort
+        if schema is not None:
+            kwargs["response_format"] = {"type": "json_schema", "json_schema": {"name": "response", "schema": schema}}
+        return kwargs
+
+    def _create(self, **kwargs):
+        """chat.completions.create with retries. The model is picked per attempt, so retries can move to the fallback model."""
+        def attempt():
+            try:
+                return self.model.chat.completions.create(model=self._request_model_name(), **kwargs)
+            except RateLimitError:
+                rate_limit_breaker.record(self.provider)
+                raise
+        return with_retry_sync(attempt)
+
+    async def _acreate(self, **kwargs):
+        """Async variant of _create."""
+        async def attempt():
+            try:
+                return await self.async_model.chat.completions.create(model=self._request_model_name(), **kwargs)
+            except RateLimitError:
+                rate_limit_breaker.record(self.provider)
+                raise
+        return await with_retry(attempt)
+
+    def generate_content(self, prompt: str, cache: bool = True, schema: dict | None = None, system: str | None = None) -> str:
         if self.model is None:
             self.logger.error("Model not initialized. Cannot generate response.")
             return ""
 
-        print("@@@@@@@@@@@@@@@ Prompt @@@@@@@@@@@@@@@@@")
-        print(prompt)
-        print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@\n")
-        
+        self.logger.debug("Prompt:\n%s", prompt)
+
         try:
-            messages=[
-                #{"role": "system", "content": "You are a highly intelligent AI assistant."},
-                {"role": "user", "content": prompt}
-            ]
-            if self.reasoning_effort == "none":
-                 completion = self.model.chat.completions.create(
-                    model=self.model_name,
-                    messages=messages,
-                    temperature = self.temperature
-                )
-            else:
-                completion = self.client.chat.completions.create(
-                    model=self.model_name,
-                    reasoning_effort=self.reasoning_effort,
-                    messages=messages,
-                    temperature=self.temperature,
-                )
+            completion = self._create(**self._completion_kwargs(prompt, schema=schema, system=system))
 
             if completion.choices is None:
                 raise Exception(str(completion.error))
 
+            self.logger.debug("Answer:\n%s", completion.choices[0].message.content)
 
-            print("@@@@@@@@@@@@@@@ Answer @@@@@@@@@@@@@@@@@")
-            print(completion.choices[0].message.content)
-            print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@\n")
-            
             return completion.choices[0].message.content
         except Exception as e:
             self.logger.error(f"Error generating response from model API: {e}")
             raise Exception("FATAL error - Stopping!")
+
+
+    def _request_key(self, prompt: str, schema: dict | None = None, system: str | None = None) -> str:
+        payload = [self.provider, self.model_name, self.temperature, self.reasoning_effort, schema, system, prompt]
+        return hashlib.blake2b(json.dumps(payload).encode('utf-8'), digest_size=16).hexdigest()
+
+    async def agenerate_content(self, prompt: str, cache: bool = True, schema: dict | None = None, system: str | None = None) -> str:
+        """
+        Non-blocking variant of generate_content so several agents can share one event loop.
+        Concurrent calls for the same prompt and model settings share one API request: later callers
+        await the in-flight request of the first instead of issuing their own.
+        """
+        inflight = _inflight_requests.setdefault(asyncio.get_running_loop(), {})
+        key = self._request_key(prompt, schema, system)
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._agenerate_content(prompt, schema, system))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        else:
+            self.logger.info(f"Identical request already in flight ({key[:12]}...) - awaiting its response.")
+        # Shielded, so a cancelled caller does not cancel the request the other callers are waiting for
+        return await asyncio.shield(task)
+
+    async def _agenerate_content(self, prompt: str, schema: dict | None = None, system: str | None = None) -> str:
+        if self.async_model is None:
+            self.logger.error("Async model not initialized. Cannot generate response.")
+            return ""
+
+        try:
+            completion = await self._acreate(**self._completion_kwargs(prompt, schema=schema, system=system))
+
+            if completion.choices is None:
+                raise Exception(str(completion.error))
+
+            return completion.choices[0].message.content
+        except Exception as e:
+            self.logger.error(f"Error generating response from model API: {e}")
+            raise Exception("FATAL error - Stopping!")
+
+
+    async def agenerate_variants(self, prompt: str, n: int) -> list[str]:
+        """
+        Returns n sampled responses for prompt from a single request (n=), so the prompt prefill is paid once.
+        Providers that ignore n return fewer choices; the missing variants are requested separately.
+        """
+        try:
+            completion = await self._acreate(**self._completion_kwargs(prompt, n=n))
+
+            if completion.choices is None:
+                raise Exception(str(completion.error))
+            variants = [choice.message.content for choice in completion.choices]
+        except Exception as e:
+            self.logger.error(f"Error generating response variants from model API: {e}")
+            raise Exception("FATAL error - Stopping!")
+
+        if len(variants) < n:
+            self.logger.info(f"Provider returned {len(variants)} of {n} variants - requesting the rest separately.")
+            # Not coalesced: each missing variant needs its own sample
+            variants += await asyncio.gather(*(self._agenerate_content(prompt) for _ in range(n - len(variants))))
+        return variants[:n]
+
+    async def stream_generate_content(self, prompt: str, cache: bool = True, system: str | None = None):
+        """Yields response text chunks as the model produces them."""
+        if self.async_model is None:
+            self.logger.error("Async model not initialized. Cannot generate response.")
+            return
+
+        try:
+            # Only opening the stream is retried - once chunks were yielded a retry would duplicate them
+            stream = await self._acreate(**self._completion_kwargs(prompt, system=system, stream=True))
+
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            self.logger.error(f"Error streaming response from model API: {e}")
+            raise Exception("FATAL error - Stopping!")
@@ -1,8 +1,63 @@
+import asyncio
 import os
-
+import re
+from functools import lru_cache
+from string import Template
 
 from .base_agent import BaseAgent
 
+RESEARCH_MAX_AREAS = 6 # Upper bound on the technical areas researched concurrently (one LLM call each)
+
+_RESOURCE_TITLE_RE = re.compile(r"^###\s*(?:\d+\.\s*)?", re.MULTILINE)
+_AREA_BULLET_RE = re.compile(r"^\s*(?:(?:[-*\u2022]|\d+[.)])\s*)+")
+
+# Static instructions first and the project concept last, so the prefix is cacheable by the provider
+_PLAN_AREAS_TMPL = Template(
+    """
+Act as a technical research assistant. Based on the project concept given at the end of this prompt, identify
+the $max_areas most important technical areas requiring specific technologies (e.g., data storage, API integration,
+UI framework, specific algorithms, deployment environment).
+
+**Output Format:** One area per line as a Markdown bullet (`* Area`), short descriptive names only. Output nothing else.
+"""
+    "\n**Project Concept (idea.md):**\n```markdown\n$idea_content\n```\n"
+)
+
+_RESOURCE_TMPL = Template(
+    """
+Act as a technical research assistant. Based on your knowledge (including web data up to your last training cut-off),
+find the single most relevant article, blog post, tutorial, or documentation for the technical area below, in the
+context of the project concept given at the end of this prompt.
+
+**Output Format:** Exactly one Markdown block, structured as follows, and nothing else:
+
+```markdown
+### Title: [Title of Resource]
+*   **URL:** [URL or "General Knowledge"]
+*   **Summary:**
+    *   **Technologies:** [List technologies, e.g., Python, Kafka, React, PostgreSQL]
+    *   **Implementation Notes:** [Summarize key techniques/steps, e.g., "Uses Kafka consumers for ingestion...", "Recommends JWT for auth..."]
+    *   **Architecture:** [Mention patterns, e.g., "Microservices architecture suggested...", "Event-driven approach..."]
+    *   **Pros/Cons:** [Summarize any mentioned trade-offs]
+```
+
+**Important:** Focus the summary on actionable technical details relevant to implementation, not just high-level descriptions.
+"""
+    "\n**Technical Area:** $area\n"
+    "\n**Project Concept (idea.md):**\n```markdown\n$idea_content\n```\n"
+)
+
+_SYNTHESIS_TMPL = Template(
+    """
+Act as a technical research assistant. Briefly summarize the key takeaways regarding the most promising technologies
+and approaches for implementing the project concept given at the end of this prompt, covering the technical areas listed there.
+
+**Output Format:** One or two short Markdown paragraphs, without a heading. Output nothing else.
+"""
+    "\n**Technical Areas:**\n$areas\n"
+    "\n**Project Concept (idea.md):**\n```markdown\n$idea_content\n```\n"
+)
+
 class ResearchAgent(BaseAgent):
     """
     Performs research based on the project concept (idea.md) to find relevant
@@ -13,19 +68,27 @@ class ResearchAgent(BaseAgent):
     def run(self) -> str:
         """
         Executes the Research agent's task. Reads idea.md and generates research_summary.md.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun())
+
+    async def arun(self) -> str:
+        """
+        Executes the Research agent's task. Reads idea.md and generates research_summary.md.
 
         Returns:
             The absolute path to the generated research_summary.md file.
         """
         self.logger.info(f"Running Research Agent for project: {self.project_name}")
 
-        idea_md_path = os.path.join(self.docs_path, "idea.md")
+        idea_md_path = self.idea_md_path
         research_summary_path = os.path.join(self.docs_path, "research_summary.md")
 
         self.logger.info(f"Reading project concept from: {idea_md_path}")
-        idea_content = self._read_file(idea_md_path)
+        idea_content = await self._aread_file(idea_md_path)
         if idea_content is None:
             raise FileNotFoundError(f"Could not read idea.md for project {self.project_name}. Please ensure it exists.")
+        idea_content = self._truncate_to_tokens(idea_content, self.MAX_IDEA_TOKENS)
 
         # Model initialization is handled by BaseAgent
         if not self.model:
@@ -34,95 +97,63 @@ class ResearchAgent(BaseAgent):
 
         self.logger.info("Attempting to perform research and generate summary using AI.")
         try:
-            prompt = self._create_research_prompt(idea_content)
-            self.logger.debug(f"Generated research prompt for LLM:\n{prompt[:500]}...")
-            research_summary = self.model.generate_content(prompt)
-            self.logger.info("Received research summary response from LLM API.")
-            self.logger.debug(f"Generated Research Summary (first 200 chars):\n{research_summary[:200]}...")
+            areas = await self._plan_areas(idea_content)
+            self.logger.info(f"Researching {len(areas)} technical area(s) concurrently.")
+            *resources, synthesis = await asyncio.gather(
+                *(self._resource_for_area(area, idea_content) for area in areas),
+                self._generate(self._create_synthesis_prompt(tuple(areas), idea_content)),
+            )
+            self.logger.info("Received research summary responses from LLM API.")
         except Exception as e:
             self.logger.error(f"An unexpected error occurred during research generation: {e}", exc_info=True)
             raise RuntimeError(f"Failed to generate research summary using AI: {e}")
 
+        research_summary = [
+            f"# Technical Research Summary for {self.project_name}\n\n## Key Technical Areas Identified\n",
+            *(f"*   {area}\n" for area in areas),
+            "\n## Relevant Resources & Summaries\n",
+            *(f"\n### {i}. {resource}\n" for i, resource in enumerate(resources, 1)),
+            f"\n## Synthesis & Recommendations\n{synthesis.strip()}\n",
+        ]
         self.logger.info(f"Writing research summary to: {research_summary_path}")
         try:
-            self._write_file(research_summary_path, research_summary)
-            self.logger.info(f"Successfully wrote {research_summary_path}")
-        except Exception as e:
-            # Error logged by _write_file
+            await self._awrite_file(research_summary_path, research_summary)
+        except OSError as e:
+            self.logger.error(f"Error writing file {research_summary_path}: {e}")
             raise IOError(f"Failed to write research_summary.md for project {self.project_name}: {e}")
 
-        return research_summary_path
-
-    def _create_research_prompt(self, idea_content: str) -> str:
-        """Creates the prompt for the generative AI model to perform research and summarize."""
-        prompt = f"""
-Act as a technical research assistant. Analyze the following project concept and perform research (based on your knowledge,
-including web data up to your last training cut-off) to identify relevant technologies,
-implementation patterns, and architectural considerations.
-
-**Project Concept (idea.md):**
-```markdown
-{idea_content}
-```
-
-**Task:**
-
-1.  **Identify Key Technical Areas:** Based on the concept, determine the core technical challenges or areas requiring specific technologies (e.g., data storage, API integration, UI framework, specific algorithms, deployment environment).
-2.  **Simulate Research:** Find 5-10 relevant articles, blog posts, tutorials, or documentation summaries related to these key technical areas. For each resource found:
-    *   Provide a **Title** (or a descriptive name if a formal title isn't available).
-    *   Provide a **URL** if possible (or indicate if it's general knowledge).
-    *   Write a **Concise Summary** focusing specifically on:
-        *   Relevant **technologies** mentioned (libraries, frameworks, databases, languages).
-        *   Key **implementation details** or techniques discussed.
-        *   Relevant **architectural patterns** or considerations.
-        *   Potential **pros and cons** mentioned regarding the approaches.
-3.  **Synthesize Findings:** Briefly conclude with a high-level synthesis of the common or most promising technologies/approaches identified for this project concept.
-
-**Output Format:**
-
-Generate a Markdown document (`research_summary.md`) structured as follows:
-
-```markdown
-# Technical Research Summary for [Project Name - Infer from Concept]
-
-## Key Technical Areas Identified
-*   [Area 1, e.g., Real-time Data Processing]
-*   [Area 2, e.g., User Authentication]
-*   [Area 3, e.g., Cloud Deployment]
-*   ...
-
-## Relevant Resources & Summaries
-
-### 1. Title: [Title of Resource 1]
-*   **URL:** [URL or "General Knowledge"]
-*   **Summary:**
-    *   **Technologies:** [List technologies, e.g., Python, Kafka, React, PostgreSQL]
-    *   **Implementation Notes:** [Summarize key techniques/steps, e.g., "Uses Kafka consumers for ingestion...", "Recommends JWT for auth..."]
-    *   **Architecture:** [Mention patterns, e.g., "Microservices architecture suggested...", "Event-driven approach..."]
-    *   **Pros/Cons:** [Summarize any mentioned trade-offs]
-
-### 2. Title: [Title of Resource 2]
-*   **URL:** [URL or "General Knowledge"]
-*   **Summary:**
-    *   **Technologies:** [...]
-    *   **Implementation Notes:** [...]
-    *   **Architecture:** [...]
-    *   **Pros/Cons:** [...]
+        self.logger.info(f"Successfully wrote {research_summary_path}")
 
-### 3. Title: [Title of Resource 3]
-*   **URL:** [URL or "General Knowledge"]
-*   **Summary:**
-    *   **Technologies:** [...]
-    *   **Implementation Notes:** [...]
-    *   **Architecture:** [...]
-    *   **Pros/Cons:** [...]
-
-...(Add up to 5 resources)...
-
-## Synthesis & Recommendations
-[Briefly summarize the key takeaways regarding technologies and approaches relevant to implementing the project concept.]
-```
+        return research_summary_path
 
-**Important:** Focus the summaries on actionable technical details relevant to implementation, not just high-level descriptions. Format the entire output strictly as Markdown.
-"""
-        return prompt
+    async def _plan_areas(self, idea_content: str) -> list[str]:
+        """Runs a short LLM call listing the key technical areas of the concept, at most RESEARCH_MAX_AREAS."""
+        response = await self._generate(self._create_plan_areas_prompt(idea_content))
+        areas = [_AREA_BULLET_RE.sub("", line).strip() for line in response.splitlines()]
+        areas = [area for area in areas if area and not area.startswith("```")][:RESEARCH_MAX_AREAS]
+        if not areas:
+            raise RuntimeError("LLM response did not list any technical areas.")
+        self.logger.debug("Planned research areas: %s", areas)
+        return areas
+
+    async def _resource_for_area(self, area: str, idea_content: str) -> str:
+        """Generates one resource block for area, without its '###' heading marker (numbered when assembled)."""
+        response = await self._generate(self._create_resource_prompt(area, idea_content))
+        block = response.strip().removeprefix("```markdown").removeprefix("```").removesuffix("```").strip()
+        return _RESOURCE_TITLE_RE.sub("", block, count=1)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _create_plan_areas_prompt(idea_content: str) -> str:
+        """Creates the prompt listing the key technical areas of the concept. Memoized per idea content."""
+        return _PLAN_AREAS_TMPL.substitute(max_areas=RESEARCH_MAX_AREAS, idea_content=idea_content)
+
+    @staticmethod
+    def _create_resource_prompt(area: str, idea_content: str) -> str:
+        """Creates the prompt researching a single technical area."""
+        return _RESOURCE_TMPL.substitute(area=area, idea_content=idea_content)
+
+    @staticmethod
+    def _create_synthesis_prompt(areas: tuple[str, ...], idea_content: str) -> str:
+        """Creates the prompt for the closing synthesis over the planned areas."""
+        return _SYNTHESIS_TMPL.substitute(areas="\n".join(f"* {area}" for area in areas), idea_content=idea_content)
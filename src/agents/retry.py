@@ -0,0 +1,91 @@
+import asyncio
+import collections
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# Transient provider errors worth retrying (APITimeoutError is a subclass of APIConnectionError).
+# Anything else - auth, bad request, validation - is raised immediately.
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError, asyncio.TimeoutError)
+
+RATE_LIMIT_TRIP_COUNT = 3 # Rate-limit errors within RATE_LIMIT_WINDOW that open the breaker
+RATE_LIMIT_WINDOW = 60.0 # Seconds
+
+
+async def with_retry(coro_fn: Callable[[], Awaitable[Any]], *, attempts: int = 5, base: float = 1.0,
+                     max_delay: float = 30, retryable: tuple[type[BaseException], ...] = RETRYABLE_ERRORS) -> Any:
+    """
+    Awaits coro_fn(), retrying retryable errors with jittered exponential backoff.
+
+    Args:
+        coro_fn: Called once per attempt to create the awaitable (a coroutine can only be awaited once).
+        attempts: Total number of attempts before the last error is raised.
+        base: Delay before the first retry, in seconds; doubled on every retry.
+        max_delay: Upper bound for the backoff delay, in seconds (before jitter).
+        retryable: Exception types that trigger a retry.
+    """
+    for attempt in range(attempts):
+        try:
+            return await coro_fn()
+        except retryable as e:
+            if attempt == attempts - 1:
+                raise
+            delay = min(max_delay, base * 2 ** attempt) + random.random()
+            logger.warning(f"Transient LLM API error ({type(e).__name__}: {e}) - retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{attempts}).")
+            await asyncio.sleep(delay)
+
+
+def with_retry_sync(fn: Callable[[], Any], *, attempts: int = 5, base: float = 1.0, max_delay: float = 30,
+                    retryable: tuple[type[BaseException], ...] = RETRYABLE_ERRORS) -> Any:
+    """Blocking variant of with_retry for the sync client calls."""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except retryable as e:
+            if attempt == attempts - 1:
+                raise
+            delay = min(max_delay, base * 2 ** attempt) + random.random()
+            logger.warning(f"Transient LLM API error ({type(e).__name__}: {e}) - retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{attempts}).")
+            time.sleep(delay)
+
+
+class RateLimitBreaker:
+    """
+    Counts rate-limit errors per provider. The breaker is open while more than `trip_count` of them
+    happened within the last `window` seconds; clients then send requests to their fallback model.
+    Thread-safe, since sync clients may be used from several threads.
+    """
+
+    def __init__(self, trip_count: int = RATE_LIMIT_TRIP_COUNT, window: float = RATE_LIMIT_WINDOW):
+        self.trip_count = trip_count
+        self.window = window
+        self._errors: dict[str, collections.deque] = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+
+    def _prune(self, provider: str, now: float):
+        errors = self._errors[provider]
+        while errors and now - errors[0] > self.window:
+            errors.popleft()
+
+    def record(self, provider: str):
+        """Records a rate-limit error from provider."""
+        with self._lock:
+            now = time.monotonic()
+            self._errors[provider].append(now)
+            self._prune(provider, now)
+
+    def is_open(self, provider: str) -> bool:
+        with self._lock:
+            self._prune(provider, time.monotonic())
+            return len(self._errors[provider]) > self.trip_count
+
+
+rate_limit_breaker = RateLimitBreaker()
@@ -1,10 +1,52 @@
+import io
 import os
 
 
 import re # Keep re for potential future parsing if needed
 
-import glob
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
 from .base_agent import BaseAgent
+from .coder import READ_WORKERS
+
+# Review instructions first and the plan / source code last, so the static prefix is cacheable by the provider
+_REVIEW_PROMPT_TMPL = Template("""
+Act as an expert Python code reviewer. Analyze the Python source code given at the end of this prompt, generated based on the implementation plan given with it.
+
+**Review Task:**
+
+1.  **Adherence to Plan:** Does the code accurately implement the components, functions, classes, logic, and data structures specified in the implementation plan? Note any significant deviations or missing pieces.
+2.  **Correctness:** Does the code appear logically correct for its intended purpose based on the plan? Identify potential bugs, edge cases missed, or incorrect logic.
+3.  **Python Best Practices:** Does the code follow standard Python conventions (PEP 8 where applicable)? Is it readable, well-structured, and maintainable? Check for appropriate use of language features, error handling, and resource management.
+4.  **Clarity & Simplicity:** Is the code unnecessarily complex? Can any parts be simplified or made clearer?
+5.  **Security (Basic Check):** Are there any obvious security vulnerabilities (e.g., hardcoded secrets, potential injection points - if applicable based on code)?
+
+**Output Format:**
+
+*   **If the code looks good** and generally adheres to the plan with no major issues, respond with a brief confirmation like "Code looks good. Adheres to the plan with minor/no issues."
+*   **If significant issues are found,** provide clear, concise, and actionable feedback. Structure the feedback point-by-point, referencing the specific file (`filename=...`) and line numbers where possible. Explain *why* something is an issue and suggest *how* it could be improved or corrected. Focus on feedback that the Coder Agent can use to revise the code.
+
+**Example Feedback Output:**
+
+```
+AI Review Feedback:
+-------------------
+Issues found:
+1.  **File:** `src/utils.py` (Line 15): The error handling for file reading is incomplete; it should catch specific exceptions like `IOError`.
+2.  **File:** `src/main.py` (Function `process_data`): The logic does not seem to handle the edge case where the input list is empty, as specified in the plan (Section 4.2). Add a check for an empty list.
+3.  **General:** Consider using f-strings for string formatting in `src/api_client.py` for better readability (PEP 498).
+```
+
+**Implementation Plan (impl_*.md):**
+```markdown
+$impl_content
+```
+
+**Generated Source Code:**
+$source_code_section
+
+**Provide your review below:**
+""")
 
 class ReviewerAgent(BaseAgent):
     """
@@ -35,13 +77,7 @@ class ReviewerAgent(BaseAgent):
         if impl_content is None:
             impl_md_path = os.path.join(self.docs_path, "impl_*.md")
             self.logger.info(f"Implementation plan content not provided, attempting to read from: {impl_md_path}")
-            impl_files = glob.glob(impl_md_path)
-            if impl_files:
-                impl_content = ""
-                for file in impl_files:
-                    content = self._read_file(file)
-                    if content is not None:
-                        impl_content += content + "\n\n"
+            impl_content = self._read_impl_plans()
             if not impl_content:
                 self.logger.error(f"Cannot perform review: Implementation plan '{impl_md_path}' not found or empty.")
                 raise FileNotFoundError(f"Implementation plan is required for review.")
@@ -50,11 +86,10 @@ class ReviewerAgent(BaseAgent):
             self.logger.info("Generated files list not provided, scanning project 'src' directory...")
             src_path = os.path.join(self.project_path, 'src')
             generated_files = []
-            if os.path.isdir(src_path):
-                for root, _, files in os.walk(src_path):
-                    for file in files:
-                        if file.endswith('.py'):
-                            generated_files.append(os.path.join(root, file))
+            for root, _, files in os.walk(src_path): # Yields nothing if src/ does not exist
+                for file in files:
+                    if file.endswith('.py'):
+                        generated_files.append(os.path.join(root, file))
             if not generated_files:
                  self.logger.warning("No Python files found in 'src' directory. Nothing to review.")
                  # Ensure no stale review file exists
@@ -67,9 +102,11 @@ class ReviewerAgent(BaseAgent):
         # --- Read Source Code ---
         source_code_content = {}
         self.logger.info("Reading generated source code for review...")
-        for file_path in generated_files:
+        # Submit all reads up front so slow filesystems overlap the I/O waits
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            contents = list(executor.map(self._read_file, generated_files))
+        for file_path, content in zip(generated_files, contents):
              relative_path = os.path.relpath(file_path, self.project_path) # Path relative to project root
-             content = self._read_file(file_path)
              if content:
                  source_code_content[relative_path] = content
              else:
@@ -91,7 +128,7 @@ class ReviewerAgent(BaseAgent):
 
              if feedback:
                  self.logger.warning("AI Review found issues. Writing feedback...")
-                 self.logger.debug(f"AI Feedback:\n{feedback}")
+                 self.logger.debug("AI Feedback:\n%s", feedback)
                  self._write_file(review_md_path, feedback)
                  self.logger.info(f"Review feedback saved to: {review_md_path}")
                  return review_md_path # Return path to feedback file
@@ -119,13 +156,13 @@ class ReviewerAgent(BaseAgent):
             raise RuntimeError("ReviewerAgent requires a configured Generative Model.")
 
         prompt = self._create_review_prompt(impl_content, source_code)
-        self.logger.debug(f"Generated review prompt for LLM:\n{prompt[:500]}...")
+        self.logger.debug("Generated review prompt for LLM:\n%.500s...", prompt)
 
         try:
             self.logger.info("Sending request to LLM API for code review...")
             review_text = self.model.generate_content(prompt)
             self.logger.info("Received review response from LLM API.")
-            self.logger.debug(f"Raw AI Review Response:\n{review_text}")
+            self.logger.debug("Raw AI Review Response:\n%s", review_text)
 
             # --- Interpret LLM Response ---
             # Simple interpretation: Look for keywords indicating success or failure/feedback.
@@ -181,50 +218,17 @@ class ReviewerAgent(BaseAgent):
     def _create_review_prompt(self, impl_content: str, source_code: dict[str, str]) -> str:
         """Creates the prompt for the LLM to perform code review."""
 
-        source_code_blocks = []
+        buf = io.StringIO()
         for path, code in source_code.items():
+             if buf.tell():
+                 buf.write("\n\n")
              # Include filename relative to project root (e.g., src/module.py)
-             source_code_blocks.append(f"```python filename={path}\n{code}\n```")
-        source_code_section = "\n\n".join(source_code_blocks) if source_code_blocks else "*(No source code provided)*"
+             buf.write(f"```python filename={path}\n")
+             buf.write(code)
+             buf.write("\n```")
+        source_code_section = buf.getvalue() or "*(No source code provided)*"
 
-        prompt = f"""
-Act as an expert Python code reviewer. Analyze the following Python source code generated based on the provided implementation plan.
-
-**Implementation Plan (impl_*.md):**
-```markdown
-{impl_content}
-```
-
-**Generated Source Code:**
-{source_code_section}
-
-**Review Task:**
-
-1.  **Adherence to Plan:** Does the code accurately implement the components, functions, classes, logic, and data structures specified in the implementation plan? Note any significant deviations or missing pieces.
-2.  **Correctness:** Does the code appear logically correct for its intended purpose based on the plan? Identify potential bugs, edge cases missed, or incorrect logic.
-3.  **Python Best Practices:** Does the code follow standard Python conventions (PEP 8 where applicable)? Is it readable, well-structured, and maintainable? Check for appropriate use of language features, error handling, and resource management.
-4.  **Clarity & Simplicity:** Is the code unnecessarily complex? Can any parts be simplified or made clearer?
-5.  **Security (Basic Check):** Are there any obvious security vulnerabilities (e.g., hardcoded secrets, potential injection points - if applicable based on code)?
-
-**Output Format:**
-
-*   **If the code looks good** and generally adheres to the plan with no major issues, respond with a brief confirmation like "Code looks good. Adheres to the plan with minor/no issues."
-*   **If significant issues are found,** provide clear, concise, and actionable feedback. Structure the feedback point-by-point, referencing the specific file (`filename=...`) and line numbers where possible. Explain *why* something is an issue and suggest *how* it could be improved or corrected. Focus on feedback that the Coder Agent can use to revise the code.
-
-**Example Feedback Output:**
-
-```
-AI Review Feedback:
--------------------
-Issues found:
-1.  **File:** `src/utils.py` (Line 15): The error handling for file reading is incomplete; it should catch specific exceptions like `IOError`.
-2.  **File:** `src/main.py` (Function `process_data`): The logic does not seem to handle the edge case where the input list is empty, as specified in the plan (Section 4.2). Add a check for an empty list.
-3.  **General:** Consider using f-strings for string formatting in `src/api_client.py` for better readability (PEP 498).
-```
-
-**Provide your review below:**
-"""
-        return prompt
+        return _REVIEW_PROMPT_TMPL.substitute(impl_content=impl_content, source_code_section=source_code_section)
 
     def _remove_file_if_exists(self, file_path: str):
         """Removes a file if it exists, logging outcome."""
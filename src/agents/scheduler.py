@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from graphlib import TopologicalSorter
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+MAX_INFLIGHT_LLM = 10 # Agent steps running at once, keeps us under provider rate limits
+
+
+async def run_dag(nodes: dict[str, tuple[list[str], Callable[[], Awaitable[Any]]]],
+                  max_inflight: int = MAX_INFLIGHT_LLM) -> dict[str, Any]:
+    """
+    Runs a DAG of async steps. Each step starts as soon as all of its dependencies have finished,
+    with at most `max_inflight` steps running at the same time.
+
+    Args:
+        nodes: Maps a step name to (names of the steps it depends on, factory returning the step's coroutine).
+        max_inflight: Maximum number of steps running concurrently.
+
+    Returns:
+        Maps each step name to its result.
+    """
+    for name, (deps, _) in nodes.items():
+        for dep in deps:
+            if dep not in nodes:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+
+    semaphore = asyncio.Semaphore(max_inflight)
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run_step(name: str):
+        deps, factory = nodes[name]
+        if deps:
+            await asyncio.gather(*(tasks[dep] for dep in deps))
+        async with semaphore:
+            logger.debug(f"Starting step: {name}")
+            return await factory()
+
+    # static_order() raises graphlib.CycleError on cycles and yields dependencies first,
+    # so every task a step waits on already exists when the step is created.
+    for name in TopologicalSorter({name: deps for name, (deps, _) in nodes.items()}).static_order():
+        tasks[name] = asyncio.create_task(run_step(name))
+
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except Exception:
+        for task in tasks.values():
+            task.cancel()
+        # Let the cancelled steps finish, so none is left pending or with an unretrieved exception
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return dict(zip(tasks, results))
+
@@ -1,14 +1,112 @@
+import asyncio
+import json
 import os
+from functools import lru_cache
+from string import Template
+
 from .base_agent import BaseAgent
 
+
+# Scoring instructions, shared with CombinedDocsAgent.
+SCORING_SPEC = """
+
+        Please analyze the following business idea review, which is structured into categories with Pros and Cons. Your task is to generate a quantitative score reflecting the idea's viability based on this analysis.
+
+        Follow these steps:
+
+        1.  **Read the entire analysis carefully**, including the introduction and conclusion, to understand the overall context and the analyst's sentiment.
+        2.  **For each numbered category listed below, assign a Category Score from 1 to 10.** Base this score on the balance and significance of the Pros versus the Cons presented within that specific category.
+            *   **Scoring Guide:**
+                *   1-3: Very Weak / High Risk (Cons heavily outweigh Pros)
+                *   4-5: Weak / Moderate Risk (Cons outweigh Pros)
+                *   6: Neutral / Slightly Positive (Balanced, or minor Pros edge out Cons)
+                *   7-8: Strong / Moderate Opportunity (Pros clearly outweigh Cons)
+                *   9-10: Very Strong / High Opportunity (Compelling Pros, minimal Cons)
+        3.  **Use the following categories and weights:**
+            *   1. Market Opportunity & Need: Weight = 20%
+            *   2. Value Proposition & Differentiation: Weight = 20%
+            *   3. Monetization Strategy & Potential: Weight = 15%
+            *   4. Required Investment & Financials: Weight = 10%
+            *   5. Technical Feasibility & Challenges: Weight = 10%
+            *   6. Scalability & Growth Potential: Weight = 10%
+            *   7. Team & Execution: Weight = 5%
+            *   8. Key Risks & Barriers to Entry: Weight = 10%
+            *   *(If a category is missing from the input text, note it and exclude it from the calculation, adjusting the weights of the remaining categories proportionally if possible, or assign a neutral score of 6).*
+        4.  **Calculate the Weighted Score for each category:** `Category Score * Category Weight`
+        5.  **Calculate the Overall Viability Score:** Sum all Weighted Scores and divide the total by 10. The result should be a score between 1 and 10.
+        6.  **Output the results clearly.** Include:
+            *   The Category Score (1-10) for each category.
+            *   A brief justification (1 sentence) for each Category Score, referencing the key Pros/Cons.
+            *   The final Overall Viability Score (rounded to two decimal places).
+
+"""
+
+_SCORING_TMPL = Template(SCORING_SPEC + """        **Business Idea Review Text:**
+
+        $business_text
+        """)
+
+# Structured variant (llm.structured_output): the model returns the category scores as JSON matching
+# SCORING_SCHEMA (provider JSON schema mode); the weighted overall score and the Markdown are computed locally.
+SCORING_CATEGORIES = { # Category -> weight (%)
+    "Market Opportunity & Need": 20,
+    "Value Proposition & Differentiation": 20,
+    "Monetization Strategy & Potential": 15,
+    "Required Investment & Financials": 10,
+    "Technical Feasibility & Challenges": 10,
+    "Scalability & Growth Potential": 10,
+    "Team & Execution": 5,
+    "Key Risks & Barriers to Entry": 10,
+}
+
+SCORING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "categories": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "enum": list(SCORING_CATEGORIES)},
+                    "score": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "justification": {"type": "string"},
+                },
+                "required": ["name", "score", "justification"],
+            },
+        },
+    },
+    "required": ["categories"],
+}
+
+_SCORING_JSON_TMPL = Template(
+    "\nScore the business idea review given at the end of this prompt, which is structured into categories with Pros and Cons.\n"
+    "For each category below, assign a score from 1 to 10 based on the balance and significance of its Pros versus Cons "
+    "(1-3: Cons heavily outweigh Pros, 4-5: Cons outweigh Pros, 6: balanced, 7-8: Pros clearly outweigh Cons, "
+    "9-10: compelling Pros, minimal Cons), with a one sentence justification referencing the key Pros/Cons. "
+    "Leave out categories missing from the review.\n\n"
+    + "".join(f"* {name}\n" for name in SCORING_CATEGORIES)
+    + '\n**Output ONLY a JSON object (no Markdown, no extra text):** '
+    '{"categories": [{"name": string, "score": integer, "justification": string}, ...]}\n'
+    "\n**Business Idea Review Text:**\n\n$business_text\n"
+)
+
 class ScoringAgent(BaseAgent):
     """
     Scoring agent for business Pros and Cons.
     """
 
+    MAX_BUSINESS_TOKENS = 6000 # business.md content beyond this is truncated per section before prompting
+
     def run(self):
         """
         Executes the Scoring agent's task: creating the score.md file.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun())
+
+    async def arun(self):
+        """
+        Executes the Scoring agent's task: creating the score.md file.
 
         """
         self.logger.info(f"Running Scoring Agent for project: {self.project_name})")
@@ -23,74 +121,91 @@ class ScoringAgent(BaseAgent):
         if not os.path.exists(business_md_path):
             raise Exception("idea.md file does not exists")
 
-        business_text = self._read_file(business_md_path)
+        business_text = await self._aread_file(business_md_path)
+        if business_text is None:
+            raise FileNotFoundError(f"Could not read business.md for project {self.project_name}.")
+        business_text = self._truncate_to_tokens(business_text, self.MAX_BUSINESS_TOKENS)
 
         scoring_md_path = os.path.join(self.docs_path, "scoring.md")
 
         # Create mode
-        prompt = self._create_prompt(business_text)
-        self.logger.debug(f"Generated create prompt for:\n{prompt[:500]}...")
+        structured = self._use_structured_output()
+        prompt = self._create_prompt(business_text, structured=structured)
+        self.logger.debug("Generated create prompt for:\n%.500s...", prompt)
+
+        # Create mode - add prefix
+        content_prefix = f"# Project {self.project_name} scoring for business: {self.project_name}\n\n"
 
         try:
-            self.logger.info("Sending request to LLM API...")
-            generated_output = self.model.generate_content(prompt)
+            if structured:
+                self.logger.info("Sending structured request to LLM API...")
+                try:
+                    generated_output = self._render_scores(await self._generate(prompt, schema=SCORING_SCHEMA))
+                except ValueError as e:
+                    # The invalid response may have come from the response cache: request a fresh one, which also replaces it
+                    self.logger.warning(f"Invalid scoring JSON from LLM ({e}) - retrying once without the response cache.")
+                    generated_output = self._render_scores(await self._generate(prompt, cache=False, schema=SCORING_SCHEMA))
+                await self._awrite_file(scoring_md_path, [content_prefix, generated_output])
+            else:
+                self.logger.info(f"Streaming response from LLM API to: {scoring_md_path}")
+                generated_output = await self._generate_to_file(scoring_md_path, prompt, prefix=content_prefix)
             self.logger.info("Received response from LLM API.")
-            self.logger.debug(f"Generated Output (first 200 chars):\n{generated_output[:200]}...")
+            self.logger.debug("Generated Output (first 200 chars):\n%.200s...", generated_output)
+        except OSError as e:
+            self.logger.error(f"Error writing file {scoring_md_path}: {e}")
+            raise IOError(f"Failed to write scoring.md for project {self.project_name}: {e}")
         except Exception as e:
             self.logger.error(f"An unexpected error occurred during API call: {e}", exc_info=True)
             raise RuntimeError(f"Failed to generate concept using AI: {e}")
 
-        # Determine content to write
-
-        # Create mode - add prefix
-        content_prefix = f"# Project {self.project_name} scoring for business: {self.project_name}\n\n"
-        final_content_to_write = content_prefix + generated_output
-        write_action = "wrote"
-
-        try:
-            self._write_file(scoring_md_path, final_content_to_write)
-            self.logger.info(f"Successfully {write_action} {scoring_md_path}")
-        except Exception as e:
-            # Error already logged by _write_file
-            raise IOError(f"Failed to write scoring.md for project {self.project_name}: {e}")
+        self.logger.info(f"Successfully wrote {scoring_md_path}")
 
         return scoring_md_path
 
-    def _create_prompt(self, business_text: str) -> str:
-        """Creates the prompt for the generative AI model."""
-        prompt = f"""
-
-        Please analyze the following business idea review, which is structured into categories with Pros and Cons. Your task is to generate a quantitative score reflecting the idea's viability based on this analysis.
-
-        Follow these steps:
-
-        1.  **Read the entire analysis carefully**, including the introduction and conclusion, to understand the overall context and the analyst's sentiment.
-        2.  **For each numbered category listed below, assign a Category Score from 1 to 10.** Base this score on the balance and significance of the Pros versus the Cons presented within that specific category.
-            *   **Scoring Guide:**
-                *   1-3: Very Weak / High Risk (Cons heavily outweigh Pros)
-                *   4-5: Weak / Moderate Risk (Cons outweigh Pros)
-                *   6: Neutral / Slightly Positive (Balanced, or minor Pros edge out Cons)
-                *   7-8: Strong / Moderate Opportunity (Pros clearly outweigh Cons)
-                *   9-10: Very Strong / High Opportunity (Compelling Pros, minimal Cons)
-        3.  **Use the following categories and weights:**
-            *   1. Market Opportunity & Need: Weight = 20%
-            *   2. Value Proposition & Differentiation: Weight = 20%
-            *   3. Monetization Strategy & Potential: Weight = 15%
-            *   4. Required Investment & Financials: Weight = 10%
-            *   5. Technical Feasibility & Challenges: Weight = 10%
-            *   6. Scalability & Growth Potential: Weight = 10%
-            *   7. Team & Execution: Weight = 5%
-            *   8. Key Risks & Barriers to Entry: Weight = 10%
-            *   *(If a category is missing from the input text, note it and exclude it from the calculation, adjusting the weights of the remaining categories proportionally if possible, or assign a neutral score of 6).*
-        4.  **Calculate the Weighted Score for each category:** `Category Score * Category Weight`
-        5.  **Calculate the Overall Viability Score:** Sum all Weighted Scores and divide the total by 10. The result should be a score between 1 and 10.
-        6.  **Output the results clearly.** Include:
-            *   The Category Score (1-10) for each category.
-            *   A brief justification (1 sentence) for each Category Score, referencing the key Pros/Cons.
-            *   The final Overall Viability Score (rounded to two decimal places).
-
-        **Business Idea Review Text:**
-
-        {business_text}
+    @staticmethod
+    def _render_scores(generated_output: str) -> str:
         """
-        return prompt
+        Renders the JSON category scores returned for the structured prompt as a Markdown table with the
+        weighted Overall Viability Score; weights of missing categories are redistributed proportionally.
+        Tolerates surrounding markdown fences; raises ValueError if the response does not match SCORING_SCHEMA.
+        """
+        start = generated_output.find("{")
+        end = generated_output.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("LLM response does not contain a JSON object.")
+        try:
+            data = json.loads(generated_output[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"LLM response is not valid JSON: {e}")
+        categories = data.get("categories") if isinstance(data, dict) else None
+        if not isinstance(categories, list):
+            raise ValueError("LLM response has no 'categories' list.")
+
+        scores = {}
+        for category in categories:
+            name = category.get("name") if isinstance(category, dict) else None
+            score = category.get("score") if isinstance(category, dict) else None
+            if name not in SCORING_CATEGORIES or not isinstance(score, (int, float)) or not 1 <= score <= 10:
+                raise ValueError(f"LLM response has an invalid category score: {category}")
+            scores[name] = (score, str(category.get("justification", "")).strip())
+        if not scores:
+            raise ValueError("LLM response does not score any category.")
+
+        lines = ["| Category | Weight | Score | Justification |", "|---|---|---|---|"]
+        for name, weight in SCORING_CATEGORIES.items():
+            if name in scores:
+                score, justification = scores[name]
+                lines.append(f"| {name} | {weight}% | {score} | {justification} |")
+            else:
+                lines.append(f"| {name} | {weight}% | - | Not covered by the review; excluded. |")
+        total_weight = sum(SCORING_CATEGORIES[name] for name in scores)
+        overall = sum(score * SCORING_CATEGORIES[name] for name, (score, _) in scores.items()) / total_weight
+        lines.append(f"\n**Overall Viability Score:** {overall:.2f} / 10\n")
+        return "\n".join(lines)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _create_prompt(business_text: str, structured: bool = False) -> str:
+        """Creates the prompt for the generative AI model. Memoized per business review text."""
+        template = _SCORING_JSON_TMPL if structured else _SCORING_TMPL
+        return template.substitute(business_text=business_text)
@@ -1,118 +1,19 @@
+import asyncio
+import json
 import os
-
-import re
-import subprocess
-import sys
-import shutil
-import glob
+from string import Template
 from .base_agent import BaseAgent
 from .coder import CoderAgent
 
-
-class TesterAgent(BaseAgent):
-    """
-    Generates and executes unit/integration tests based on the implementation
-    details (impl_*.md) and the generated source code.
-    """
-
-    def run(self) -> list[str]:
-        """
-        Executes the Tester agent's task: generating or updating test files.
-        Does NOT execute the tests.
-
-        Args:
-            impl_content: Optional pre-read content of impl_*.md. If None, reads from file.
-
-        Returns:
-            A list of absolute paths to the generated  test files.
-        """
-        self.logger.info(f"Running Tester Agent for project: {self.project_name}")
-       
-        coder = CoderAgent(project_name=self.project_name, project_path=self.project_path)
-        all_content, _ = coder.get_all_content()
-        
-        # --- Read Context (Source Code, Existing Tests if updating) ---
-        self.logger.info(f"Reading source code from: {self.src_path}")
-        source_code = coder.read_all_code_files()
-        if not source_code:
-            self.logger.warning(f"No source code found in {self.src_path}.")
-            raise RuntimeError(f"Tester Agent failed during test generation: No source code found in project path") 
-       
-        # --- Generate or Update Test Cases ---
-        self.logger.info("Attempting to generate test cases using AI.")
-        generated_test_files_content = ""
-        try:
-            generated_test_files_content = self._generate(
-                all_content=all_content,
-                source_code=source_code
-            )
-
-            self.logger.info("Received tests generation response from LLM API.")
-            self.logger.debug(f"Generated Text (first 200 chars):\n{generated_test_files_content[:200]}...")
-
-            # --- Parsing the generated text into files ---
-            # Use the existing robust parser
-            generated_content = coder._parse_code_blocks(generated_test_files_content)
-            if not generated_content:
-                self.logger.warning("AI response parsed, but no valid test code blocks (```<<<FILENAME: ...```) found.")
-                raise RuntimeError("AI response parsed, but no valid test code blocks (```<<<FILENAME: ...```) found.")
-            test_files = coder._write_code_files(generated_content)
-            if not test_files:
-                self.logger.warning("Failed to write test files")
-                raise RuntimeError("Failed to write test files")
-            
-            log_action =  "generated"
-            self.logger.info(f"Successfully generatedcontent for {len(generated_test_files_content)} test file(s) using AI.")
-
-            return test_files
-
-        except (ValueError, ConnectionError, RuntimeError) as e:
-            self.logger.error(f"Failed to generate tests using AI: {e}")
-            raise RuntimeError(f"Tester Agent failed during test generation: {e}") # Re-raise to signal failure
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during test generation: {e}", exc_info=True)
-            raise RuntimeError(f"An unexpected error occurred during test generation: {e}")
-
-    def _generate(self, all_content: str, source_code: str) -> dict[str, str]:
-        """Uses Generative AI to create or update pytest test cases."""
-        # Model initialization is now handled by BaseAgent
-        if not self.model:
-            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
-            raise RuntimeError("TesterAgent requires a configured Generative Model.")
-
-        # Create mode
-        prompt = self._create_test_prompt(all_content, source_code)
-        self.logger.debug(f"Generated create prompt for LLM (Tester):\n{prompt[:500]}...")
-        try:
-            self.logger.info("Sending request to LLM API for test generation...")
-            # May need higher token limits for tests + source code context
-            # generation_config = genai.types.GenerationConfig(max_output_tokens=8192)
-            # response = model.generate_content(prompt, generation_config=generation_config)
-            generated_text = self.model.generate_content(prompt)
-            self.logger.info("Received test generation response from LLM API.")
-            self.logger.debug(f"Generated Test Text (first 200 chars):\n{generated_text[:200]}...")
-
-            return generated_text
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during LLM API call (Tester): {e}", exc_info=True)
-            raise RuntimeError(f"Failed to generate tests using AI: {e}")
-
-    def _create_test_prompt(self, all_content: str, source_code: str) -> str: # For initial creation
-        """Creates the prompt for the generative AI model to generate tests from scratch."""
-
-        prompt = f"""
-        **Act as a Test Automation Engineer.** Your task is to generate unit test code based on the provided project documentation and source code.
+# Static test generation instructions, sent as the system message so providers can cache them
+# across runs; the project documents and source code follow in the user message.
+_TEST_SYSTEM_PROMPT = """
+**Act as a Test Automation Engineer.** Your task is to generate unit test code based on the project documentation and source code provided in the user message.
 **Input:**
 
 1.  **Project Documentation (Markdown):** Contains project idea, features, integration details, and implementation plans.
-    ```markdown
-    {all_content}
-    ```
 
 2.  **Project Source Code:** The existing source code generated for the project.
-    ```markdown
-    {source_code}
-    ```
 
 **Instructions:**
 
@@ -179,7 +80,7 @@ class TesterAgent(BaseAgent):
     import static org.mockito.Mockito.*;
 
     @ExtendWith(MockitoExtension.class)
-    class DataProcessorTest {{
+    class DataProcessorTest {
 
         @Mock
         private DataRepository mockRepository;
@@ -188,7 +89,7 @@ class TesterAgent(BaseAgent):
         private DataProcessor systemUnderTest;
 
         @Test
-        void testProcessData_Success() {{
+        void testProcessData_Success() {
             // Given
             when(mockRepository.fetchData(anyString())).thenReturn("Sample Data");
 
@@ -198,24 +99,24 @@ class TesterAgent(BaseAgent):
             // Then
             assertEquals("Processed: Sample Data", result);
             verify(mockRepository).fetchData("id123");
-        }}
+        }
         // ... other tests ...
-    }}
+    }
     >>>
 
     *Example (TypeScript/Jest):*
     <<<FILENAME: src/services/__tests__/apiClient.test.ts
-    import {{ fetchData }} from '../apiClient';
+    import { fetchData } from '../apiClient';
     import axios from 'axios'; // Assuming axios is used
 
     jest.mock('axios');
     const mockedAxios = axios as jest.Mocked<typeof axios>;
 
-    describe('apiClient', () => {{
-      it('fetchData should return data on success', async () => {{
+    describe('apiClient', () => {
+      it('fetchData should return data on success', async () => {
         // Given
-        const mockData = {{ id: 1, name: 'Test Item' }};
-        mockedAxios.get.mockResolvedValue({{ data: mockData }});
+        const mockData = { id: 1, name: 'Test Item' };
+        mockedAxios.get.mockResolvedValue({ data: mockData });
 
         // When
         const result = await fetchData('/items/1');
@@ -223,9 +124,9 @@ class TesterAgent(BaseAgent):
         // Then
         expect(result).toEqual(mockData);
         expect(mockedAxios.get).toHaveBeenCalledWith('/items/1');
-      }});
+      });
       // ... other tests ...
-    }});
+    });
     >>>
 
 11. **Code Only:** Generate only the test code files within the formatted Markdown code blocks. Do not add explanatory text outside the code blocks unless it's a comment within the code itself.
@@ -233,6 +134,115 @@ class TesterAgent(BaseAgent):
 implement the test based on that assumption, and add a comment (e.g., `# TODO: Verify this assumption` or `// TODO: Clarify expected behavior for null input`).
  Generate the unit tests now based on the provided inputs and these instructions.
 """
-        return prompt
 
-  
+_TEST_USER_TMPL = Template(
+    "\n1.  **Project Documentation (Markdown):**\n    ```markdown\n    $all_content\n    ```\n"
+    "\n2.  **Project Source Code:**\n    ```markdown\n    $source_code\n    ```\n"
+)
+
+
+class TesterAgent(BaseAgent):
+    """
+    Generates and executes unit/integration tests based on the implementation
+    details (impl_*.md) and the generated source code.
+    """
+
+    MANIFEST_FILE = ".tests.json" # Test files written by the last run, kept in the project root
+
+    def run(self) -> list[str]:
+        """
+        Executes the Tester agent's task: generating or updating test files.
+        Sync shim over arun() for callers outside an event loop.
+        """
+        return asyncio.run(self.arun())
+
+    async def arun(self) -> list[str]:
+        """
+        Executes the Tester agent's task: generating or updating test files.
+        Does NOT execute the tests.
+
+        Returns:
+            A list of absolute paths to the generated  test files.
+        """
+        self.logger.info(f"Running Tester Agent for project: {self.project_name}")
+       
+        coder = CoderAgent(project_name=self.project_name, project_path=self.project_path)
+
+        # Skip the LLM call when neither the project documents nor the source files (other than the
+        # generated tests themselves) changed since the last successful run
+        manifest_path = os.path.join(self.project_path, self.MANIFEST_FILE)
+        previous_tests = json.loads(self._read_file(manifest_path) or "[]") if os.path.exists(manifest_path) else []
+        docs_fingerprint = coder.fingerprint()
+        source_state = coder.source_state()
+        inputs_hash = self._inputs_hash(docs_fingerprint, coder.source_state_digest(source_state, previous_tests), _TEST_SYSTEM_PROMPT)
+        if self._is_output_current(manifest_path, inputs_hash):
+            if previous_tests and all(os.path.exists(f) for f in previous_tests):
+                self.logger.info("Tests are up to date with the project documents and source code - skipping LLM call.")
+                return previous_tests
+        self._write_output_hash(manifest_path, None)
+
+        # --- Read Context (project documents and source code, concurrently) ---
+        self.logger.info(f"Reading source code from: {self.src_path}")
+        all_content, source_code = await coder.aread_project_context()
+        if not source_code:
+            self.logger.warning(f"No source code found in {self.src_path}.")
+            raise RuntimeError(f"Tester Agent failed during test generation: No source code found in project path") 
+       
+        # --- Generate or Update Test Cases ---
+        self.logger.info("Attempting to generate test cases using AI.")
+        try:
+            generated_test_files_content, test_files = await self._generate_test_files(coder, all_content, source_code)
+
+            self.logger.info("Received tests generation response from LLM API.")
+            self.logger.debug("Generated Text (first 200 chars):\n%.200s...", generated_test_files_content)
+
+            if test_files is None:
+                self.logger.warning("AI response parsed, but no valid test code blocks (```<<<FILENAME: ...```) found.")
+                raise RuntimeError("AI response parsed, but no valid test code blocks (```<<<FILENAME: ...```) found.")
+            if not test_files:
+                self.logger.warning("Failed to write test files")
+                raise RuntimeError("Failed to write test files")
+
+            self._write_file(manifest_path, json.dumps(test_files, indent=2))
+            self._write_output_hash(manifest_path, self._inputs_hash(
+                docs_fingerprint, coder.source_state_digest(source_state, test_files), _TEST_SYSTEM_PROMPT))
+
+            self.logger.info(f"Successfully generated content for {len(test_files)} test file(s) using AI.")
+
+            return test_files
+
+        except (ValueError, ConnectionError, RuntimeError) as e:
+            self.logger.error(f"Failed to generate tests using AI: {e}")
+            raise RuntimeError(f"Tester Agent failed during test generation: {e}") # Re-raise to signal failure
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during test generation: {e}", exc_info=True)
+            raise RuntimeError(f"An unexpected error occurred during test generation: {e}")
+
+    async def _generate_test_files(self, coder: CoderAgent, all_content: str, source_code: str) -> tuple[str, list[str] | None]:
+        """
+        Uses Generative AI to create or update pytest test cases. The response is streamed and each test file
+        is written as soon as its block closes, while the model is still generating the next one.
+
+        Returns:
+            The full response text and the paths of the written test files (None if the response had no valid blocks).
+        """
+        # Model initialization is now handled by BaseAgent
+        if not self.model:
+            self.logger.error("Generative model not initialized in BaseAgent. Cannot proceed.")
+            raise RuntimeError("TesterAgent requires a configured Generative Model.")
+
+        # Create mode
+        system_prompt, prompt = self._create_test_prompt(all_content, source_code)
+        self.logger.debug("Generated create prompt for LLM (Tester):\n%.500s...", prompt)
+        try:
+            self.logger.info("Sending request to LLM API for test generation...")
+            async with self._llm_semaphore():
+                return await coder.astream_to_code_files(self.model.stream_generate_content(prompt, system=system_prompt))
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during LLM API call (Tester): {e}", exc_info=True)
+            raise RuntimeError(f"Failed to generate tests using AI: {e}")
+
+    @staticmethod
+    def _create_test_prompt(all_content: str, source_code: str) -> tuple[str, str]: # For initial creation
+        """Creates the (system, user) prompts for the generative AI model to generate tests from scratch."""
+        return _TEST_SYSTEM_PROMPT, _TEST_USER_TMPL.substitute(all_content=all_content, source_code=source_code)
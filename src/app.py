@@ -12,9 +12,7 @@ class SimpleApp(App):
         yield Static("Hello, Textual World!")
         yield Footer()
 
-    def action_toggle_dark(self) -> None:
-        """An action to toggle dark mode."""
-        self.dark = not self.dark
+    # "toggle_dark" is handled by App.action_toggle_dark, which switches the theme in one batched update
 
 if __name__ == "__main__":
     app = SimpleApp()
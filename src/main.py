@@ -1,12 +1,12 @@
 import argparse
-from ast import arg
 import logging
 import os
 import sys
-import shutil
 import asyncio
-import re
+import collections
 import json
+import string
+import functools
 
 from dotenv import load_dotenv
 
@@ -24,13 +24,16 @@ from utils import slugify, load_config
 from agents import (
     InnovatorAgent, ArchitectAgent, CoderAgent, ReviewerAgent, TesterAgent,
     DocumenterAgent, MarketAnalystAgent, ResearchAgent, BusinessAgent, ScoringAgent,
-    IdeaGenAgent, CheckListTasksAgent, DiagramAgent, ImplTasksAgent
+    IdeaGenAgent, CheckListTasksAgent, DiagramAgent, ImplTasksAgent, CombinedIdeaAnalystAgent, CombinedDocsAgent, BaseAgent, run_dag
 )
 
 # --- Constants ---
 # Default projects directory, can be overridden by command-line argument
 DEFAULT_PROJECTS_DIR = os.path.expanduser('~/projects')
 VENV_DIR_NAME = ".venv"
+COMMAND_OUTPUT_MAX_LINES = 10000 # Last lines of each output stream kept by _execute_local_command
+COMMAND_LINE_LIMIT = 1024 * 1024 # Output lines longer than this (bytes) are split by _execute_local_command
+COMMAND_READ_CHUNK = 64 * 1024 # Bytes read from a command output pipe at a time
 
 # --- Color Constants ---
 STEP_COLOR = Fore.CYAN
@@ -74,7 +77,8 @@ def list_projects(projects_dir: str):
         print(f"{WARN_COLOR}No projects found (directory '{projects_dir}' missing).")
         return
     try:
-        projects = [d for d in os.listdir(projects_dir) if os.path.isdir(os.path.join(projects_dir, d))]
+        with os.scandir(projects_dir) as entries:
+            projects = [entry.name for entry in entries if entry.is_dir()]
         if not projects: print(f"{INFO_COLOR}No projects found.")
         else:
             print(f"{INFO_COLOR}Available projects:")
@@ -85,26 +89,35 @@ def list_projects(projects_dir: str):
 def handle_list_command(projects_dir: str):
     list_projects(projects_dir)
 
-def handle_idea_list_gen_command(idea_subject_text: str, subject_name:str, num_ideas: int, project_name: str | None, projects_dir: str, wild_mode: bool):
+async def handle_idea_list_gen_command(idea_subject_text: str, subject_name:str, num_ideas: int, project_name: str | None, projects_dir: str, wild_mode: bool):
     logger.info(f"Handling '--idea' action: Subject='{idea_subject_text[:50]} - Number of ideas to generate: {num_ideas}...', Project='{project_name}'")
     print(f"{AGENT_COLOR}Initializing IdeaGenAgent...{RESET_ALL}")
     project_path = get_project_path(project_name, projects_dir)
 
     idea_list_gen = IdeaGenAgent(project_name=project_name, project_path=project_path)
     try:
-        idea_list_json_path = idea_list_gen.run(idea_subject_text=idea_subject_text, subject_name=subject_name, num_ideas=num_ideas, wild_mode=wild_mode)
+        idea_list_json_path = await idea_list_gen.arun(idea_subject_text=idea_subject_text, subject_name=subject_name, num_ideas=num_ideas, wild_mode=wild_mode)
         print(f"{SUCCESS_COLOR}Successfully processed idea subject for project '{project_name}'. Concept saved to: {idea_list_json_path}")
     except Exception as e: logger.error(f"IdeaGenAgent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error processing idea: {e}")
 
+class _CleanTextTable(dict):
+    """str.translate table keeping ASCII letters and digits; any other code point maps to '_' (cached on first use)."""
+    def __missing__(self, codepoint):
+        self[codepoint] = '_'
+        return '_'
+
+_CLEAN_TEXT_TABLE = _CleanTextTable((ord(ch), ch) for ch in string.ascii_letters + string.digits)
+
 def clean_text(text):
     # Replace any character that is not a-z, A-Z, or 0-9 with an underscore
-    return re.sub(r'[^a-zA-Z0-9]', '_', text)
+    return text.translate(_CLEAN_TEXT_TABLE)
 
-def handle_idea_list_bulk_command(bulk_file: str, project_name: str | None, projects_dir: str, wild_mode: bool):
+async def handle_idea_list_bulk_command(bulk_file: str, project_name: str | None, projects_dir: str, wild_mode: bool):
     with open(bulk_file, 'r') as f:
         data = json.load(f)
 
     startup_ideas = data.get("startup_ideas", [])
+    bulk_projects = []
     for idea in startup_ideas:
         print(f"ID: {idea['id']}")
         print(f"Category: {idea['category']}")
@@ -116,11 +129,22 @@ def handle_idea_list_bulk_command(bulk_file: str, project_name: str | None, proj
         new_projects_dir = os.path.join(projects_dir, clean_text(idea['category']))
 
         os.makedirs(new_projects_dir, exist_ok=True)
-        handle_idea_command(idea['description'], project_name=new_project_name, projects_dir=new_projects_dir, wild_mode=wild_mode)
-        handle_business_command(project_name=new_project_name, projects_dir=new_projects_dir)
-        handle_scoring_command(project_name=new_project_name, projects_dir=new_projects_dir)
-
-def handle_idea_command(idea_text: str, project_name: str | None, projects_dir: str, wild_mode: bool):
+        bulk_projects.append((idea['description'], new_project_name, new_projects_dir))
+
+    # Projects are independent of each other; within a project idea -> business -> scoring.
+    # Each project moves on to its business/scoring step as soon as its own idea.md is ready.
+    nodes = {}
+    for description, new_project_name, new_projects_dir in bulk_projects:
+        key = os.path.join(new_projects_dir, new_project_name)
+        nodes[f"{key}:idea"] = ([], functools.partial(handle_idea_command, description, project_name=new_project_name,
+                                                       projects_dir=new_projects_dir, wild_mode=wild_mode))
+        nodes[f"{key}:business"] = ([f"{key}:idea"], functools.partial(handle_business_command,
+                                                                          project_name=new_project_name, projects_dir=new_projects_dir))
+        nodes[f"{key}:scoring"] = ([f"{key}:business"], functools.partial(handle_scoring_command,
+                                                                             project_name=new_project_name, projects_dir=new_projects_dir))
+    await run_dag(nodes)
+
+async def handle_idea_command(idea_text: str, project_name: str | None, projects_dir: str, wild_mode: bool, with_analysis: bool = False):
     logger.info(f"Handling '--idea' action: Text='{idea_text[:50]}...', Project='{project_name}'")
     if not project_name:
         project_name = slugify(idea_text)
@@ -129,78 +153,87 @@ def handle_idea_command(idea_text: str, project_name: str | None, projects_dir:
     project_path = get_project_path(project_name, projects_dir)
     try: ensure_project_structure(project_path)
     except Exception: print(f"{ERROR_COLOR}Error: Failed to set up project structure for '{project_name}'."); return
+    if with_analysis:
+        # One LLM request produces both idea.md and market_analysis.md
+        print(f"{AGENT_COLOR}Initializing Combined Idea Analyst Agent...{RESET_ALL}")
+        idea_analyst = CombinedIdeaAnalystAgent(project_name=project_name, project_path=project_path)
+        try:
+            idea_md_path, analysis_md_path = await idea_analyst.arun(idea_text=idea_text, wild_mode=wild_mode)
+            print(f"{SUCCESS_COLOR}Successfully processed idea for project '{project_name}'. Concept saved to: {idea_md_path}, analysis saved to: {analysis_md_path}")
+        except Exception as e: logger.error(f"Combined Idea Analyst Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error processing idea: {e}")
+        return
     print(f"{AGENT_COLOR}Initializing Innovator Agent...{RESET_ALL}")
     innovator = InnovatorAgent(project_name=project_name, project_path=project_path)
     try:
-        idea_md_path = innovator.run(idea_text=idea_text, wild_mode=wild_mode)
+        idea_md_path = await innovator.arun(idea_text=idea_text, wild_mode=wild_mode)
         print(f"{SUCCESS_COLOR}Successfully processed idea for project '{project_name}'. Concept saved to: {idea_md_path}")
     except Exception as e: logger.error(f"Innovator Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error processing idea: {e}")
 
-def handle_check_list_tasks_command(project_name: str | None, projects_dir: str):
+async def handle_check_list_tasks_command(project_name: str | None, projects_dir: str, num_variants: int = 1):
     logger.info(f"Handling '--check-list-tasks', Project='{project_name}'")
     project_path = get_project_path(project_name, projects_dir)
     print(f"{AGENT_COLOR}Initializing CheckListTasks Agent...{RESET_ALL}")
     tasks = CheckListTasksAgent(project_name=project_name, project_path=project_path)
     try:
-        tasks_md_path = tasks.run()
+        tasks_md_path = await tasks.arun(num_variants=num_variants)
         print(f"{SUCCESS_COLOR}Successfully genrated check list tasks  for the project '{project_name}'. Check list report saved to: {tasks_md_path}")
     except Exception as e: logger.error(f"CheckListTasksAgent Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error geenrating check list tasks for project: {e}")
 
 
-def handle_impl_tasks_command(project_name: str | None, projects_dir: str):
+async def handle_impl_tasks_command(project_name: str | None, projects_dir: str):
     logger.info(f"Handling '--impl-tasks', Project='{project_name}'")
     project_path = get_project_path(project_name, projects_dir)
     print(f"{AGENT_COLOR}Initializing ImplTasks Agent...{RESET_ALL}")
     tasks = ImplTasksAgent(project_name=project_name, project_path=project_path)
     try:
-        impl_tasks_md_path = tasks.run()
+        impl_tasks_md_path = await tasks.arun()
         print(f"{SUCCESS_COLOR}Successfully genrated implemntation tasks  for the project '{project_name}'. Check list report saved to: {impl_tasks_md_path}")
     except Exception as e: logger.error(f"ImplTasksAgent Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error geenrating implementation tasks for project: {e}")
 
 
-def handle_tests_command(project_name: str | None, projects_dir: str):
+async def handle_tests_command(project_name: str | None, projects_dir: str):
     logger.info(f"Handling '--tests', Project='{project_name}'")
     project_path = get_project_path(project_name, projects_dir)
     print(f"{AGENT_COLOR}Initializing Tester Agent...{RESET_ALL}")
     tester = TesterAgent(project_name=project_name, project_path=project_path)
     try:
-        tests_path = tester.run()
+        tests_path = await tester.arun()
         print(f"{SUCCESS_COLOR}Successfully genrated testing code for the project '{project_name}'. Tasks report saved to: {tests_path}")
     except Exception as e: logger.error(f"Tester Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error geenrating testing code for project: {e}")
 
 
-def handle_diagrams_command(project_name: str | None, projects_dir: str):
+async def handle_diagrams_command(project_name: str | None, projects_dir: str):
     logger.info(f"Handling '--diagrams', Project='{project_name}'")
     project_path = get_project_path(project_name, projects_dir)
     print(f"{AGENT_COLOR}Initializing Diagram Agent...{RESET_ALL}")
     diagrams = DiagramAgent(project_name=project_name, project_path=project_path)
     try:
-        diagrams_path = diagrams.run()
+        diagrams_path = await diagrams.arun()
         print(f"{SUCCESS_COLOR}Successfully genrated diagrams for the project '{project_name}'. Tasks report saved to: {diagrams_path}")
     except Exception as e: logger.error(f"Diagram Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error geenrating diagrams for project: {e}")
 
-def handle_business_command(project_name: str | None, projects_dir: str):
+async def handle_business_command(project_name: str | None, projects_dir: str):
     logger.info(f"Handling '--business', Project='{project_name}'")
     project_path = get_project_path(project_name, projects_dir)
     print(f"{AGENT_COLOR}Initializing Business Agent...{RESET_ALL}")
     business = BusinessAgent(project_name=project_name, project_path=project_path)
     try:
-        business_md_path = business.run()
+        business_md_path = await business.arun()
         print(f"{SUCCESS_COLOR}Successfully genrated business perspective for project '{project_name}'. Business report saved to: {business_md_path}")
     except Exception as e: logger.error(f"Business Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error geenrating business perspective for project: {e}")
 
-def handle_scoring_command(project_name: str | None, projects_dir: str):
+async def handle_scoring_command(project_name: str | None, projects_dir: str):
     logger.info(f"Handling '--scoring', Project='{project_name}'")
     project_path = get_project_path(project_name, projects_dir)
     print(f"{AGENT_COLOR}Initializing Scoring Agent...{RESET_ALL}")
     scoring = ScoringAgent(project_name=project_name, project_path=project_path)
     try:
-        scoring_md_path = scoring.run()
+        scoring_md_path = await scoring.arun()
         print(f"{SUCCESS_COLOR}Successfully genrated business perspective scoring for project '{project_name}'. Score report saved to: {scoring_md_path}")
     except Exception as e: logger.error(f"Scoring Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error geenrating scoring business perspective for project: {e}")
 
 
-def handle_analyze_idea_command(project_name: str, projects_dir: str):
+async def handle_analyze_idea_command(project_name: str, projects_dir: str, num_variants: int = 1):
     logger.info(f"Handling '--analyze-idea' action for project: {project_name}")
     project_path = get_project_path(project_name, projects_dir)
     if not os.path.exists(project_path) or not os.path.isdir(project_path): logger.error(f"Project '{project_name}' not found."); print(f"{ERROR_COLOR}Error: Project '{project_name}' does not exist."); return
@@ -209,7 +242,7 @@ def handle_analyze_idea_command(project_name: str, projects_dir: str):
     print(f"{AGENT_COLOR}Initializing Market Analyst Agent...{RESET_ALL}")
     analyst = MarketAnalystAgent(project_name=project_name, project_path=project_path)
     try:
-        analysis_md_path = analyst.run()
+        analysis_md_path = await analyst.arun(num_variants=num_variants)
         print(f"{SUCCESS_COLOR}Successfully analyzed idea for project '{project_name}'. Analysis saved to: {analysis_md_path}")
     except Exception as e: logger.error(f"Market Analyst Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error analyzing idea: {e}")
 
@@ -228,7 +261,7 @@ def handle_docs_command(doc_type: str, project_name: str, projects_dir: str):
         print(f"{SUCCESS_COLOR}Successfully generated '{doc_type}' documentation for project '{project_name}'. Saved to: {generated_doc_path}")
     except Exception as e: logger.error(f"Documenter Agent failed for type '{doc_type}': {e}", exc_info=True); print(f"{ERROR_COLOR}Error generating documentation: {e}")
 
-def handle_research_command(project_name: str, projects_dir: str):
+async def handle_research_command(project_name: str, projects_dir: str):
     logger.info(f"Handling '--research' action for project: {project_name}")
     project_path = get_project_path(project_name, projects_dir)
     if not os.path.exists(project_path) or not os.path.isdir(project_path): logger.error(f"Project '{project_name}' not found."); print(f"{ERROR_COLOR}Error: Project '{project_name}' does not exist."); return
@@ -237,11 +270,38 @@ def handle_research_command(project_name: str, projects_dir: str):
     print(f"{AGENT_COLOR}Initializing Research Agent...{RESET_ALL}")
     researcher = ResearchAgent(project_name=project_name, project_path=project_path)
     try:
-        research_summary_path = researcher.run()
+        research_summary_path = await researcher.arun()
         print(f"{SUCCESS_COLOR}Successfully performed research for project '{project_name}'. Summary saved to: {research_summary_path}")
     except Exception as e: logger.error(f"Research Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error performing research: {e}")
 
 
+async def handle_reviews_command(project_name: str, projects_dir: str):
+    """Handles the --reviews command: runs every idea.md based agent concurrently (scoring waits for business.md)."""
+    logger.info(f"Handling '--reviews' action for project: {project_name}")
+    project_path = get_project_path(project_name, projects_dir)
+    if not os.path.exists(os.path.join(project_path, "docs", "idea.md")): logger.error(f"Cannot review: 'docs/idea.md' not found."); print(f"{ERROR_COLOR}Error: 'docs/idea.md' not found."); return
+    nodes = {
+        "analyze": ([], functools.partial(handle_analyze_idea_command, project_name=project_name, projects_dir=projects_dir)),
+        "research": ([], functools.partial(handle_research_command, project_name=project_name, projects_dir=projects_dir)),
+        "check_list_tasks": ([], functools.partial(handle_check_list_tasks_command, project_name=project_name, projects_dir=projects_dir)),
+        "business": ([], functools.partial(handle_business_command, project_name=project_name, projects_dir=projects_dir)),
+        "scoring": (["business"], functools.partial(handle_scoring_command, project_name=project_name, projects_dir=projects_dir)),
+    }
+    await run_dag(nodes)
+
+
+async def handle_combined_docs_command(project_name: str, projects_dir: str):
+    logger.info(f"Handling '--combined-docs' action for project: {project_name}")
+    project_path = get_project_path(project_name, projects_dir)
+    if not os.path.exists(os.path.join(project_path, "docs", "business.md")): logger.error(f"Cannot generate docs: 'docs/business.md' not found."); print(f"{ERROR_COLOR}Error: 'docs/business.md' not found. Run --business first."); return
+    print(f"{AGENT_COLOR}Initializing Combined Docs Agent...{RESET_ALL}")
+    combined = CombinedDocsAgent(project_name=project_name, project_path=project_path)
+    try:
+        doc_paths = await combined.arun()
+        print(f"{SUCCESS_COLOR}Successfully generated scoring, check list tasks and market analysis for project '{project_name}'. Saved to: {', '.join(doc_paths)}")
+    except Exception as e: logger.error(f"Combined Docs Agent failed: {e}", exc_info=True); print(f"{ERROR_COLOR}Error generating combined docs: {e}")
+
+
 async def handle_build_features_command(project_name: str, projects_dir: str, execute_command_func):
     """Handles the --build-features command: Runs the Architect Agent to generate architecture docs for features."""
     logger.info(f"Handling '--build-features' action (Architect only) for project: {project_name}")
@@ -351,11 +411,11 @@ async def handle_code_command(project_name: str, projects_dir: str, execute_comm
     # Check for existence of *any* implementation plan files
     docs_path = os.path.join(project_path, "docs")
     try:
-        plan_files_exist = any(
-            (f.startswith("impl_") and f.endswith(".md"))
-            for f in os.listdir(docs_path)
-            if os.path.isfile(os.path.join(docs_path, f))
-        )
+        with os.scandir(docs_path) as entries:
+            plan_files_exist = any(
+                entry.name.startswith("impl_") and entry.name.endswith(".md") and entry.is_file()
+                for entry in entries
+            )
     except FileNotFoundError:
         logger.error(f"Documentation directory not found: {docs_path}")
         print(f"{ERROR_COLOR}Error: Documentation directory '{docs_path}' not found.")
@@ -375,7 +435,7 @@ async def handle_code_command(project_name: str, projects_dir: str, execute_comm
     coder = CoderAgent(project_name=project_name, project_path=project_path)
     generated_files = []
     try:
-        generated_files = coder.run()
+        generated_files = await coder.arun()
         status_msg = "Code generated" 
         print(f"{SUCCESS_COLOR}{status_msg} for {len(generated_files)} file(s).{RESET_ALL}")
     except Exception as e:
@@ -397,7 +457,7 @@ async def handle_review_command(project_name: str, projects_dir: str, execute_co
         return
 
     impl_md_path = os.path.join(project_path, "docs", "impl_*.md")
-    if not os.path.exists(impl_md_path):
+    if not glob.glob(impl_md_path):
         logger.error(f"Cannot review: 'docs/impl_*.md' not found.")
         print(f"{ERROR_COLOR}Error: 'docs/impl_*.md' not found. Please run --build first.")
         return
@@ -409,21 +469,11 @@ async def handle_review_command(project_name: str, projects_dir: str, execute_co
          # Decide if review should proceed or stop
          # return # Option: Stop if no code exists
 
+    reviewer = ReviewerAgent(project_name=project_name, project_path=project_path)
+
     # Read implementation plan content
-    impl_content = ""
     try:
-        impl_files = glob.glob(impl_md_path)
-        if not impl_files:
-            logger.error("impl_*.md not found. Cannot proceed.")
-            print(f"{ERROR_COLOR}Error: impl_*.md is required for review.")
-            return
-
-        for file in impl_files:
-            try:
-                impl_content += DocumenterAgent(project_name, project_path)._read_file(file) + "\n\n"
-            except Exception as e:
-                logger.error(f"Failed to read {file}: {e}")
-
+        impl_content = reviewer._read_impl_plans()
         if not impl_content.strip():
             logger.error("No content read from impl_*.md files. Cannot proceed.")
             print(f"{ERROR_COLOR}Error: impl_*.md is required for review.")
@@ -436,7 +486,6 @@ async def handle_review_command(project_name: str, projects_dir: str, execute_co
 
     # === Run Reviewer Agent ===
     print(f"{STEP_COLOR}Running Reviewer Agent...{RESET_ALL}")
-    reviewer = ReviewerAgent(project_name=project_name, project_path=project_path)
     review_md_path = os.path.join(project_path, "docs", "review.md")
     try:
         # Assuming reviewer.run now handles writing the review to 'docs/review.md'
@@ -467,9 +516,38 @@ async def handle_review_command(project_name: str, projects_dir: str, execute_co
     print(f"\n{SUCCESS_COLOR}Review finished successfully for project '{project_name}'.{RESET_ALL}")
 
 # --- Local Command Execution (Fallback for direct script run) ---
+async def _read_output_lines(stream: asyncio.StreamReader, label: str) -> str:
+    """
+    Logs each output line as it arrives and returns the last COMMAND_OUTPUT_MAX_LINES of them.
+    Reads fixed-size chunks and splits the lines itself, so an overlong line (split every
+    COMMAND_LINE_LIMIT bytes) cannot stall the reader or fail it the way readline() does.
+    """
+    lines = collections.deque(maxlen=COMMAND_OUTPUT_MAX_LINES)
+
+    def add_line(line: bytes):
+        text = line.decode('utf-8', errors='replace').rstrip("\r")
+        logger.debug("%s: %s", label, text)
+        lines.append(text)
+
+    partial = b""
+    while chunk := await stream.read(COMMAND_READ_CHUNK):
+        *complete, partial = (partial + chunk).split(b"\n")
+        for line in complete:
+            add_line(line)
+        while len(partial) > COMMAND_LINE_LIMIT:
+            add_line(partial[:COMMAND_LINE_LIMIT])
+            partial = partial[COMMAND_LINE_LIMIT:]
+    if partial:
+        add_line(partial)
+    return "\n".join(lines).strip()
+
 async def _execute_local_command(command: str, cwd: str | None = None, **kwargs) -> dict:
-    """Executes a shell command locally using asyncio.create_subprocess_shell."""
+    """
+    Executes a shell command locally using asyncio.create_subprocess_shell.
+    Output is streamed line by line (only the tail of each stream is kept), so long runs show progress in the debug log.
+    """
     logger.info(f"Executing local command: '{command}' in cwd: {cwd or os.getcwd()}")
+    process = None
     try:
         process = await asyncio.create_subprocess_shell(
             command,
@@ -477,9 +555,11 @@ async def _execute_local_command(command: str, cwd: str | None = None, **kwargs)
             stderr=asyncio.subprocess.PIPE,
             cwd=cwd
         )
-        stdout, stderr = await process.communicate()
-        stdout_str = stdout.decode().strip()
-        stderr_str = stderr.decode().strip()
+        stdout_str, stderr_str = await asyncio.gather(
+            _read_output_lines(process.stdout, "STDOUT"),
+            _read_output_lines(process.stderr, "STDERR"),
+        )
+        await process.wait()
 
         if process.returncode != 0:
             logger.error(f"Local command failed with exit code {process.returncode}")
@@ -487,7 +567,6 @@ async def _execute_local_command(command: str, cwd: str | None = None, **kwargs)
             logger.error(f"STDOUT:\n{stdout_str}")
         else:
              logger.info(f"Local command finished successfully.")
-             if stdout_str: logger.debug(f"STDOUT:\n{stdout_str}")
              if stderr_str: logger.warning(f"STDERR:\n{stderr_str}") # Log stderr even on success as warnings
 
         return {"stdout": stdout_str, "stderr": stderr_str, "returncode": process.returncode}
@@ -500,6 +579,14 @@ async def _execute_local_command(command: str, cwd: str | None = None, **kwargs)
         err_msg = f"An unexpected error occurred executing local command '{command}': {e}"
         logger.error(err_msg, exc_info=True)
         return {"stdout": "", "stderr": err_msg, "returncode": -1}
+    finally:
+        # Reached with a running child only on errors or cancellation: don't leave it behind with unread pipes
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
 
 
 # --- Main Execution ---
@@ -529,6 +616,8 @@ async def main(execute_command_func):
     action_group.add_argument('--scoring', action='store_true', help='Generate scoring docs (scoring.md) (requires --project)')
     action_group.add_argument('--research', action='store_true', help='Perform technical research for idea (requires --project)')
     action_group.add_argument('--analyze', action='store_true', help='Perform market analysis for idea (requires --project)')
+    action_group.add_argument('--reviews', action='store_true', help='Run market analysis, research, check list tasks, business and scoring concurrently (requires --project)')
+    action_group.add_argument('--combined-docs', action='store_true', help='Generate scoring.md, tasks.md and market_analysis.md in a single LLM request (requires --project and business.md)')
     action_group.add_argument('--docs', type=str, metavar='TYPE', help=f"Generate specific doc (requires --project).\nTypes: {', '.join(sorted(DocumenterAgent.SUPPORTED_DOC_TYPES))}")
     #action_group.add_argument('--build', action='store_true', help='Generate architecture docs (impl_*.md) (requires --project)')
     action_group.add_argument('--build-features', action='store_true', help='Generate architecture docs from (features*.md) for all features - Generates (impl_[feature]_[component]*.md) (requires --project)')
@@ -543,6 +632,8 @@ async def main(execute_command_func):
                         help=f'Directory to store projects (default: {DEFAULT_PROJECTS_DIR})')
 
     parser.add_argument('--wild', action='store_true', default=False, help='Use wild mode - innovatiove and futuristic prompt')
+    parser.add_argument('--with-analysis', action='store_true', default=False, help='With --idea: also generate market_analysis.md in the same LLM request')
+    parser.add_argument('--variants', type=int, metavar='NUMBER', default=1, help='With --analyze / --check-list-tasks: sample NUMBER drafts in one request (written as *.v1.md, *.v2.md, ...)')
     parser.add_argument('--num-ideas', type=int, metavar='NUMBER', help='Number of ideas to genenrate according to subject (required subject)')
     parser.add_argument('--subject-name', type=str, metavar='TEXT', help='subject name - new json file name')
 
@@ -566,31 +657,37 @@ async def main(execute_command_func):
         if args.list:
             handle_list_command(projects_dir)
         elif args.subject:
-            handle_idea_list_gen_command(idea_subject_text=args.subject, subject_name=args.subject_name, 
+            await handle_idea_list_gen_command(idea_subject_text=args.subject, subject_name=args.subject_name, 
                                         num_ideas=args.num_ideas, project_name="unknown",
                                         projects_dir=projects_dir, wild_mode=args.wild)
         elif args.bulk:
-            handle_idea_list_bulk_command(bulk_file=args.bulk, project_name="unknown", projects_dir=projects_dir, wild_mode=args.wild)
+            await handle_idea_list_bulk_command(bulk_file=args.bulk, project_name="unknown", projects_dir=projects_dir, wild_mode=args.wild)
         elif args.idea:
-            handle_idea_command(idea_text=args.idea, project_name=project_name, projects_dir=projects_dir, wild_mode=args.wild)
+            await handle_idea_command(idea_text=args.idea, project_name=project_name, projects_dir=projects_dir, wild_mode=args.wild, with_analysis=args.with_analysis)
         elif args.check_list_tasks:
-            handle_check_list_tasks_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_check_list_tasks_command(project_name=project_name, projects_dir=projects_dir, num_variants=args.variants)
         elif args.impl_tasks:
-            handle_impl_tasks_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_impl_tasks_command(project_name=project_name, projects_dir=projects_dir)
         elif args.tests:
-            handle_tests_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_tests_command(project_name=project_name, projects_dir=projects_dir)
         elif args.diagrams:
-            handle_diagrams_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_diagrams_command(project_name=project_name, projects_dir=projects_dir)
         elif args.business:
-            handle_business_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_business_command(project_name=project_name, projects_dir=projects_dir)
         elif args.scoring:
-            handle_scoring_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_scoring_command(project_name=project_name, projects_dir=projects_dir)
         elif args.research:
             if not project_name: parser.error("--research requires --project NAME")
-            handle_research_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_research_command(project_name=project_name, projects_dir=projects_dir)
         elif args.analyze:
             if not project_name: parser.error("--analyze requires --project NAME")
-            handle_analyze_idea_command(project_name=project_name, projects_dir=projects_dir)
+            await handle_analyze_idea_command(project_name=project_name, projects_dir=projects_dir, num_variants=args.variants)
+        elif args.reviews:
+            if not project_name: parser.error("--reviews requires --project NAME")
+            await handle_reviews_command(project_name=project_name, projects_dir=projects_dir)
+        elif args.combined_docs:
+            if not project_name: parser.error("--combined-docs requires --project NAME")
+            await handle_combined_docs_command(project_name=project_name, projects_dir=projects_dir)
         elif args.docs:
             if not project_name: parser.error("--docs requires --project NAME")
             if args.docs not in DocumenterAgent.SUPPORTED_DOC_TYPES: parser.error(f"Invalid doc type '{args.docs}'. Supported: {', '.join(DocumenterAgent.SUPPORTED_DOC_TYPES)}")
@@ -617,6 +714,8 @@ async def main(execute_command_func):
          logger.critical(f"An unhandled exception occurred: {e}", exc_info=True)
          print(f"{ERROR_COLOR}An critical error occurred. Check logs for details: {e}")
          sys.exit(1)
+    finally:
+        BaseAgent.finalize() # One fsync per file written during the run
 
 if __name__ == "__main__":
     try:
@@ -6,6 +6,10 @@ import os
 
 logger = logging.getLogger(__name__)
 
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]') # Characters removed from slugs
+_SLUG_DASH_RE = re.compile(r'[-\s]+') # Runs of spaces / dashes collapsed to one dash
+_SLUG_TRIM_RE = re.compile(r'^[-\s_]+|[-\s_]+$') # Leading / trailing separators
+
 def slugify(value: str, allow_unicode=False) -> str:
     """
     Convert spaces or repeated dashes to single dashes. Remove characters that
@@ -17,15 +21,15 @@ def slugify(value: str, allow_unicode=False) -> str:
     value = str(value)
     if allow_unicode:
         value = unicodedata.normalize('NFKC', value)
-        value = re.sub(r'[^\w\s-]', '', value.lower())
+        value = _SLUG_STRIP_RE.sub('', value.lower())
     else:
         value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
-        value = re.sub(r'[^\w\s-]', '', value).strip().lower()
+        value = _SLUG_STRIP_RE.sub('', value).strip().lower()
     # Replace spaces and repeated dashes with single dashes
-    value = re.sub(r'[-\s]+', '-', value)
+    value = _SLUG_DASH_RE.sub('-', value)
     # Remove leading/trailing whitespace, dashes, underscores
-    value = re.sub(r'^[-\s_]+|[-\s_]+$', '', value)
-    logger.debug(f"Slugified '{value[:50]}...' to '{value}'")
+    value = _SLUG_TRIM_RE.sub('', value)
+    logger.debug("Slugified '%.50s...' to '%s'", value, value)
     return value
 
 